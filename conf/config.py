@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List, Literal
 
 from pydantic_settings import BaseSettings
 
@@ -7,15 +7,123 @@ class Settings(BaseSettings):
     BIND_IP: str
     BIND_PORT: int
     DB_URL: str
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    # сколько ждать свободного соединения, прежде чем отдать TimeoutError
+    DB_POOL_TIMEOUT: float = 30
+    # -1 - не пересоздавать соединения по возрасту
+    DB_POOL_RECYCLE: int = 30 * 60
+    DB_POOL_PRE_PING: bool = False
+    # за pgbouncer в режиме transaction кэш подготовленных запросов надо выключать
+    DB_STATEMENT_CACHE: bool = False
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # реплики для чтения; пусто - всё читается с primary
+    DB_REPLICA_URLS: List[str] = []
+    # пул на каждую реплику: на двух репликах с пулом primary соединений втрое больше
+    DB_REPLICA_POOL_SIZE: int = 5
+    DB_REPLICA_MAX_OVERFLOW: int = 5
+    # сколько не обращаться к реплике после ошибки соединения
+    DB_REPLICA_RETRY_AFTER: float = 30
+    # как часто фоном проверять доступность реплик
+    DB_REPLICA_CHECK_INTERVAL: float = 5
+    # сколько после записи читать данные с primary, а не с отстающей реплики
+    DB_REPLICA_STALENESS: float = 5
 
     JWT_SECRET_SALT: str
+    JWT_CACHE_SIZE: int = 10000
+    JWT_CACHE_TTL: float = 300
     KAFKA_BOOTSTRAP_SERVERS: List[str]
     KAFKA_TOPIC: str
+    # отдельные топики для лёгких и тяжёлых задач; не заданы - задачи идут в KAFKA_TOPIC
+    KAFKA_TOPIC_FAST: str | None = None
+    KAFKA_TOPIC_BULK: str | None = None
+    KAFKA_CONSUMER_GROUP: str = 'sirius_resize_worker'
+    # sync - ждём подтверждения брокера в запросе, buffered - только места в локальном буфере
+    KAFKA_PUBLISH_MODE: Literal['sync', 'buffered'] = 'sync'
+    KAFKA_LINGER_MS: int = 5
+    KAFKA_MAX_BATCH_SIZE: int = 16384
+    # gzip, snappy, lz4, zstd
+    KAFKA_COMPRESSION_TYPE: str | None = None
+    # hash - по ключу KAFKA_PARTITION_KEY, random - случайная партиция
+    KAFKA_PARTITIONER: Literal['random', 'hash'] = 'hash'
+    # user_id - порядок задач одного пользователя, content_hash - равномерно даже при «горячих» пользователях
+    KAFKA_PARTITION_KEY: Literal['user_id', 'content_hash'] = 'user_id'
+    KAFKA_PARTITIONS_REFRESH_INTERVAL: float = 60
+    KAFKA_OUTBOX_SIZE: int = 10000
+    KAFKA_OUTBOX_PUT_TIMEOUT: float = 0.5
 
     REDIS_HOST: str
     REDIS_PORT: int
     REDIS_PASSWORD: str
     REDIS_SIRIUS_CACHE_PREFIX: str = 'sirius'
+    USER_CACHE_TTL: int = 5 * 60
+    USER_NEGATIVE_CACHE_TTL: int = 10
+    USER_FILES_PAGE_SIZE: int = 50
+    USER_FILES_MAX_PAGE_SIZE: int = 500
+    USER_FILES_CACHE_TTL: int = 10 * 60
+    # в redis держим только свежие результаты, остальные читаются из таблицы file
+    RESULT_CACHE_TTL: int = 60 * 60
+    # отметка о задаче в работе; дольше неё задача ждёт только при отставании воркеров
+    RESULT_PENDING_TTL: int = 60 * 60
+    RESIZE_DEDUP_TTL: int = 24 * 60 * 60
+    RESIZE_MAX_VARIANTS: int = 10
+    RESIZE_WAIT_MAX_TIMEOUT: float = 30
+    RESIZE_WAIT_MAX_TASKS: int = 100
+    RESIZE_STATUS_MAX_TASKS: int = 100
+    RESIZE_EVENTS_HEARTBEAT: float = 15
+
+    # токенов в секунду и размер корзины на пользователя для POST /file/resize*
+    RATE_LIMIT_RESIZE_RATE: float = 2
+    RATE_LIMIT_RESIZE_BURST: int = 20
+    # отставание воркеров по топику дорожки, после которого новые задачи не принимаются; None - без ограничения
+    ADMISSION_MAX_QUEUE_LAG: int | None = 10000
+    # доля заполнения буфера KAFKA_OUTBOX_SIZE в режиме buffered
+    ADMISSION_MAX_OUTBOX_FILL: float = 0.9
+    ADMISSION_REFRESH_INTERVAL: float = 1
+    ADMISSION_RETRY_AFTER: int = 5
+    QUEUE_LAG_TTL: int = 30
+
+    MINIO_ENDPOINT: str = 'minio:9000'
+    MINIO_ACCESS_KEY: str = 'MINIO_LOGIN'
+    MINIO_SECRET_KEY: str = 'MINIO_PASS'
+    MINIO_SECURE: bool = False
+    MINIO_PUBLIC_URL: str = 'http://localhost:9000'
+    MINIO_ORIGINALS_BUCKET: str = 'originals'
+    MINIO_RESIZED_BUCKET: str = 'resized'
+    # меньше 5 MiB multipart upload в S3 не принимает
+    MINIO_PART_SIZE: int = 5 * 1024 * 1024
+    MINIO_DOWNLOAD_CHUNK_SIZE: int = 64 * 1024
+    # ключи ресайзов содержат task_id и не перезаписываются
+    FILE_CONTENT_MAX_AGE: int = 365 * 24 * 60 * 60
+
+    UPLOAD_MAX_SIZE: int = 20 * 1024 * 1024
+    UPLOAD_CHUNK_SIZE: int = 64 * 1024
+
+    # None - по количеству ядер
+    WORKER_PROCESSES: int | None = None
+    WORKER_MAX_IN_FLIGHT: int = 32
+    WORKER_POLL_TIMEOUT_MS: int = 1000
+    WORKER_METRICS_PORT: int = 8001
+    # пауза перед повтором задач после временной ошибки, удваивается до WORKER_RETRY_MAX_DELAY
+    WORKER_RETRY_DELAY: float = 0.5
+    WORKER_RETRY_MAX_DELAY: float = 30
+    # задача идёт в fast, если оригинал и суммарная площадь вариантов не больше порогов
+    LANE_FAST_MAX_BYTES: int = 2 * 1024 * 1024
+    LANE_FAST_MAX_AREA: int = 1024 * 1024
+    # дорожки, которые разбирает воркер, и их доли в WORKER_MAX_IN_FLIGHT и WORKER_PROCESSES
+    WORKER_LANES: List[Literal['fast', 'bulk']] = ['fast', 'bulk']
+    WORKER_LANE_WEIGHTS: Dict[str, int] = {'fast': 3, 'bulk': 1}
+    # результаты пишутся в postgres пачками: по размеру пачки или по истечении задержки
+    WORKER_PERSIST_BATCH_SIZE: int = 32
+    WORKER_PERSIST_MAX_LAG: float = 0.05
+
+    # None - по количеству доступных ядер
+    WEB_WORKERS: int | None = None
+    WEB_GRACEFUL_TIMEOUT: int = 30
+    METRICS_MULTIPROC_DIR: str = '/tmp/sirius_metrics'
+
+    # границы бакетов гистограмм задержек, например [0.01, 0.05, 0.1, 0.5, 1]; None - DEFAULT_BUCKETS
+    METRICS_BUCKETS: List[float] | None = None
 
 
 settings = Settings()
@@ -0,0 +1,34 @@
+import os
+import shutil
+
+from uvicorn.workers import UvicornWorker
+
+from conf.config import settings
+
+# prometheus_client выбирает хранилище значений при импорте, поэтому каталог
+# задаётся до того, как воркеры импортируют приложение
+os.environ['PROMETHEUS_MULTIPROC_DIR'] = settings.METRICS_MULTIPROC_DIR
+
+bind = f'{settings.BIND_IP}:{settings.BIND_PORT}'
+# sched_getaffinity учитывает ограничение ядер для контейнера, cpu_count - нет
+workers = settings.WEB_WORKERS or len(os.sched_getaffinity(0))
+worker_class = 'conf.gunicorn.SiriusUvicornWorker'
+graceful_timeout = settings.WEB_GRACEFUL_TIMEOUT
+keepalive = 5
+
+
+class SiriusUvicornWorker(UvicornWorker):
+    CONFIG_KWARGS = {'loop': 'uvloop', 'http': 'httptools'}
+
+
+def on_starting(server) -> None:
+    # файлы метрик прошлого запуска иначе попадут в сумму
+    shutil.rmtree(settings.METRICS_MULTIPROC_DIR, ignore_errors=True)
+    os.makedirs(settings.METRICS_MULTIPROC_DIR)
+
+
+def child_exit(server, worker) -> None:
+    from prometheus_client import multiprocess
+
+    # убираем gauge'и livesum/liveall умершего воркера, счётчики остаются в сумме
+    multiprocess.mark_process_dead(worker.pid)
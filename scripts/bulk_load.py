@@ -0,0 +1,163 @@
+import argparse
+import asyncio
+import csv
+import itertools
+import logging
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+import orjson
+from redis.asyncio import Redis
+from sqlalchemy import Table, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from webapp.cache.user import invalidate_user_credentials
+from webapp.db.postgres import engine
+from webapp.db.redis import get_redis
+from webapp.models.meta import metadata
+from webapp.models.sirius.user import User
+from webapp.on_startup.redis import start_redis
+
+logger = logging.getLogger(__name__)
+
+RecordT = Tuple[Any, ...]
+
+
+def get_levels(tables: Sequence[Table]) -> List[List[Table]]:
+    # Группы таблиц в порядке внешних ключей: внутри группы таблицы друг на друга не ссылаются.
+    levels: Dict[Table, int] = {}
+    for table in metadata.sorted_tables:
+        parents = [fk.column.table for fk in table.foreign_keys if fk.column.table is not table]
+        levels[table] = max((levels[parent] + 1 for parent in parents), default=0)
+
+    grouped: Dict[int, List[Table]] = {}
+    for table in tables:
+        grouped.setdefault(levels[table], []).append(table)
+
+    return [grouped[level] for level in sorted(grouped)]
+
+
+def get_converters(table: Table, columns: Sequence[str]) -> List[Callable[[Any], Any]]:
+    # в csv всё строки, copy же требует значения нужного типа
+    def converter(python_type: type) -> Callable[[Any], Any]:
+        return lambda value: python_type(value) if value not in (None, '') else None
+
+    return [converter(table.columns[column].type.python_type) for column in columns]
+
+
+def read_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
+    with path.open('rb') as file:
+        for line in file:
+            if line.strip():
+                yield orjson.loads(line)
+
+
+def read_csv(path: Path) -> Iterator[Dict[str, Any]]:
+    with path.open(newline='') as file:
+        yield from csv.DictReader(file)
+
+
+READERS = {'.jsonl': read_jsonl, '.csv': read_csv}
+
+
+def read_batches(path: Path, table: Table, batch_size: int) -> Tuple[List[str], Iterator[List[RecordT]]]:
+    rows = READERS[path.suffix](path)
+    first = next(rows, None)
+    if first is None:
+        return [], iter(())
+
+    columns = list(first)
+    unknown = set(columns) - set(table.columns.keys())
+    if unknown:
+        raise ValueError(f'{path}: unknown columns {sorted(unknown)} for {table.fullname}')
+    converters = get_converters(table, columns)
+
+    def batches() -> Iterator[List[RecordT]]:
+        batch: List[RecordT] = []
+        for row in itertools.chain([first], rows):
+            batch.append(tuple(convert(row.get(column)) for convert, column in zip(converters, columns)))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    return columns, batches()
+
+
+async def load_table(engine: AsyncEngine, path: Path, table: Table, batch_size: int, redis: Redis | None) -> int:
+    columns, batches = read_batches(path, table, batch_size)
+    loaded = 0
+    # новые логины могли попасть в кэш как несуществующие
+    usernames: List[str] = []
+    username_index = columns.index('username') if redis is not None and table is User.__table__ else None
+    start = time.perf_counter()
+
+    async with engine.begin() as conn:
+        # copy есть только у самого asyncpg, соединение берём из пула движка
+        driver_connection = (await conn.get_raw_connection()).driver_connection
+        while True:
+            # файл читается в потоке, чтобы параллельные таблицы не ждали друг друга на чтении
+            batch = await asyncio.to_thread(next, batches, None)
+            if batch is None:
+                break
+            await driver_connection.copy_records_to_table(
+                table.name, records=batch, columns=columns, schema_name=table.schema
+            )
+            loaded += len(batch)
+            if username_index is not None:
+                usernames.extend(record[username_index] for record in batch)
+
+        # ключи пришли из файла, последовательность надо догнать до них
+        for column in table.primary_key.columns:
+            if column.autoincrement is not False and column.name in columns:
+                await conn.execute(
+                    text(
+                        f"SELECT setval(pg_get_serial_sequence('{table.fullname}', '{column.name}'), "
+                        f'(SELECT max({column.name}) FROM {table.fullname}))'
+                    )
+                )
+
+    # метки ставим после commit, иначе промах успеет прочитать старое и закэшировать снова
+    if redis is not None:
+        for offset in range(0, len(usernames), batch_size):
+            await invalidate_user_credentials(redis, usernames[offset : offset + batch_size])
+
+    duration = time.perf_counter() - start
+    logger.info('%s: %d rows in %.1f s, %.0f rows/s', table.fullname, loaded, duration, loaded / (duration or 1))
+    return loaded
+
+
+async def bulk_load(engine: AsyncEngine, paths: Sequence[Path], batch_size: int, redis: Redis | None = None) -> int:
+    # имя файла - полное имя таблицы, как и в load_data.py: sirius.file.jsonl, sirius.user_file.csv
+    tables = {metadata.tables[path.name.removesuffix(path.suffix)]: path for path in paths}
+    loaded = 0
+    start = time.perf_counter()
+
+    for level in get_levels(list(tables)):
+        loaded += sum(
+            await asyncio.gather(*(load_table(engine, tables[table], table, batch_size, redis) for table in level))
+        )
+
+    duration = time.perf_counter() - start
+    logger.info('Total: %d rows in %.1f s, %.0f rows/s', loaded, duration, loaded / (duration or 1))
+    return loaded
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Bulk load JSON Lines/CSV files with COPY')
+    parser.add_argument('files', nargs='+', type=Path, help='<schema>.<table>.jsonl or <schema>.<table>.csv')
+    parser.add_argument('--batch-size', type=int, default=10000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    async def main() -> None:
+        await start_redis()
+        try:
+            await bulk_load(engine, args.files, args.batch_size, get_redis())
+        finally:
+            await get_redis().aclose()
+
+    asyncio.run(main())
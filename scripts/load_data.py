@@ -6,8 +6,12 @@ from typing import List
 
 from sqlalchemy import insert
 
+from webapp.cache.user import invalidate_user_credentials
 from webapp.db.postgres import async_session
+from webapp.db.redis import get_redis
 from webapp.models.meta import metadata
+from webapp.models.sirius.user import User
+from webapp.on_startup.redis import start_redis
 
 parser = argparse.ArgumentParser()
 
@@ -17,6 +21,7 @@ args = parser.parse_args()
 
 
 async def main(fixtures: List[str]) -> None:
+    await start_redis()
     for fixture in fixtures:
         fixture_path = Path(fixture)
         model = metadata.tables[fixture_path.stem]
@@ -28,6 +33,11 @@ async def main(fixtures: List[str]) -> None:
             await session.execute(insert(model).values(values))
             await session.commit()
 
+        if model is User.__table__:
+            await invalidate_user_credentials(get_redis(), [value['username'] for value in values])
+
+    await get_redis().aclose()
+
 
 if __name__ == '__main__':
     asyncio.run(main(args.fixtures))
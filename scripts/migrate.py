@@ -1,16 +1,76 @@
 import asyncio
 import logging
 
+from sqlalchemy import Index, text
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncConnection
 
 from webapp.db.postgres import engine
 from webapp.models import meta
+from webapp.models.sirius.file import File
+from webapp.models.sirius.user_file import UserFile
+
+# create_all не трогает существующие таблицы, поэтому уникальные индексы для идемпотентной записи
+# результатов на уже развёрнутой базе создаются отдельно, один раз, после чистки дублей.
+# Строки с NULL в width или height под уникальный индекс не попадают: NULL не равен NULL,
+# такие строки не конфликтуют и дублями не считаются.
+DEDUPLICATE_FILES = '''
+WITH duplicates AS (
+    SELECT id, min(id) OVER (PARTITION BY task_id, width, height) AS keep_id
+    FROM sirius.file
+    WHERE width IS NOT NULL AND height IS NOT NULL
+)
+UPDATE sirius.user_file
+SET file_id = duplicates.keep_id
+FROM duplicates
+WHERE user_file.file_id = duplicates.id AND duplicates.id <> duplicates.keep_id;
+
+DELETE FROM sirius.file AS duplicate
+USING sirius.file AS kept
+WHERE duplicate.task_id = kept.task_id
+    AND duplicate.width = kept.width
+    AND duplicate.height = kept.height
+    AND duplicate.id > kept.id;
+
+DROP INDEX IF EXISTS sirius.ix_sirius_file_task_id;
+'''
+
+# после переноса связей на оставшиеся файлы дубли могли появиться и здесь
+DEDUPLICATE_USER_FILES = '''
+DELETE FROM sirius.user_file AS duplicate
+USING sirius.user_file AS kept
+WHERE duplicate.user_id = kept.user_id
+    AND duplicate.file_id = kept.file_id
+    AND duplicate.id > kept.id;
+
+DROP INDEX IF EXISTS sirius.ix_user_file_user_id_file_id;
+'''
+
+UNIQUE_INDEXES = [
+    (File.__table__.indexes, 'ux_file_task_id_width_height', DEDUPLICATE_FILES),
+    (UserFile.__table__.indexes, 'ux_user_file_user_id_file_id', DEDUPLICATE_USER_FILES),
+]
+
+
+async def create_unique_indexes(conn: AsyncConnection) -> None:
+    for indexes, name, deduplicate in UNIQUE_INDEXES:
+        if await conn.scalar(text('SELECT to_regclass(:name)'), {'name': f'{meta.DEFAULT_SCHEMA}.{name}'}):
+            continue
+
+        logging.warning('Creating unique index %s', name)
+        for statement in deduplicate.split(';'):
+            if statement.strip():
+                await conn.execute(text(statement))
+
+        index: Index = next(index for index in indexes if index.name == name)
+        await conn.run_sync(index.create, checkfirst=True)
 
 
 async def main() -> None:
     try:
         async with engine.begin() as conn:
             await conn.run_sync(meta.metadata.create_all)
+            await create_unique_indexes(conn)
     except IntegrityError:
         logging.exception('Already exists')
 
@@ -9,4 +9,5 @@ python scripts/migrate.py
 python scripts/load_data.py fixture/sirius/sirius.user.json
 
 
-exec uvicorn webapp.main:create_app --host=$BIND_IP --port=$BIND_PORT
+# воркеры, адрес и метрики настраиваются в conf/gunicorn.py
+exec gunicorn 'webapp.main:create_app()' --config conf/gunicorn.py
@@ -36,3 +36,25 @@ async def test_login(
     response = await client.post(URLS['auth']['info'], headers={'Authorization': f'Bearer {access_token}'})
 
     assert response.status_code == expected_status
+
+
+@pytest.mark.parametrize(
+    ('authorization', 'expected_status', 'fixtures'),
+    [
+        ('', status.HTTP_403_FORBIDDEN, []),
+        ('Bearer', status.HTTP_403_FORBIDDEN, []),
+        ('Basic dGVzdDpxd2VydHk=', status.HTTP_403_FORBIDDEN, []),
+        ('Bearer not.a.token', status.HTTP_403_FORBIDDEN, []),
+        ('Bearer a b c', status.HTTP_403_FORBIDDEN, []),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_info_malformed_authorization(
+    client: AsyncClient,
+    authorization: str,
+    expected_status: int,
+) -> None:
+    response = await client.post(URLS['auth']['info'], headers={'Authorization': authorization})
+
+    assert response.status_code == expected_status
@@ -2,6 +2,7 @@ from pathlib import Path
 from typing import Any
 
 import pytest
+from fakeredis.aioredis import FakeRedis
 from httpx import AsyncClient
 from jose import JWTError, jwt
 from starlette import status
@@ -9,6 +10,7 @@ from starlette import status
 from tests.const import URLS
 
 from conf.config import settings
+from webapp.cache.key_builder import get_user_credentials_cache
 
 BASE_DIR = Path(__file__).parent
 FIXTURES_PATH = BASE_DIR / 'fixtures'
@@ -57,3 +59,49 @@ async def test_login(
         assert expected_access_token
     except (JWTError, KeyError):
         assert not expected_access_token
+
+
+@pytest.mark.parametrize(
+    ('username', 'password', 'expected_status', 'fixtures'),
+    [
+        (
+            'invalid_user',
+            'password',
+            status.HTTP_401_UNAUTHORIZED,
+            [
+                FIXTURES_PATH / 'sirius.user.json',
+            ],
+        ),
+        (
+            'test',
+            'qwerty',
+            status.HTTP_200_OK,
+            [
+                FIXTURES_PATH / 'sirius.user.json',
+            ],
+        ),
+        (
+            'test',
+            'wrong',
+            status.HTTP_401_UNAUTHORIZED,
+            [
+                FIXTURES_PATH / 'sirius.user.json',
+            ],
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_login_cached(
+    client: AsyncClient,
+    username: str,
+    password: str,
+    expected_status: int,
+    fake_redis: FakeRedis,
+    db_session: None,
+) -> None:
+    for _ in range(2):
+        response = await client.post(URLS['auth']['login'], json={'username': username, 'password': password})
+        assert response.status_code == expected_status
+
+    assert await fake_redis.exists(get_user_credentials_cache(username))
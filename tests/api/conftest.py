@@ -1,9 +1,11 @@
 import json
 import uuid
 from pathlib import Path
-from typing import AsyncGenerator, List
+from typing import AsyncGenerator, Dict, List, Tuple
 
 import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
 from fastapi import FastAPI
 from httpx import AsyncClient
 from sqlalchemy import insert
@@ -11,10 +13,13 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from tests.const import URLS
 from tests.mocking.kafka import TestKafkaProducer
+from tests.mocking.minio import TestMinio
 from tests.my_types import FixtureFunctionT
-from webapp.db import kafka
+from webapp.cache.notifier import ResultNotifier, get_notifier
+from webapp.db import kafka, minio, redis
 
-from webapp.db.postgres import engine, get_session
+from webapp.db.postgres import engine, get_read_session, get_session
+from webapp.db.redis import get_redis
 from webapp.models.meta import metadata
 
 
@@ -34,6 +39,7 @@ async def db_session(app: FastAPI) -> AsyncGenerator[AsyncSession, None]:
             yield session
 
         app.dependency_overrides[get_session] = mocked_session  # noqa
+        app.dependency_overrides[get_read_session] = mocked_session  # noqa
 
         yield session
 
@@ -57,7 +63,7 @@ async def _load_fixtures(db_session: AsyncSession, fixtures: List[Path]) -> Fixt
 @pytest.fixture()
 def _mock_kafka(monkeypatch: pytest.MonkeyPatch, kafka_received_messages: List, mocked_hex: str) -> FixtureFunctionT:
     monkeypatch.setattr(kafka, 'get_producer', lambda: TestKafkaProducer(kafka_received_messages))
-    monkeypatch.setattr(kafka, 'get_partition', lambda: 1)
+    monkeypatch.setattr(kafka, 'get_partition', lambda topic, key=None: 1)
     monkeypatch.setattr(uuid.UUID, 'hex', mocked_hex)
 
 
@@ -66,6 +72,39 @@ def kafka_received_messages() -> List:
     return []
 
 
+@pytest.fixture()
+def _mock_minio(monkeypatch: pytest.MonkeyPatch, minio_objects: Dict[Tuple[str, str], bytes]) -> FixtureFunctionT:
+    monkeypatch.setattr(minio, 'get_minio', lambda: TestMinio(minio_objects))
+    monkeypatch.setattr(minio, 'get_http_session', lambda: None)
+
+
+@pytest.fixture()
+def fake_redis() -> FakeRedis:
+    return FakeRedis(server=FakeServer())
+
+
+@pytest.fixture()
+def _mock_redis(app: FastAPI, monkeypatch: pytest.MonkeyPatch, fake_redis: FakeRedis) -> FixtureFunctionT:
+    app.dependency_overrides[get_redis] = lambda: fake_redis  # noqa
+    monkeypatch.setattr(redis, 'redis', fake_redis, raising=False)
+
+
+@pytest.fixture()
+async def notifier(app: FastAPI, fake_redis: FakeRedis) -> AsyncGenerator[ResultNotifier, None]:
+    notifier = ResultNotifier(fake_redis)
+    await notifier.start()
+    app.dependency_overrides[get_notifier] = lambda: notifier  # noqa
+
+    yield notifier
+
+    await notifier.stop()
+
+
+@pytest.fixture()
+def minio_objects() -> Dict[Tuple[str, str], bytes]:
+    return {}
+
+
 @pytest.fixture()
 async def access_token(
     client: AsyncClient,
@@ -79,6 +118,7 @@ async def access_token(
 @pytest.fixture()
 async def _common_api_fixture(
     _load_fixtures: FixtureFunctionT,
+    _mock_redis: FixtureFunctionT,
 ) -> None:
     return
 
@@ -86,5 +126,7 @@ async def _common_api_fixture(
 async def _common_api_with_kafka_fixture(
     _common_api_fixture: FixtureFunctionT,
     _mock_kafka: FixtureFunctionT,
+    _mock_minio: FixtureFunctionT,
+    _mock_redis: FixtureFunctionT,
 ) -> None:
     return
@@ -1,3 +1,4 @@
+import hashlib
 from pathlib import Path
 
 import msgpack
@@ -8,6 +9,7 @@ BASE_DIR = Path(__file__).parent
 WIDTH = 123
 HEIGHT = 123
 MOCKED_HEX = 'mocked_hex'
+ORIGINALS_BUCKET = 'originals'
 
 with open(BASE_DIR / 'test_file', 'rb') as file:
     image = file.read()
@@ -15,9 +17,33 @@ with open(BASE_DIR / 'test_file', 'rb') as file:
 
 value = msgpack.packb(
     {
-        'image': image,
+        'image': {
+            'bucket': ORIGINALS_BUCKET,
+            'key': MOCKED_HEX,
+            'size': len(image),
+            'content_type': 'application/octet-stream',
+        },
         'task_id': MOCKED_HEX,
         'width': WIDTH,
         'height': HEIGHT,
+        'user_id': 1,
+        'content_hash': hashlib.sha256(image).hexdigest(),
+    }
+)
+
+VARIANTS = [(32, 32), (123, 123)]
+
+variants_value = msgpack.packb(
+    {
+        'image': {
+            'bucket': ORIGINALS_BUCKET,
+            'key': MOCKED_HEX,
+            'size': len(image),
+            'content_type': 'application/octet-stream',
+        },
+        'task_id': MOCKED_HEX,
+        'variants': VARIANTS,
+        'user_id': 1,
+        'content_hash': hashlib.sha256(image).hexdigest(),
     }
 )
@@ -0,0 +1,259 @@
+import asyncio
+import hashlib
+from typing import Any, AsyncGenerator, Dict, Tuple
+
+import pytest
+from fakeredis.aioredis import FakeRedis
+from fastapi import FastAPI, HTTPException
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from tests.api.file.const import BASE_DIR
+from tests.const import URLS
+from tests.mocking import minio as mocked_minio
+from webapp.api.file import content
+from webapp.api.file.content import ObjectResponse, parse_range
+from webapp.cache.results import store_result
+from webapp.db import postgres
+from webapp.storage import objects
+
+FIXTURES_PATH = BASE_DIR / 'fixtures'
+
+CONTENT = bytes(range(256)) * 4
+ETAG = f'"{hashlib.md5(CONTENT).hexdigest()}"'
+FIXTURES = [
+    FIXTURES_PATH / 'sirius.user.json',
+    FIXTURES_PATH / 'sirius.file.json',
+    FIXTURES_PATH / 'sirius.user_file.json',
+]
+RESULT = {
+    'status': 'done',
+    'task_id': 'task1',
+    'url': 'http://localhost:9000/resized/task1/100x100.png',
+    'variants': [
+        {'width': 100, 'height': 100, 'url': 'http://localhost:9000/resized/task1/100x100.png'},
+        {'width': 32, 'height': 32, 'url': 'http://localhost:9000/resized/task1/32x32.png'},
+    ],
+}
+
+
+@pytest.mark.parametrize(
+    ('header', 'expected'),
+    [
+        ('bytes=0-99', (0, 100)),
+        ('bytes=1000-', (1000, 24)),
+        ('bytes=-24', (1000, 24)),
+        ('bytes=1000-5000', (1000, 24)),
+        ('bytes=-5000', (0, 1024)),
+        ('bytes=0-1,5-6', None),
+        ('items=0-1', None),
+        ('bytes=a-b', None),
+        ('bytes=-', None),
+        ('bytes=10-5', None),
+    ],
+)
+def test_parse_range(header: str, expected: Tuple[int, int] | None) -> None:
+    assert parse_range(header, len(CONTENT)) == expected
+
+
+@pytest.mark.parametrize('header', ['bytes=1024-', 'bytes=2000-3000', 'bytes=-0'])
+def test_parse_range_not_satisfiable(header: str) -> None:
+    with pytest.raises(HTTPException) as exc_info:
+        parse_range(header, len(CONTENT))
+
+    assert exc_info.value.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+    assert exc_info.value.headers == {'Content-Range': f'bytes */{len(CONTENT)}'}
+
+
+@pytest.mark.parametrize(
+    ('username', 'password', 'fixtures', 'task_id', 'params', 'headers', 'expected_status', 'expected_content'),
+    [
+        (
+            'test',
+            'qwerty',
+            FIXTURES,
+            'task1',
+            {},
+            {},
+            status.HTTP_200_OK,
+            CONTENT,
+        ),
+        (
+            'test',
+            'qwerty',
+            FIXTURES,
+            'task1',
+            {'variant': '32x32'},
+            {'Range': 'bytes=10-19'},
+            status.HTTP_206_PARTIAL_CONTENT,
+            CONTENT[10:20],
+        ),
+        (
+            'test',
+            'qwerty',
+            FIXTURES,
+            'task1',
+            {},
+            {'Range': 'bytes=10-19', 'If-Range': '"stale"'},
+            status.HTTP_200_OK,
+            CONTENT,
+        ),
+        (
+            'test',
+            'qwerty',
+            FIXTURES,
+            'task1',
+            {},
+            {'If-None-Match': f'"other", W/{ETAG}'},
+            status.HTTP_304_NOT_MODIFIED,
+            b'',
+        ),
+        (
+            'test',
+            'qwerty',
+            FIXTURES,
+            'task1',
+            {},
+            {'Range': 'bytes=2000-'},
+            status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            None,
+        ),
+        (
+            'test',
+            'qwerty',
+            FIXTURES,
+            'task1',
+            {'variant': '50x50'},
+            {},
+            status.HTTP_404_NOT_FOUND,
+            None,
+        ),
+        (
+            'test',
+            'qwerty',
+            FIXTURES,
+            'task2',
+            {},
+            {},
+            status.HTTP_404_NOT_FOUND,
+            None,
+        ),
+        (
+            'test',
+            'qwerty',
+            FIXTURES,
+            'other',
+            {},
+            {},
+            status.HTTP_404_NOT_FOUND,
+            None,
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture', '_mock_minio')
+async def test_get_content(
+    client: AsyncClient,
+    fake_redis: FakeRedis,
+    minio_objects: Dict[Tuple[str, str], bytes],
+    username: str,
+    password: str,
+    access_token: str,
+    task_id: str,
+    params: Dict[str, str],
+    headers: Dict[str, str],
+    expected_status: int,
+    expected_content: bytes | None,
+) -> None:
+    # other - готовая задача другого пользователя, task2 - своя, но файла в хранилище нет
+    await store_result(fake_redis, 'task1', RESULT)
+    await store_result(fake_redis, 'task2', {**RESULT, 'url': 'http://localhost:9000/resized/task2/1x1.png'})
+    await store_result(fake_redis, 'other', {**RESULT, 'url': 'http://localhost:9000/resized/task1/100x100.png'})
+    minio_objects[('resized', 'task1/100x100.png')] = CONTENT
+    minio_objects[('resized', 'task1/32x32.png')] = CONTENT
+
+    response = await client.get(
+        URLS['file']['content'].format(task_id=task_id),
+        params=params,
+        headers={'Authorization': f'Bearer {access_token}', **headers},
+    )
+
+    assert response.status_code == expected_status
+    if expected_content is not None:
+        assert response.content == expected_content
+        assert response.headers['ETag'] == ETAG
+        assert response.headers['Cache-Control'].startswith('private')
+
+
+async def disconnect() -> Dict[str, Any]:
+    return {'type': 'http.disconnect'}
+
+
+async def send_nothing(message: Dict[str, Any]) -> None:
+    await asyncio.sleep(0)
+
+
+async def send_broken(message: Dict[str, Any]) -> None:
+    raise OSError('Connection reset by peer')
+
+
+@pytest.mark.parametrize('send', [send_nothing, send_broken])
+@pytest.mark.asyncio()
+async def test_object_response_release(send: Any) -> None:
+    # ответ minio освобождается и при отключении клиента, и при ошибке отправки
+    object_response = mocked_minio.TestObjectResponse(CONTENT)
+    response = ObjectResponse(object_response)  # type: ignore[arg-type]
+
+    try:
+        await response({'type': 'http'}, disconnect, send)
+    except OSError:
+        pass
+
+    assert object_response.released
+
+
+@pytest.mark.parametrize(('username', 'password', 'fixtures'), [('test', 'qwerty', FIXTURES)])
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture', '_mock_minio')
+async def test_get_content_releases_connection(
+    app: FastAPI,
+    client: AsyncClient,
+    monkeypatch: pytest.MonkeyPatch,
+    fake_redis: FakeRedis,
+    minio_objects: Dict[Tuple[str, str], bytes],
+    access_token: str,
+) -> None:
+    # настоящая сессия из пула вместо общей тестовой
+    async def read_session() -> AsyncGenerator[AsyncSession, None]:
+        async with postgres.async_session() as session:
+            yield session
+
+    async def is_task_owner(session: AsyncSession, user_id: int, task_id: str) -> bool:
+        await session.execute(text('SELECT 1'))
+        return True
+
+    checked_out = []
+    open_object = objects.open_object
+
+    async def open_object_checked(*args: Any) -> Any:
+        checked_out.append(postgres.engine.pool.checkedout())
+        return await open_object(*args)
+
+    app.dependency_overrides[postgres.get_read_session] = read_session
+    monkeypatch.setattr(content, 'is_task_owner', is_task_owner)
+    monkeypatch.setattr(objects, 'open_object', open_object_checked)
+    await store_result(fake_redis, 'task1', RESULT)
+    minio_objects[('resized', 'task1/100x100.png')] = CONTENT
+
+    # соединение тестовой транзакции
+    before = postgres.engine.pool.checkedout()
+    response = await client.get(
+        URLS['file']['content'].format(task_id='task1'),
+        headers={'Authorization': f'Bearer {access_token}'},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    # к отдаче тела соединение уже вернулось в пул
+    assert checked_out == [before]
@@ -0,0 +1,226 @@
+import asyncio
+from typing import Any, Dict, List, Tuple
+
+import orjson
+import pytest
+from fakeredis.aioredis import FakeRedis
+from fastapi import FastAPI
+from httpx import AsyncClient
+from redis.exceptions import ConnectionError
+from starlette import status
+
+from tests.api.file.const import BASE_DIR
+from tests.const import URLS
+from webapp.cache.notifier import ResultNotifier
+from webapp.cache.results import store_result
+
+
+FIXTURES_PATH = BASE_DIR / 'fixtures'
+
+RESULT = {'status': 'done', 'task_id': 'ready', 'url': 'http://localhost:9000/resized/ready/1x1.png'}
+
+
+async def publish_later(redis: FakeRedis, task_id: str, result: Dict[str, Any]) -> None:
+    await asyncio.sleep(0.05)
+    await store_result(redis, task_id, result)
+
+
+async def websocket_connect(
+    app: FastAPI, path: str, access_token: str
+) -> Tuple[asyncio.Queue, asyncio.Queue, asyncio.Task]:
+    # httpx не умеет websocket, поэтому разговариваем с приложением по ASGI напрямую
+    inbox: asyncio.Queue[Dict[str, Any]] = asyncio.Queue()
+    outbox: asyncio.Queue[Dict[str, Any]] = asyncio.Queue()
+    scope = {
+        'type': 'websocket',
+        'asgi': {'version': '3.0'},
+        'scheme': 'ws',
+        'path': path,
+        'raw_path': path.encode(),
+        'root_path': '',
+        'query_string': f'access_token={access_token}'.encode(),
+        'headers': [(b'host', b'test.com')],
+        'client': ('127.0.0.1', 12345),
+        'server': ('test.com', 80),
+        'subprotocols': [],
+    }
+    await inbox.put({'type': 'websocket.connect'})
+    task = asyncio.create_task(app(scope, inbox.get, outbox.put))
+    return inbox, outbox, task
+
+
+@pytest.mark.parametrize(
+    ('username', 'password', 'fixtures', 'task_id', 'stored', 'published', 'expected_status'),
+    [
+        (
+            'test',
+            'qwerty',
+            [FIXTURES_PATH / 'sirius.user.json'],
+            'ready',
+            RESULT,
+            None,
+            status.HTTP_200_OK,
+        ),
+        (
+            'test',
+            'qwerty',
+            [FIXTURES_PATH / 'sirius.user.json'],
+            'ready',
+            None,
+            RESULT,
+            status.HTTP_200_OK,
+        ),
+        (
+            'test',
+            'qwerty',
+            [FIXTURES_PATH / 'sirius.user.json'],
+            'ready',
+            None,
+            None,
+            status.HTTP_204_NO_CONTENT,
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_wait_resized(
+    client: AsyncClient,
+    notifier: ResultNotifier,
+    fake_redis: FakeRedis,
+    username: str,
+    password: str,
+    access_token: str,
+    task_id: str,
+    stored: Dict[str, Any] | None,
+    published: Dict[str, Any] | None,
+    expected_status: int,
+) -> None:
+    if stored is not None:
+        await store_result(fake_redis, task_id, stored)
+    if published is not None:
+        asyncio.create_task(publish_later(fake_redis, task_id, published))
+
+    response = await client.get(
+        URLS['file']['resize_wait'],
+        params={'task_id': task_id, 'timeout': 0.5},
+        headers={'Authorization': f'Bearer {access_token}'},
+    )
+
+    assert response.status_code == expected_status
+    if expected_status == status.HTTP_200_OK:
+        assert response.json() == (stored or published)
+
+
+@pytest.mark.parametrize(
+    ('username', 'password', 'fixtures', 'task_ids'),
+    [
+        (
+            'test',
+            'qwerty',
+            [FIXTURES_PATH / 'sirius.user.json'],
+            ['ready', 'later'],
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_resized_events(
+    client: AsyncClient,
+    notifier: ResultNotifier,
+    fake_redis: FakeRedis,
+    username: str,
+    password: str,
+    access_token: str,
+    task_ids: List[str],
+) -> None:
+    await store_result(fake_redis, 'ready', RESULT)
+    asyncio.create_task(publish_later(fake_redis, 'later', RESULT))
+
+    response = await client.get(
+        URLS['file']['resize_events'],
+        params={'task_id': task_ids, 'timeout': 1},
+        headers={'Authorization': f'Bearer {access_token}'},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers['content-type'].startswith('text/event-stream')
+    events = [event for event in response.text.split('\n\n') if event.startswith('event: result')]
+    assert [event.split('\n')[1] for event in events] == ['id: ready', 'id: later']
+    assert not notifier.waiters
+
+
+@pytest.mark.parametrize(
+    ('username', 'password', 'fixtures', 'task_ids'),
+    [
+        (
+            'test',
+            'qwerty',
+            [FIXTURES_PATH / 'sirius.user.json'],
+            ['ready', 'later', 'never'],
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_resized_ws(
+    app: FastAPI,
+    notifier: ResultNotifier,
+    fake_redis: FakeRedis,
+    username: str,
+    password: str,
+    access_token: str,
+    task_ids: List[str],
+) -> None:
+    await store_result(fake_redis, 'ready', RESULT)
+    asyncio.create_task(publish_later(fake_redis, 'later', RESULT))
+
+    inbox, outbox, task = await websocket_connect(app, URLS['file']['resize_ws'], access_token)
+    assert (await asyncio.wait_for(outbox.get(), 1))['type'] == 'websocket.accept'
+
+    await inbox.put({'type': 'websocket.receive', 'text': orjson.dumps({'task_ids': task_ids}).decode()})
+    messages = [await asyncio.wait_for(outbox.get(), 1) for _ in range(2)]
+    assert [message['type'] for message in messages] == ['websocket.send', 'websocket.send']
+    assert [orjson.loads(message['text']) for message in messages] == [RESULT, RESULT]
+
+    await inbox.put({'type': 'websocket.disconnect', 'code': 1000})
+    await asyncio.wait_for(task, 1)
+    assert not notifier.waiters
+
+
+@pytest.mark.asyncio()
+async def test_resized_ws_unauthorized(app: FastAPI, notifier: ResultNotifier) -> None:
+    _, outbox, task = await websocket_connect(app, URLS['file']['resize_ws'], 'invalid')
+
+    message = await asyncio.wait_for(outbox.get(), 1)
+    assert message['type'] == 'websocket.close'
+    assert message['code'] == status.WS_1008_POLICY_VIOLATION
+    await asyncio.wait_for(task, 1)
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_migrate_db')
+async def test_notifier_resubscribe(fake_redis: FakeRedis, monkeypatch: pytest.MonkeyPatch) -> None:
+    notifier = ResultNotifier(fake_redis, resubscribe_delay=0)
+    pubsub = notifier._pubsub  # noqa
+
+    async def get_message(*args: Any, **kwargs: Any) -> None:
+        raise ConnectionError('Connection closed by server.')
+
+    # первое соединение рвётся сразу, результат, записанный до переподписки, приходит из хранилища
+    monkeypatch.setattr(pubsub, 'get_message', get_message)
+    subscription = notifier.subscribe()
+    await subscription.add(['lost', 'later'])
+    await store_result(fake_redis, 'lost', RESULT)
+    await notifier.start()
+
+    try:
+        assert await subscription.get(1) == ('lost', orjson.dumps({**RESULT, 'task_id': 'lost'}))
+        assert notifier._pubsub is not pubsub  # noqa
+
+        await store_result(fake_redis, 'later', RESULT)
+        result = await subscription.get(1)
+        assert result is not None
+        assert (result[0], orjson.loads(result[1])) == ('later', RESULT)
+    finally:
+        subscription.close()
+        await notifier.stop()
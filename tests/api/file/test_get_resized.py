@@ -0,0 +1,180 @@
+from typing import Dict, List
+
+import pytest
+from fakeredis.aioredis import FakeRedis
+from httpx import AsyncClient
+from starlette import status
+
+from tests.api.file.const import BASE_DIR
+from tests.const import URLS
+from webapp.cache.key_builder import get_file_resize_cache, get_user_files_cache
+from webapp.cache.results import get_result, store_result
+from webapp.cache.user_file import invalidate_user_files
+
+
+FIXTURES_PATH = BASE_DIR / 'fixtures'
+
+DONE = {'status': 'done', 'task_id': 'done', 'url': 'http://localhost:9000/resized/done/1x1.png'}
+FAILED = {'status': 'failed', 'task_id': 'failed'}
+
+
+@pytest.mark.parametrize(
+    ('username', 'password', 'fixtures', 'stored', 'task_ids', 'expected_status', 'expected_results'),
+    [
+        (
+            'test',
+            'qwerty',
+            [FIXTURES_PATH / 'sirius.user.json'],
+            {'done': DONE, 'failed': FAILED},
+            ['done', 'missing', 'failed', 'done'],
+            status.HTTP_200_OK,
+            {'done': DONE, 'missing': None, 'failed': FAILED},
+        ),
+        (
+            'test',
+            'qwerty',
+            [FIXTURES_PATH / 'sirius.user.json'],
+            {},
+            [],
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+            None,
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_get_resized_status(
+    client: AsyncClient,
+    fake_redis: FakeRedis,
+    username: str,
+    password: str,
+    access_token: str,
+    stored: Dict[str, Dict],
+    task_ids: List[str],
+    expected_status: int,
+    expected_results: Dict | None,
+) -> None:
+    for task_id, result in stored.items():
+        await store_result(fake_redis, task_id, result)
+
+    response = await client.post(
+        URLS['file']['resize_status'],
+        json={'task_ids': task_ids},
+        headers={'Authorization': f'Bearer {access_token}'},
+    )
+
+    assert response.status_code == expected_status
+    if expected_results is not None:
+        assert response.json() == {'results': expected_results}
+
+
+@pytest.mark.parametrize(
+    ('username', 'password', 'fixtures', 'limit', 'expected_pages'),
+    [
+        (
+            'test',
+            'qwerty',
+            [
+                FIXTURES_PATH / 'sirius.user.json',
+                FIXTURES_PATH / 'sirius.file.json',
+                FIXTURES_PATH / 'sirius.user_file.json',
+            ],
+            2,
+            [['task1', 'task2'], ['task3', 'task4'], ['task5']],
+        ),
+        (
+            'test',
+            'qwerty',
+            [
+                FIXTURES_PATH / 'sirius.user.json',
+            ],
+            2,
+            [[]],
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_get_resized_all(
+    client: AsyncClient,
+    fake_redis: FakeRedis,
+    username: str,
+    password: str,
+    access_token: str,
+    limit: int,
+    expected_pages: List[List[str]],
+) -> None:
+    pages = []
+    params: Dict[str, int] = {'limit': limit}
+    while True:
+        response = await client.get(
+            URLS['file']['resized_all'],
+            params=params,
+            headers={'Authorization': f'Bearer {access_token}'},
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        body = response.json()
+        assert body['username'] == username
+        pages.append([file['task_id'] for file in body['files']])
+        if body['next_cursor'] is None:
+            break
+        params['cursor'] = body['next_cursor']
+
+    assert pages == expected_pages
+    assert len(await fake_redis.hkeys(get_user_files_cache(1))) == len(expected_pages)
+
+    await invalidate_user_files(fake_redis, [1])
+    assert not await fake_redis.exists(get_user_files_cache(1))
+
+
+@pytest.mark.parametrize(
+    ('username', 'password', 'fixtures', 'task_id', 'expected_status', 'expected_result'),
+    [
+        (
+            'test',
+            'qwerty',
+            [
+                FIXTURES_PATH / 'sirius.user.json',
+                FIXTURES_PATH / 'sirius.file.json',
+            ],
+            'task2',
+            status.HTTP_200_OK,
+            {'status': 'done', 'task_id': 'task2', 'url': 'http://localhost:9000/resized/task2/1x1.png'},
+        ),
+        (
+            'test',
+            'qwerty',
+            [
+                FIXTURES_PATH / 'sirius.user.json',
+            ],
+            'task2',
+            status.HTTP_404_NOT_FOUND,
+            None,
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_get_resized_from_db(
+    client: AsyncClient,
+    fake_redis: FakeRedis,
+    username: str,
+    password: str,
+    access_token: str,
+    task_id: str,
+    expected_status: int,
+    expected_result: Dict | None,
+) -> None:
+    # результата в redis нет (истёк TTL) - он восстанавливается из таблицы file и снова кэшируется
+    response = await client.get(
+        URLS['file']['resize'],
+        params={'task_id': task_id},
+        headers={'Authorization': f'Bearer {access_token}'},
+    )
+
+    assert response.status_code == expected_status
+    if expected_result is not None:
+        assert response.json() == expected_result
+        assert await fake_redis.ttl(get_file_resize_cache(task_id)) > 0
+        assert await get_result(fake_redis, task_id) == expected_result
@@ -1,10 +1,21 @@
-from typing import List
+from typing import Any, AsyncGenerator, Dict, List, Tuple
 
 import pytest
+from fastapi import FastAPI
 from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
 
-from tests.api.file.const import WIDTH, HEIGHT, MOCKED_HEX, value, BASE_DIR
+from tests.api.file.const import (
+    WIDTH, HEIGHT, MOCKED_HEX, ORIGINALS_BUCKET, value, variants_value, image, BASE_DIR,
+)
 from tests.const import URLS
+from webapp.db import kafka, postgres
+from webapp.db.kafka_outbox import KafkaOutbox
+from webapp.storage import objects
+from webapp.utils import admission
+
+from conf.config import settings
 
 
 FIXTURES_PATH = BASE_DIR / 'fixtures'
@@ -38,6 +49,7 @@ async def test_resize(
     access_token: str,
     kafka_received_messages: List,
     kafka_expected_messages: List,
+    minio_objects: Dict[Tuple[str, str], bytes],
 ) -> None:
     with open(BASE_DIR / 'test_file', 'rb') as file:
         response = await client.post(
@@ -52,3 +64,368 @@ async def test_resize(
 
     assert response.status_code == 200
     assert kafka_received_messages == kafka_expected_messages
+    assert minio_objects == {(ORIGINALS_BUCKET, MOCKED_HEX): image}
+
+
+@pytest.mark.parametrize(
+    ('username', 'password', 'fixtures', 'mocked_hex', 'kafka_expected_messages'),
+    [
+        (
+            'test',
+            'qwerty',
+            [
+                FIXTURES_PATH / 'sirius.user.json',
+            ],
+            MOCKED_HEX,
+            [{'partition': 1, 'topic': 'test_resize_image', 'value': value}],
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_with_kafka_fixture')
+async def test_resize_buffered(
+    client: AsyncClient,
+    monkeypatch: pytest.MonkeyPatch,
+    username: str,
+    password: str,
+    access_token: str,
+    kafka_received_messages: List,
+    kafka_expected_messages: List,
+) -> None:
+    monkeypatch.setattr(settings, 'KAFKA_PUBLISH_MODE', 'buffered')
+    outbox = KafkaOutbox(kafka.get_producer(), max_size=1, put_timeout=1)
+    monkeypatch.setattr(kafka, 'get_outbox', lambda: outbox)
+    outbox.start()
+
+    with open(BASE_DIR / 'test_file', 'rb') as file:
+        response = await client.post(
+            URLS['file']['resize'],
+            files={'image': file},
+            params={
+                'width': WIDTH,
+                'height': HEIGHT,
+            },
+            headers={'Authorization': f'Bearer {access_token}'},
+        )
+    await outbox.stop()
+
+    assert response.status_code == 200
+    assert kafka_received_messages == kafka_expected_messages
+
+
+@pytest.mark.parametrize(
+    ('username', 'password', 'fixtures', 'mocked_hex', 'upload_max_size', 'expected_status'),
+    [
+        (
+            'test',
+            'qwerty',
+            [
+                FIXTURES_PATH / 'sirius.user.json',
+            ],
+            MOCKED_HEX,
+            len(image) - 1,
+            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_with_kafka_fixture')
+async def test_resize_too_large(
+    client: AsyncClient,
+    monkeypatch: pytest.MonkeyPatch,
+    username: str,
+    password: str,
+    upload_max_size: int,
+    expected_status: int,
+    access_token: str,
+    kafka_received_messages: List,
+    minio_objects: Dict[Tuple[str, str], bytes],
+) -> None:
+    monkeypatch.setattr(settings, 'UPLOAD_MAX_SIZE', upload_max_size)
+
+    with open(BASE_DIR / 'test_file', 'rb') as file:
+        response = await client.post(
+            URLS['file']['resize'],
+            files={'image': file},
+            params={
+                'width': WIDTH,
+                'height': HEIGHT,
+            },
+            headers={'Authorization': f'Bearer {access_token}'},
+        )
+
+    assert response.status_code == expected_status
+    assert kafka_received_messages == []
+
+
+@pytest.mark.parametrize(
+    ('username', 'password', 'fixtures', 'mocked_hex', 'kafka_expected_messages'),
+    [
+        (
+            'test',
+            'qwerty',
+            [
+                FIXTURES_PATH / 'sirius.user.json',
+            ],
+            MOCKED_HEX,
+            [{'partition': 1, 'topic': 'test_resize_image', 'value': value}],
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_with_kafka_fixture')
+async def test_resize_dedup(
+    client: AsyncClient,
+    username: str,
+    password: str,
+    access_token: str,
+    kafka_received_messages: List,
+    kafka_expected_messages: List,
+) -> None:
+    responses = []
+    for _ in range(2):
+        with open(BASE_DIR / 'test_file', 'rb') as file:
+            responses.append(
+                await client.post(
+                    URLS['file']['resize'],
+                    files={'image': file},
+                    params={
+                        'width': WIDTH,
+                        'height': HEIGHT,
+                    },
+                    headers={'Authorization': f'Bearer {access_token}'},
+                )
+            )
+
+    assert [response.status_code for response in responses] == [200, 200]
+    assert responses[0].json() == responses[1].json()
+    assert kafka_received_messages == kafka_expected_messages
+
+
+@pytest.mark.parametrize(
+    ('username', 'password', 'fixtures', 'mocked_hex', 'variants', 'expected_status', 'kafka_expected_messages'),
+    [
+        (
+            'test',
+            'qwerty',
+            [
+                FIXTURES_PATH / 'sirius.user.json',
+            ],
+            MOCKED_HEX,
+            ['32x32', '123x123', '32x32'],
+            status.HTTP_200_OK,
+            [{'partition': 1, 'topic': 'test_resize_image', 'value': variants_value}],
+        ),
+        (
+            'test',
+            'qwerty',
+            [
+                FIXTURES_PATH / 'sirius.user.json',
+            ],
+            MOCKED_HEX,
+            ['32x32', '0x10'],
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+            [],
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_with_kafka_fixture')
+async def test_resize_variants(
+    client: AsyncClient,
+    username: str,
+    password: str,
+    variants: List[str],
+    expected_status: int,
+    access_token: str,
+    kafka_received_messages: List,
+    kafka_expected_messages: List,
+) -> None:
+    with open(BASE_DIR / 'test_file', 'rb') as file:
+        response = await client.post(
+            URLS['file']['resize_variants'],
+            files={'image': file},
+            params={'variants': variants},
+            headers={'Authorization': f'Bearer {access_token}'},
+        )
+
+    assert response.status_code == expected_status
+    assert kafka_received_messages == kafka_expected_messages
+
+
+@pytest.mark.parametrize(
+    ('username', 'password', 'fixtures', 'mocked_hex', 'burst', 'queue_lag', 'expected_statuses', 'retry_after'),
+    [
+        (
+            'test',
+            'qwerty',
+            [
+                FIXTURES_PATH / 'sirius.user.json',
+            ],
+            MOCKED_HEX,
+            1,
+            0,
+            [status.HTTP_200_OK, status.HTTP_429_TOO_MANY_REQUESTS],
+            '1',
+        ),
+        (
+            'test',
+            'qwerty',
+            [
+                FIXTURES_PATH / 'sirius.user.json',
+            ],
+            MOCKED_HEX,
+            2,
+            100,
+            [status.HTTP_503_SERVICE_UNAVAILABLE, status.HTTP_503_SERVICE_UNAVAILABLE],
+            '5',
+        ),
+        # лимит проверяется до отказа по очереди, и отказ токен не возвращает
+        (
+            'test',
+            'qwerty',
+            [
+                FIXTURES_PATH / 'sirius.user.json',
+            ],
+            MOCKED_HEX,
+            1,
+            100,
+            [status.HTTP_503_SERVICE_UNAVAILABLE, status.HTTP_429_TOO_MANY_REQUESTS],
+            '1',
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_with_kafka_fixture')
+async def test_resize_admission(
+    client: AsyncClient,
+    monkeypatch: pytest.MonkeyPatch,
+    username: str,
+    password: str,
+    burst: int,
+    queue_lag: int,
+    expected_statuses: List[int],
+    retry_after: str,
+    access_token: str,
+) -> None:
+    monkeypatch.setattr(settings, 'RATE_LIMIT_RESIZE_RATE', 1)
+    monkeypatch.setattr(settings, 'RATE_LIMIT_RESIZE_BURST', burst)
+    monkeypatch.setattr(settings, 'ADMISSION_MAX_QUEUE_LAG', 100)
+    monkeypatch.setattr(settings, 'ADMISSION_RETRY_AFTER', 5)
+    monkeypatch.setattr(admission, 'queue_lag', {settings.KAFKA_TOPIC: queue_lag})
+
+    responses = []
+    for _ in expected_statuses:
+        with open(BASE_DIR / 'test_file', 'rb') as file:
+            responses.append(
+                await client.post(
+                    URLS['file']['resize'],
+                    files={'image': file},
+                    params={
+                        'width': WIDTH,
+                        'height': HEIGHT,
+                    },
+                    headers={'Authorization': f'Bearer {access_token}'},
+                )
+            )
+
+    assert [response.status_code for response in responses] == expected_statuses
+    assert responses[-1].headers['Retry-After'] == retry_after
+
+
+@pytest.mark.parametrize(
+    ('username', 'password', 'fixtures', 'mocked_hex', 'fast_max_area', 'kafka_expected_messages'),
+    [
+        (
+            'test',
+            'qwerty',
+            [
+                FIXTURES_PATH / 'sirius.user.json',
+            ],
+            MOCKED_HEX,
+            WIDTH * HEIGHT,
+            [{'partition': 1, 'topic': 'test_resize_image_fast', 'value': value}],
+        ),
+        (
+            'test',
+            'qwerty',
+            [
+                FIXTURES_PATH / 'sirius.user.json',
+            ],
+            MOCKED_HEX,
+            WIDTH * HEIGHT - 1,
+            [{'partition': 1, 'topic': 'test_resize_image_bulk', 'value': value}],
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_with_kafka_fixture')
+async def test_resize_lanes(
+    client: AsyncClient,
+    monkeypatch: pytest.MonkeyPatch,
+    username: str,
+    password: str,
+    fast_max_area: int,
+    access_token: str,
+    kafka_received_messages: List,
+    kafka_expected_messages: List,
+) -> None:
+    monkeypatch.setattr(settings, 'KAFKA_TOPIC_FAST', 'test_resize_image_fast')
+    monkeypatch.setattr(settings, 'KAFKA_TOPIC_BULK', 'test_resize_image_bulk')
+    monkeypatch.setattr(settings, 'LANE_FAST_MAX_AREA', fast_max_area)
+
+    with open(BASE_DIR / 'test_file', 'rb') as file:
+        response = await client.post(
+            URLS['file']['resize'],
+            files={'image': file},
+            params={
+                'width': WIDTH,
+                'height': HEIGHT,
+            },
+            headers={'Authorization': f'Bearer {access_token}'},
+        )
+
+    assert response.status_code == 200
+    assert kafka_received_messages == kafka_expected_messages
+
+
+@pytest.mark.parametrize(
+    ('username', 'password', 'fixtures', 'mocked_hex'),
+    [('test', 'qwerty', [FIXTURES_PATH / 'sirius.user.json'], MOCKED_HEX)],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_with_kafka_fixture')
+async def test_resize_releases_connection(
+    app: FastAPI,
+    client: AsyncClient,
+    monkeypatch: pytest.MonkeyPatch,
+    access_token: str,
+) -> None:
+    # настоящая сессия из пула вместо общей тестовой
+    async def get_session() -> AsyncGenerator[AsyncSession, None]:
+        async with postgres.async_session() as session:
+            yield session
+
+    checked_out = []
+    put_object = objects.put_object
+
+    async def put_object_checked(*args: Any) -> Any:
+        checked_out.append(postgres.engine.pool.checkedout())
+        return await put_object(*args)
+
+    app.dependency_overrides[postgres.get_session] = get_session
+    monkeypatch.setattr(objects, 'put_object', put_object_checked)
+
+    # соединение тестовой транзакции
+    before = postgres.engine.pool.checkedout()
+    with open(BASE_DIR / 'test_file', 'rb') as file:
+        response = await client.post(
+            URLS['file']['resize'],
+            files={'image': file},
+            params={'width': WIDTH, 'height': HEIGHT},
+            headers={'Authorization': f'Bearer {access_token}'},
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    # проверка дублей по таблице file закончилась, к загрузке оригинала соединение уже в пуле
+    assert checked_out == [before]
@@ -0,0 +1,74 @@
+from pathlib import Path
+
+import pytest
+from httpx import AsyncClient
+from prometheus_client import REGISTRY
+from starlette import status
+
+from tests.const import URLS
+
+BASE_DIR = Path(__file__).parent
+FIXTURES_PATH = BASE_DIR / 'auth' / 'login' / 'fixtures'
+
+
+def get_sample(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.parametrize(
+    ('method', 'url', 'body', 'route', 'expected_status', 'fixtures'),
+    [
+        (
+            'POST',
+            URLS['auth']['login'],
+            {'username': 'test', 'password': 'wrong'},
+            '/auth/login',
+            status.HTTP_401_UNAUTHORIZED,
+            [
+                FIXTURES_PATH / 'sirius.user.json',
+            ],
+        ),
+        (
+            'GET',
+            '/metrics',
+            None,
+            '/metrics',
+            status.HTTP_200_OK,
+            [],
+        ),
+        (
+            'GET',
+            '/no/such/path/42',
+            None,
+            'unmatched',
+            status.HTTP_404_NOT_FOUND,
+            [],
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_request_metrics(
+    client: AsyncClient,
+    method: str,
+    url: str,
+    body: dict | None,
+    route: str,
+    expected_status: int,
+    db_session: None,
+) -> None:
+    status_class = f'{expected_status // 100}xx'
+    requests = get_sample('sirius_requests_total', method=method, route=route)
+    errors = get_sample('sirius_request_errors_total', method=method, route=route, status_class=status_class)
+    observed = get_sample('sirius_request_latency_seconds_count', method=method, route=route)
+
+    response = await client.request(method, url, json=body)
+
+    assert response.status_code == expected_status
+    assert get_sample('sirius_requests_total', method=method, route=route) == requests + 1
+    assert get_sample('sirius_request_latency_seconds_count', method=method, route=route) == observed + 1
+    expected_errors = errors + 1 if expected_status >= 400 else errors
+    assert get_sample(
+        'sirius_request_errors_total', method=method, route=route, status_class=status_class
+    ) == expected_errors
+    assert get_sample('sirius_requests_in_progress') == 0
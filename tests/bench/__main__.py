@@ -0,0 +1,69 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+from tests.bench.cases import get_cases
+
+parser = argparse.ArgumentParser(description='Microbenchmarks of per-request hot paths, microseconds per call')
+parser.add_argument('--filter', default='', help='run only cases whose name contains this string')
+parser.add_argument('--repeat', type=int, default=5)
+parser.add_argument('--output', type=Path, help='write results as JSON, e.g. to update the baseline')
+parser.add_argument('--history', type=Path, help='append results with the current commit as a JSON line')
+parser.add_argument('--baseline', type=Path, help='fail if the best time regresses against this JSON baseline')
+parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative regression')
+
+
+def measure(case: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    timer = timeit.Timer(case)
+    # число вызовов подбирается так, чтобы один замер шёл не меньше 0.2 с
+    number, _ = timer.autorange()
+    timings = [timing / number * 1e6 for timing in timer.repeat(repeat=repeat, number=number)]
+    return {'best_us': round(min(timings), 3), 'median_us': round(statistics.median(timings), 3)}
+
+
+def get_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def main(args: argparse.Namespace) -> int:
+    results: Dict[str, Dict[str, float]] = {}
+    for name, case in get_cases().items():
+        if args.filter in name:
+            results[name] = measure(case, args.repeat)
+            print(f'{name:45} {results[name]["best_us"]:12.3f} us  (median {results[name]["median_us"]:.3f})')
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2, sort_keys=True))
+
+    if args.history:
+        with args.history.open('a') as file:
+            file.write(json.dumps({'commit': get_commit(), 'timestamp': int(time.time()), 'results': results}) + '\n')
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        # best устойчивее к шуму соседних процессов, чем медиана
+        regressions = [
+            f'{name}: {result["best_us"]} us > baseline {baseline[name]["best_us"]} us'
+            for name, result in results.items()
+            if name in baseline and result['best_us'] > baseline[name]['best_us'] * (1 + args.tolerance)
+        ]
+        for regression in regressions:
+            print('REGRESSION', regression, file=sys.stderr)
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,93 @@
+import hashlib
+import uuid
+from typing import Any, Callable, Dict, List
+
+import msgpack
+import orjson
+from jose import jwt
+
+from webapp.cache.results import pack_result, unpack_result
+from webapp.schema.file.resized import User
+from webapp.utils.auth.jwt import JwtAuth
+from webapp.utils.auth.password import check_password, hash_password
+
+SECRET = 'bench-secret'
+# размеры как в проде: до RESIZE_MAX_VARIANTS вариантов, страница resized_all до USER_FILES_MAX_PAGE_SIZE
+VARIANT_COUNTS = (1, 10)
+FILE_COUNTS = (10, 100, 500)
+
+
+def make_task(variants: int) -> Dict[str, Any]:
+    task: Dict[str, Any] = {
+        'image': {
+            'bucket': 'originals',
+            'key': uuid.uuid4().hex,
+            'size': 5 * 1024 * 1024,
+            'content_type': 'image/jpeg',
+        },
+        'task_id': uuid.uuid4().hex,
+        'user_id': 1,
+        'content_hash': hashlib.sha256(b'image').hexdigest(),
+    }
+    if variants == 1:
+        task.update(width=1920, height=1080)
+    else:
+        task['variants'] = [(100 * (number + 1), 50 * (number + 1)) for number in range(variants)]
+    return task
+
+
+def make_result(variants: int) -> bytes:
+    task_id = uuid.uuid4().hex
+    result: Dict[str, Any] = {
+        'status': 'done',
+        'task_id': task_id,
+        'url': f'http://localhost:9000/resized/{task_id}/1920x1080.jpeg',
+    }
+    if variants > 1:
+        result['variants'] = [
+            {'width': width, 'height': height, 'url': f'http://localhost:9000/resized/{task_id}/{width}x{height}.jpeg'}
+            for width, height in make_task(variants)['variants']
+        ]
+    return orjson.dumps(result)
+
+
+def make_files(count: int) -> List[Dict[str, Any]]:
+    return [
+        {'url': f'http://localhost:9000/resized/{number:032x}/1920x1080.jpeg', 'task_id': f'{number:032x}'}
+        for number in range(count)
+    ]
+
+
+def get_cases() -> Dict[str, Callable[[], Any]]:
+    # имя -> вызов без аргументов; данные готовятся заранее и в замер не входят
+    cases: Dict[str, Callable[[], Any]] = {}
+
+    for variants in VARIANT_COUNTS:
+        task = make_task(variants)
+        result = make_result(variants)
+        cases[f'msgpack_packb_task[variants={variants}]'] = lambda task=task: msgpack.packb(task)
+        packed = pack_result(orjson.loads(result))
+        cases[f'orjson_loads_result[variants={variants}]'] = lambda result=result: orjson.loads(result)
+        # текущий путь get_resized: компактная запись из redis -> json ответа
+        cases[f'unpack_result_dump[variants={variants}]'] = lambda packed=packed: orjson.dumps(
+            unpack_result('task', packed)
+        )
+
+    auth = JwtAuth(SECRET)
+    token = auth.create_token(1)
+    cases['jwt_decode'] = lambda: jwt.decode(token, SECRET)
+    cases['jwt_decode_token_cached'] = lambda: auth.decode_token(token)
+
+    hashed = hash_password('qwerty')
+    cases['hash_password'] = lambda: hash_password('qwerty')
+    cases['check_password'] = lambda: check_password('qwerty', hashed)
+
+    for count in FILE_COUNTS:
+        user = {'username': 'test', 'files': make_files(count), 'next_cursor': count}
+        # прежний путь resized_all через pydantic и текущий - сразу orjson
+        cases[f'pydantic_user_dump[files={count}]'] = lambda user=user: User.model_validate(user).model_dump(
+            mode='json'
+        )
+        cases[f'orjson_dumps_user_page[files={count}]'] = lambda user=user: orjson.dumps(user)
+
+    return cases
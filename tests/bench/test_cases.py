@@ -0,0 +1,7 @@
+from tests.bench.cases import get_cases
+
+
+def test_cases_run() -> None:
+    # бенчмарки не должны молча сломаться вместе с кодом, который они меряют
+    for case in get_cases().values():
+        case()
@@ -0,0 +1,33 @@
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+
+from webapp.cache.queue_lag import get_queue_lag, report_queue_lag
+from webapp.cache.rate_limit import acquire_token
+
+KEY = 'sirius:rate_limit:resize:1'
+
+
+@pytest.mark.asyncio()
+async def test_acquire_token() -> None:
+    redis = FakeRedis(server=FakeServer())
+
+    assert [await acquire_token(redis, KEY, rate=1, burst=3) for _ in range(3)] == [0, 0, 0]
+
+    retry_after = await acquire_token(redis, KEY, rate=1, burst=3)
+    assert 0 < retry_after <= 1
+    # отказ токены не списывает
+    assert await acquire_token(redis, KEY, rate=1, burst=3, cost=2) == pytest.approx(retry_after + 1, abs=0.1)
+    assert 0 < await redis.pttl(KEY) <= 3000
+
+
+@pytest.mark.asyncio()
+async def test_queue_lag() -> None:
+    redis = FakeRedis(server=FakeServer())
+
+    assert await get_queue_lag(redis, 'topic') == 0
+
+    await report_queue_lag(redis, 'topic', {0: 5, 1: 0})
+    await report_queue_lag(redis, 'topic', {1: 7})
+
+    assert await get_queue_lag(redis, 'topic') == 12
@@ -0,0 +1,57 @@
+from typing import Any, Dict, List, Sequence
+
+import orjson
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from webapp.cache import results
+from webapp.cache.results import pack_result, unpack_result
+
+TASK_ID = '0123456789abcdef0123456789abcdef'
+URL = f'http://localhost:9000/resized/{TASK_ID}'
+
+
+@pytest.mark.parametrize(
+    'result',
+    [
+        {'status': 'failed', 'task_id': TASK_ID},
+        {'status': 'done', 'task_id': TASK_ID, 'url': f'{URL}/100x100.png'},
+        {
+            'status': 'done',
+            'task_id': TASK_ID,
+            'url': f'{URL}/100x100.png',
+            'variants': [
+                {'width': 100, 'height': 100, 'url': f'{URL}/100x100.png'},
+                {'width': 32, 'height': 32, 'url': f'{URL}/32x32.png'},
+            ],
+        },
+    ],
+)
+def test_pack_result(result: Dict[str, Any]) -> None:
+    packed = pack_result(result)
+
+    assert unpack_result(TASK_ID, packed) == result
+    assert len(packed) < len(orjson.dumps(result))
+
+
+@pytest.mark.asyncio()
+async def test_get_results_pending(monkeypatch: pytest.MonkeyPatch) -> None:
+    loaded: List[str] = []
+
+    async def load_results(redis: Redis, session: AsyncSession, task_ids: Sequence[str]) -> Dict[str, Any]:
+        loaded.extend(task_ids)
+        return {}
+
+    monkeypatch.setattr(results, 'load_results', load_results)
+    fake_redis = FakeRedis(server=FakeServer())
+    done = {'status': 'done', 'task_id': 'done', 'url': f'{URL}/100x100.png'}
+    await results.store_result(fake_redis, 'done', done)
+    await results.store_pending(fake_redis, 'done')
+    await results.store_pending(fake_redis, 'pending')
+
+    # результат воркера отметка не перезаписывает, в postgres идёт только неизвестная задача
+    assert await results.get_results(fake_redis, ['done', 'pending', 'expired'], None) == [done, None, None]
+    assert loaded == ['expired']
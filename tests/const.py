@@ -5,5 +5,12 @@ URLS = {
     },
     'file': {
         'resize': '/file/resize',
+        'resize_variants': '/file/resize/variants',
+        'resize_wait': '/file/resize/wait',
+        'resize_events': '/file/resize/events',
+        'resize_ws': '/file/resize/ws',
+        'resize_status': '/file/resize/status',
+        'resized_all': '/file/resized_all',
+        'content': '/file/{task_id}/content',
     },
 }
@@ -0,0 +1,46 @@
+import asyncio
+from typing import Any
+
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+
+from webapp.cache.dedup import ResizeClaim
+from webapp.cache.key_builder import get_file_resize_dedup_cache
+from webapp.cache.results import get_result
+from webapp.db import redis
+from webapp.db.kafka_outbox import KafkaOutbox
+
+
+class FailingProducer:
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    async def send(self, topic: str, value: bytes, **kwargs: Any) -> asyncio.Future[None]:
+        if self.stage == 'send':
+            raise ConnectionError('broker is unavailable')
+
+        delivery: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        delivery.set_exception(ConnectionError('broker is unavailable'))
+        return delivery
+
+    async def flush(self) -> None:
+        return
+
+
+@pytest.mark.parametrize('stage', ['send', 'delivery'])
+@pytest.mark.asyncio()
+async def test_outbox_fails_undelivered_task(monkeypatch: pytest.MonkeyPatch, stage: str) -> None:
+    fake_redis = FakeRedis(server=FakeServer())
+    monkeypatch.setattr(redis, 'redis', fake_redis, raising=False)
+    dedup_key = get_file_resize_dedup_cache('hash', [(10, 10)])
+    await fake_redis.set(dedup_key, 'task')
+
+    outbox = KafkaOutbox(FailingProducer(stage), max_size=1, put_timeout=1)  # type: ignore[arg-type]
+    outbox.start()
+    await outbox.put('test_resize_image', b'value', claim=ResizeClaim('task', 'hash', [(10, 10)]))
+    await outbox.stop()
+
+    # задача не висит в статусе ожидания, повторная загрузка того же содержимого создаст новую
+    assert await get_result(fake_redis, 'task') == {'status': 'failed', 'task_id': 'task'}
+    assert not await fake_redis.exists(dedup_key)
@@ -0,0 +1,18 @@
+import pytest
+
+from webapp.db.kafka_partitioner import hash_partitioner
+
+
+@pytest.mark.parametrize(
+    ('key', 'partitions'),
+    [
+        (b'1', [0, 1, 2]),
+        (b'42', [0, 1, 2, 3, 4, 5]),
+        (b'421c76d77563afa1914846b010bd164f', [3, 7]),
+    ],
+)
+def test_hash_partitioner_is_stable(key: bytes, partitions: list) -> None:
+    partition = hash_partitioner(key, partitions)
+
+    assert partition in partitions
+    assert all(hash_partitioner(key, partitions) == partition for _ in range(10))
@@ -0,0 +1,86 @@
+import itertools
+import time
+from typing import AsyncGenerator, List
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from webapp.db import postgres
+
+BROKEN_URL = 'postgresql+asyncpg://postgres@/postgres?host=/nonexistent'
+
+
+async def get_backend_pid(session: AsyncSession) -> int:
+    return await session.scalar(text('SELECT pg_backend_pid()'))
+
+
+@pytest.fixture()
+async def replicas(monkeypatch: pytest.MonkeyPatch) -> AsyncGenerator[List[async_sessionmaker[AsyncSession]], None]:
+    replicas: List[async_sessionmaker[AsyncSession]] = []
+    monkeypatch.setattr(postgres, 'replica_sessions', replicas)
+    monkeypatch.setattr(postgres, 'replica_down_until', {})
+    monkeypatch.setattr(postgres, 'replica_counter', itertools.count())
+
+    yield replicas
+
+    # соединения реплик не должны пережить тест
+    for replica in replicas:
+        engine: AsyncEngine = replica.kw['bind']
+        await engine.dispose()
+
+
+@pytest.mark.asyncio()
+async def test_read_session_without_replicas(replicas: List[async_sessionmaker[AsyncSession]]) -> None:
+    async with postgres.read_session() as session:
+        assert session.bind is postgres.engine
+
+
+@pytest.mark.asyncio()
+async def test_read_session_round_robin(replicas: List[async_sessionmaker[AsyncSession]]) -> None:
+    first = postgres.create_session(postgres.create_engine())
+    second = postgres.create_session(postgres.create_engine())
+    replicas.extend([first, second])
+
+    binds = []
+    for _ in range(4):
+        async with postgres.read_session() as session:
+            await get_backend_pid(session)
+            binds.append(session.bind)
+
+    assert binds[0] is not binds[1]
+    assert binds[:2] == binds[2:]
+
+
+@pytest.mark.asyncio()
+async def test_read_session_fallback(replicas: List[async_sessionmaker[AsyncSession]]) -> None:
+    broken = postgres.create_session(postgres.create_engine(BROKEN_URL))
+    replicas.extend([broken, postgres.create_session(postgres.create_engine())])
+
+    # соединение берётся только при первом запросе, до проверки реплика считается доступной
+    async with postgres.read_session() as session:
+        assert session.bind is broken.kw['bind']
+        assert not session.in_transaction()
+
+    await postgres.check_replicas()
+
+    # сломанная реплика пропускается до DB_REPLICA_RETRY_AFTER, рабочая - нет
+    assert postgres.replica_down_until[0] > time.monotonic()
+    assert 1 not in postgres.replica_down_until
+
+    replicas.pop()
+    async with postgres.read_session() as session:
+        assert session.bind is postgres.engine
+        await get_backend_pid(session)
+
+
+@pytest.mark.asyncio()
+async def test_fresh_session(replicas: List[async_sessionmaker[AsyncSession]]) -> None:
+    replica = postgres.create_session(postgres.create_engine())
+    replicas.append(replica)
+
+    async with replica() as session:
+        async with postgres.fresh_session(session, recently_written=False) as fresh:
+            assert fresh is session
+        async with postgres.fresh_session(session, recently_written=True) as fresh:
+            assert fresh.bind is postgres.engine
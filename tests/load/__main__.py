@@ -0,0 +1,63 @@
+import argparse
+import asyncio
+import json
+import sys
+from contextlib import AsyncExitStack
+from pathlib import Path
+from typing import Any, Dict
+
+from httpx import AsyncClient, Limits
+
+from tests.const import URLS
+from tests.load.harness import compare, run_scenario
+from tests.load.scenarios import PASSWORD, SCENARIOS, USERNAME
+
+parser = argparse.ArgumentParser(description='Load test: RPS and p50/p95/p99 per endpoint')
+parser.add_argument('--url', help='URL of a running server; by default the app runs in-process with stand-ins')
+parser.add_argument('--concurrency', type=int, default=16)
+parser.add_argument('--requests', type=int, default=1000, help='requests per scenario')
+parser.add_argument('--warmup', type=int, default=20, help='unmeasured requests per scenario')
+parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), default=sorted(SCENARIOS))
+parser.add_argument('--output', type=Path, help='write results as JSON, e.g. to update the baseline')
+parser.add_argument('--baseline', type=Path, help='fail if results regress against this JSON baseline')
+parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative regression')
+
+
+async def main(args: argparse.Namespace) -> int:
+    async with AsyncExitStack() as stack:
+        limits = Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        if args.url:
+            client = AsyncClient(base_url=args.url, limits=limits)
+        else:
+            from tests.load.stand_ins import local_app
+
+            app = await stack.enter_async_context(local_app())
+            client = AsyncClient(app=app, base_url='http://load.test', limits=limits)
+        await stack.enter_async_context(client)
+
+        response = await client.post(URLS['auth']['login'], json={'username': USERNAME, 'password': PASSWORD})
+        response.raise_for_status()
+        token = response.json()['access_token']
+
+        results: Dict[str, Dict[str, Any]] = {}
+        for name in args.scenarios:
+            result = await run_scenario(
+                client, SCENARIOS[name], token, args.concurrency, args.requests, args.warmup
+            )
+            results[name] = result.summary()
+            print(name, json.dumps(results[name]))
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2, sort_keys=True))
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for regression in regressions:
+            print('REGRESSION', regression, file=sys.stderr)
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main(parser.parse_args())))
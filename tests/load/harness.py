@@ -0,0 +1,98 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Sequence
+
+from httpx import AsyncClient, Response
+
+# (клиент, access token, номер запроса) -> ответ
+RequestT = Callable[[AsyncClient, str, int], Awaitable[Response]]
+
+
+@dataclass
+class Scenario:
+    name: str
+    request: RequestT
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    duration: float = 0
+    errors: int = 0
+    latencies: List[float] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        return {
+            'requests': len(latencies),
+            'errors': self.errors,
+            'rps': round(len(latencies) / self.duration, 1) if self.duration else 0,
+            'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        }
+
+
+def percentile(latencies: Sequence[float], percent: float) -> float:
+    # nearest-rank по отсортированной выборке
+    if not latencies:
+        return 0
+    rank = max(1, round(percent / 100 * len(latencies)))
+    return latencies[min(rank, len(latencies)) - 1]
+
+
+async def run_scenario(
+    client: AsyncClient,
+    scenario: Scenario,
+    token: str,
+    concurrency: int,
+    requests: int,
+    warmup: int = 0,
+) -> ScenarioResult:
+    for number in range(warmup):
+        await scenario.request(client, token, -number - 1)
+
+    result = ScenarioResult(scenario.name)
+    numbers = iter(range(requests))
+
+    async def worker() -> None:
+        # общий итератор: запросы разбираются воркерами по мере освобождения
+        for number in numbers:
+            start = time.perf_counter()
+            try:
+                response = await scenario.request(client, token, number)
+                failed = response.status_code >= 400
+            except Exception:
+                failed = True
+            result.latencies.append(time.perf_counter() - start)
+            result.errors += failed
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.duration = time.perf_counter() - start
+
+    return result
+
+
+def compare(
+    current: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    tolerance: float,
+) -> List[str]:
+    # Возвращает описания регрессий: rps упал или перцентили выросли больше чем на tolerance.
+    regressions = []
+    for name, summary in current.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+
+        if summary['rps'] < expected['rps'] * (1 - tolerance):
+            regressions.append(f'{name}: rps {summary["rps"]} < baseline {expected["rps"]}')
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms'):
+            if summary[metric] > expected[metric] * (1 + tolerance):
+                regressions.append(f'{name}: {metric} {summary[metric]} > baseline {expected[metric]}')
+        if summary['errors'] > expected['errors']:
+            regressions.append(f'{name}: errors {summary["errors"]} > baseline {expected["errors"]}')
+
+    return regressions
@@ -0,0 +1,59 @@
+from typing import Dict
+
+from httpx import AsyncClient, Response
+
+from tests.const import URLS
+from tests.load.harness import Scenario
+
+USERNAME = 'test'
+PASSWORD = 'qwerty'
+# минимальный валидный PNG 1x1, к нему дописывается номер запроса, чтобы обойти дедупликацию
+IMAGE = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360000002000001e221bc330000000049454e44ae426082'
+)
+
+
+def auth(token: str) -> Dict[str, str]:
+    return {'Authorization': f'Bearer {token}'}
+
+
+async def login(client: AsyncClient, token: str, number: int) -> Response:
+    return await client.post(URLS['auth']['login'], json={'username': USERNAME, 'password': PASSWORD})
+
+
+async def auth_info(client: AsyncClient, token: str, number: int) -> Response:
+    return await client.post(URLS['auth']['info'], headers=auth(token))
+
+
+async def resize(client: AsyncClient, token: str, number: int) -> Response:
+    return await client.post(
+        URLS['file']['resize'],
+        files={'image': ('image.png', IMAGE + number.to_bytes(8, 'big', signed=True), 'image/png')},
+        params={'width': 64, 'height': 64},
+        headers=auth(token),
+    )
+
+
+async def resize_status(client: AsyncClient, token: str, number: int) -> Response:
+    return await client.post(
+        URLS['file']['resize_status'],
+        json={'task_ids': [f'task{number % 100}', 'missing']},
+        headers=auth(token),
+    )
+
+
+async def resized_all(client: AsyncClient, token: str, number: int) -> Response:
+    return await client.get(URLS['file']['resized_all'], params={'limit': 50}, headers=auth(token))
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (
+        Scenario('login', login),
+        Scenario('auth_info', auth_info),
+        Scenario('resize', resize),
+        Scenario('resize_status', resize_status),
+        Scenario('resized_all', resized_all),
+    )
+}
@@ -0,0 +1,69 @@
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Tuple
+from unittest import mock
+
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+
+from conf.config import settings
+from tests.load.scenarios import PASSWORD, USERNAME
+from tests.mocking.kafka import TestKafkaProducer
+from tests.mocking.minio import TestMinio
+from webapp.db import kafka, minio, redis
+from webapp.db.postgres import engine
+from webapp.db.redis import get_redis
+from webapp.main import create_app
+from webapp.models.meta import DEFAULT_SCHEMA, metadata
+from webapp.models.sirius.user import User
+from webapp.utils.auth.password import hash_password
+
+
+class DiscardingObjects(Dict[Tuple[str, str], bytes]):
+    # загруженные оригиналы не нужны, а за прогон их набираются тысячи
+    def __setitem__(self, key: Tuple[str, str], value: bytes) -> None:
+        return
+
+
+async def prepare_database() -> None:
+    # локальный postgres из DB_URL: схема, таблицы и пользователь для сценариев
+    async with engine.begin() as conn:
+        await conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS {DEFAULT_SCHEMA}'))
+        await conn.run_sync(metadata.create_all)
+        await conn.execute(
+            insert(User)
+            .values(username=USERNAME, hashed_password=hash_password(PASSWORD))
+            .on_conflict_do_nothing(index_elements=[User.username])
+        )
+
+
+@asynccontextmanager
+async def local_app() -> AsyncIterator[FastAPI]:
+    # Приложение с заглушками Kafka, Redis и MinIO вместо внешних сервисов; lifespan не запускается.
+    await prepare_database()
+
+    app = create_app()
+    fake_redis = FakeRedis(server=FakeServer())
+    app.dependency_overrides[get_redis] = lambda: fake_redis
+    producer = TestKafkaProducer(deque(maxlen=1000))  # type: ignore[arg-type]
+    storage = TestMinio(DiscardingObjects())
+
+    # Все сценарии идут от одного пользователя: с боевым лимитом почти все resize получили бы 429,
+    # и прогон мерил бы отказы, а не обработку. Отставание очереди без воркеров не считается,
+    # а синхронная отправка в kafka не даёт буферу продюсера включить отказ по заполненности.
+    with (
+        mock.patch.object(settings, 'RATE_LIMIT_RESIZE_RATE', 1_000_000),
+        mock.patch.object(settings, 'RATE_LIMIT_RESIZE_BURST', 1_000_000),
+        mock.patch.object(settings, 'ADMISSION_MAX_QUEUE_LAG', None),
+        mock.patch.object(settings, 'KAFKA_PUBLISH_MODE', 'sync'),
+        mock.patch.object(redis, 'redis', fake_redis, create=True),
+        mock.patch.object(kafka, 'get_producer', lambda: producer),
+        mock.patch.object(kafka, 'get_partition', lambda topic, key=None: 0),
+        mock.patch.object(minio, 'get_minio', lambda: storage),
+    ):
+        yield app
+
+    await engine.dispose()
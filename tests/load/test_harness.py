@@ -0,0 +1,35 @@
+from typing import Any, Dict, List
+
+import pytest
+
+from tests.load.harness import compare, percentile
+
+BASELINE = {'login': {'requests': 100, 'errors': 0, 'rps': 1000, 'p50_ms': 1, 'p95_ms': 2, 'p99_ms': 4}}
+
+
+@pytest.mark.parametrize(
+    ('latencies', 'percent', 'expected'),
+    [
+        ([], 50, 0),
+        ([0.3], 99, 0.3),
+        ([float(value) for value in range(1, 101)], 50, 50),
+        ([float(value) for value in range(1, 101)], 95, 95),
+        ([float(value) for value in range(1, 101)], 99, 99),
+    ],
+)
+def test_percentile(latencies: List[float], percent: float, expected: float) -> None:
+    assert percentile(latencies, percent) == expected
+
+
+@pytest.mark.parametrize(
+    ('current', 'expected_regressions'),
+    [
+        ({'login': {**BASELINE['login'], 'rps': 900, 'p99_ms': 4.5}}, 0),
+        ({'login': {**BASELINE['login'], 'rps': 700}}, 1),
+        ({'login': {**BASELINE['login'], 'p95_ms': 3, 'p99_ms': 6}}, 2),
+        ({'login': {**BASELINE['login'], 'errors': 1}}, 1),
+        ({'resize': BASELINE['login']}, 0),
+    ],
+)
+def test_compare(current: Dict[str, Dict[str, Any]], expected_regressions: int) -> None:
+    assert len(compare(current, BASELINE, tolerance=0.2)) == expected_regressions
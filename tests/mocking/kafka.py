@@ -1,3 +1,4 @@
+import asyncio
 from typing import List, Any, Dict
 
 
@@ -13,4 +14,17 @@ class TestKafkaProducer:
             'topic': topic,
             'value': value,
             'partition': partition,
-        })
\ No newline at end of file
+        })
+
+    async def send(
+        self, topic, value=None, key=None, partition=None,
+        timestamp_ms=None, headers=None
+    ):
+        await self.send_and_wait(topic, value, key, partition, timestamp_ms, headers)
+
+        delivery = asyncio.get_running_loop().create_future()
+        delivery.set_result(None)
+        return delivery
+
+    async def flush(self):
+        return
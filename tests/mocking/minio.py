@@ -0,0 +1,65 @@
+import hashlib
+import inspect
+import mimetypes
+from typing import Any, AsyncIterator, Dict, Tuple
+
+from miniopy_async.datatypes import Object
+from miniopy_async.error import S3Error
+
+
+class TestContent:
+    def __init__(self, content: bytes):
+        self.content = content
+
+    async def iter_chunked(self, size: int) -> AsyncIterator[bytes]:
+        for start in range(0, len(self.content), size):
+            yield self.content[start : start + size]
+
+
+class TestObjectResponse:
+    def __init__(self, content: bytes):
+        self.content = TestContent(content)
+        self.released = False
+
+    def release(self) -> None:
+        self.released = True
+
+
+class TestMinio:
+    def __init__(self, minio_objects: Dict[Tuple[str, str], bytes]):
+        self.minio_objects: Dict[Tuple[str, str], bytes] = minio_objects
+
+    async def put_object(
+        self, bucket_name, object_name, data, length,
+        content_type='application/octet-stream', **kwargs: Any
+    ):
+        content = b''
+        while True:
+            chunk = data.read(length if length > 0 else -1)
+            if inspect.isawaitable(chunk):
+                chunk = await chunk
+            if not chunk:
+                break
+            content += chunk
+
+        self.minio_objects[(bucket_name, object_name)] = content
+
+    def get_content(self, bucket_name, object_name) -> bytes:
+        if (bucket_name, object_name) not in self.minio_objects:
+            raise S3Error('NoSuchKey', 'Object does not exist', object_name, '', '', None, bucket_name, object_name)
+
+        return self.minio_objects[(bucket_name, object_name)]
+
+    async def stat_object(self, bucket_name, object_name, **kwargs: Any) -> Object:
+        content = self.get_content(bucket_name, object_name)
+        return Object(
+            bucket_name,
+            object_name,
+            etag=hashlib.md5(content).hexdigest(),
+            size=len(content),
+            content_type=mimetypes.guess_type(object_name)[0] or 'application/octet-stream',
+        )
+
+    async def get_object(self, bucket_name, object_name, session, offset=0, length=0, **kwargs: Any):
+        content = self.get_content(bucket_name, object_name)
+        return TestObjectResponse(content[offset : offset + length] if length else content[offset:])
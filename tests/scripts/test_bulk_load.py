@@ -0,0 +1,71 @@
+import csv
+import json
+from pathlib import Path
+from typing import AsyncGenerator
+
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+from sqlalchemy import func, select, text
+
+from scripts.bulk_load import bulk_load, get_levels
+from tests.my_types import FixtureFunctionT
+from webapp.cache.key_builder import get_recent_write_cache, get_user_credentials_cache
+from webapp.cache.user import MISSING
+from webapp.db.postgres import engine
+from webapp.models.meta import metadata
+from webapp.models.sirius.file import File
+from webapp.models.sirius.user_file import UserFile
+
+USERS = 3
+FILES = 250
+
+
+@pytest.fixture()
+async def _truncate() -> AsyncGenerator[None, None]:
+    yield
+
+    async with engine.begin() as conn:
+        await conn.execute(text('TRUNCATE sirius.user_file, sirius.file, sirius.user RESTART IDENTITY CASCADE'))
+
+
+def test_get_levels() -> None:
+    levels = get_levels([metadata.tables[name] for name in ('sirius.user_file', 'sirius.file', 'sirius.user')])
+
+    assert [sorted(table.name for table in level) for level in levels] == [['file', 'user'], ['user_file']]
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_truncate')
+async def test_bulk_load(tmp_path: Path, _migrate_db: FixtureFunctionT) -> None:
+    with open(tmp_path / 'sirius.user.jsonl', 'w') as file:
+        for user_id in range(1, USERS + 1):
+            file.write(json.dumps({'id': user_id, 'username': f'user{user_id}', 'hashed_password': 'x'}) + '\n')
+
+    with open(tmp_path / 'sirius.file.csv', 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['id', 'url', 'task_id', 'width'])
+        for file_id in range(1, FILES + 1):
+            writer.writerow([file_id, f'http://localhost/{file_id}', f'task{file_id}', file_id if file_id % 2 else ''])
+
+    with open(tmp_path / 'sirius.user_file.jsonl', 'w') as file:
+        for file_id in range(1, FILES + 1):
+            file.write(json.dumps({'user_id': file_id % USERS + 1, 'file_id': file_id}) + '\n')
+
+    # логин успели запросить до загрузки
+    fake_redis = FakeRedis(server=FakeServer())
+    await fake_redis.set(get_user_credentials_cache('user1'), MISSING)
+
+    paths = [tmp_path / name for name in ('sirius.user_file.jsonl', 'sirius.file.csv', 'sirius.user.jsonl')]
+    assert await bulk_load(engine, paths, batch_size=100, redis=fake_redis) == USERS + FILES * 2
+
+    assert not await fake_redis.exists(get_user_credentials_cache('user1'))
+    written = [get_recent_write_cache(get_user_credentials_cache(f'user{user_id}')) for user_id in range(1, USERS + 1)]
+    assert await fake_redis.exists(*written) == USERS
+
+    async with engine.begin() as conn:
+        assert await conn.scalar(select(func.count()).select_from(UserFile)) == FILES
+        assert await conn.scalar(select(func.count()).where(File.width.is_(None))) == FILES // 2
+        # последовательность догнала загруженные id
+        file_id = await conn.scalar(File.__table__.insert().values(url='u', task_id='t').returning(File.id))
+        assert file_id == FILES + 1
@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy import func, insert, select, text
+
+from scripts.migrate import create_unique_indexes
+from tests.my_types import FixtureFunctionT
+from webapp.db.postgres import engine
+from webapp.models.sirius.file import File
+from webapp.models.sirius.user import User
+from webapp.models.sirius.user_file import UserFile
+
+# схема до уникальных индексов
+OLD_SCHEMA = [
+    'DROP INDEX sirius.ux_file_task_id_width_height',
+    'DROP INDEX sirius.ux_user_file_user_id_file_id',
+    'CREATE INDEX ix_sirius_file_task_id ON sirius.file (task_id)',
+    'CREATE INDEX ix_user_file_user_id_file_id ON sirius.user_file (user_id, file_id)',
+]
+
+
+@pytest.mark.asyncio()
+async def test_create_unique_indexes(_migrate_db: FixtureFunctionT) -> None:
+    async with engine.connect() as conn:
+        async with conn.begin() as transaction:
+            for statement in OLD_SCHEMA:
+                await conn.execute(text(statement))
+
+            await conn.execute(insert(User).values(id=1, username='user', hashed_password='x'))
+            await conn.execute(
+                insert(File).values(
+                    [
+                        {'id': 1, 'url': 'u', 'task_id': 'task', 'width': 10, 'height': 10},
+                        {'id': 2, 'url': 'u', 'task_id': 'task', 'width': 10, 'height': 10},
+                        {'id': 3, 'url': 'u', 'task_id': 'task', 'width': 20, 'height': 20},
+                        # без размеров дублями не считаются
+                        {'id': 4, 'url': 'u', 'task_id': 'old', 'width': None, 'height': None},
+                        {'id': 5, 'url': 'u', 'task_id': 'old', 'width': None, 'height': None},
+                    ]
+                )
+            )
+            await conn.execute(
+                insert(UserFile).values([{'user_id': 1, 'file_id': file_id} for file_id in (1, 2, 2, 3, 4, 5)])
+            )
+
+            await create_unique_indexes(conn)
+
+            assert (await conn.scalars(select(File.id).order_by(File.id))).all() == [1, 3, 4, 5]
+            links = await conn.execute(select(UserFile.user_id, UserFile.file_id).order_by(UserFile.file_id))
+            assert links.all() == [(1, 1), (1, 3), (1, 4), (1, 5)]
+
+            indexes = await conn.scalars(
+                text("SELECT indexname FROM pg_indexes WHERE schemaname = 'sirius' ORDER BY indexname")
+            )
+            names = indexes.all()
+            assert {'ux_file_task_id_width_height', 'ux_user_file_user_id_file_id'} <= set(names)
+            assert not {'ix_sirius_file_task_id', 'ix_user_file_user_id_file_id'} & set(names)
+
+            # повторный запуск ничего не делает
+            await create_unique_indexes(conn)
+            assert await conn.scalar(select(func.count()).select_from(File)) == 4
+
+            await transaction.rollback()
@@ -0,0 +1,101 @@
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeConnection
+from prometheus_client import REGISTRY
+from redis.asyncio import ConnectionPool
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from conf.config import settings
+from webapp.db.postgres import create_engine, engine
+from webapp.utils.instrumentation import ERROR, OK, InstrumentedRedis, get_sql_operation, track_latency
+
+
+def get_count(dependency: str, operation: str, outcome: str) -> float:
+    labels = {'dependency': dependency, 'operation': operation, 'outcome': outcome}
+    return REGISTRY.get_sample_value('sirius_deps_latency_seconds_count', labels) or 0
+
+
+@pytest.mark.parametrize(
+    ('statement', 'expected_operation'),
+    [
+        ('SELECT 1', 'select'),
+        ('\n  insert into sirius.file values (1)', 'insert'),
+        ('WITH x AS (SELECT 1) SELECT * FROM x', 'with'),
+        ('VACUUM', 'other'),
+        ('', 'other'),
+    ],
+)
+def test_get_sql_operation(statement: str, expected_operation: str) -> None:
+    assert get_sql_operation(statement) == expected_operation
+
+
+def test_track_latency() -> None:
+    ok, error = get_count('test', 'call', OK), get_count('test', 'call', ERROR)
+
+    with track_latency('test', 'call'):
+        pass
+    with pytest.raises(ValueError), track_latency('test', 'call'):
+        raise ValueError
+
+    assert get_count('test', 'call', OK) == ok + 1
+    assert get_count('test', 'call', ERROR) == error + 1
+
+
+@pytest.mark.asyncio()
+async def test_instrumented_engine() -> None:
+    ok, error = get_count('postgres', 'select', OK), get_count('postgres', 'select', ERROR)
+
+    async with engine.connect() as conn:
+        await conn.execute(text('SELECT 1'))
+        with pytest.raises(DBAPIError):
+            await conn.execute(text('SELECT * FROM no_such_table'))
+
+    assert get_count('postgres', 'select', OK) == ok + 1
+    assert get_count('postgres', 'select', ERROR) == error + 1
+
+
+@pytest.mark.parametrize('close', [True, False])
+@pytest.mark.asyncio()
+async def test_pool_capacity_dispose(close: bool) -> None:
+    capacity = REGISTRY.get_sample_value('sirius_db_pool_capacity')
+    replica = create_engine()
+    pool_capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    assert REGISTRY.get_sample_value('sirius_db_pool_capacity') == capacity + pool_capacity
+
+    # после dispose движок держит новый пул, ёмкость не удваивается
+    await replica.dispose(close=close)
+    assert REGISTRY.get_sample_value('sirius_db_pool_capacity') == capacity + pool_capacity
+
+    await replica.dispose()
+    replica.sync_engine.pool.dispose()
+    assert REGISTRY.get_sample_value('sirius_db_pool_capacity') == capacity
+
+
+@pytest.mark.asyncio()
+async def test_instrumented_redis() -> None:
+    redis = InstrumentedRedis(connection_pool=ConnectionPool(connection_class=FakeConnection, server=FakeServer()))
+    set_ok, pipeline_ok = get_count('redis', 'set', OK), get_count('redis', 'pipeline', OK)
+
+    await redis.set('key', 'value')
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.get('key')
+        pipe.get('key')
+        assert await pipe.execute() == [b'value', b'value']
+
+    assert get_count('redis', 'set', OK) == set_ok + 1
+    assert get_count('redis', 'pipeline', OK) == pipeline_ok + 1
+
+
+@pytest.mark.asyncio()
+async def test_instrumented_pool() -> None:
+    checkouts = REGISTRY.get_sample_value('sirius_db_pool_checkout_wait_seconds_count') or 0
+    checked_out = REGISTRY.get_sample_value('sirius_db_pool_checked_out')
+
+    async with engine.connect() as conn:
+        await conn.execute(text('SELECT 1'))
+        assert REGISTRY.get_sample_value('sirius_db_pool_checked_out') == checked_out + 1
+
+    assert REGISTRY.get_sample_value('sirius_db_pool_checkout_wait_seconds_count') == checkouts + 1
+    assert REGISTRY.get_sample_value('sirius_db_pool_checked_out') == checked_out
+    assert REGISTRY.get_sample_value('sirius_db_pool_capacity') >= settings.DB_POOL_SIZE
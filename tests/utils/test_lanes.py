@@ -0,0 +1,63 @@
+from typing import List, Sequence
+
+import pytest
+
+from conf.config import settings
+from webapp.schema.file.resize import SizeT
+from webapp.utils.lanes import BULK, FAST, SHARED, Lane, get_capacities, get_lane, get_worker_lanes
+
+
+@pytest.mark.parametrize(
+    ('size', 'sizes', 'expected'),
+    [
+        (1024, [(100, 100)], FAST),
+        (1024, [(100, 100), (32, 32)], FAST),
+        (None, [(100, 100)], BULK),
+        (2 * 1024 * 1024 + 1, [(100, 100)], BULK),
+        (1024, [(1024, 1024), (1, 1)], BULK),
+    ],
+)
+def test_get_lane(size: int | None, sizes: Sequence[SizeT], expected: str) -> None:
+    assert get_lane(size, sizes) == expected
+
+
+@pytest.mark.parametrize(
+    ('topic_fast', 'topic_bulk', 'lanes', 'expected'),
+    [
+        ('fast', 'bulk', [FAST, BULK], [Lane(FAST, 'fast', 0.75), Lane(BULK, 'bulk', 0.25)]),
+        ('fast', 'bulk', [BULK], [Lane(BULK, 'bulk', 1)]),
+        # без отдельных топиков обе дорожки читаются из KAFKA_TOPIC одним консьюмером
+        (None, None, [FAST, BULK], [Lane(SHARED, settings.KAFKA_TOPIC, 1)]),
+        (None, None, [BULK], [Lane(BULK, settings.KAFKA_TOPIC, 1)]),
+    ],
+)
+def test_get_worker_lanes(
+    monkeypatch: pytest.MonkeyPatch,
+    topic_fast: str | None,
+    topic_bulk: str | None,
+    lanes: List[str],
+    expected: List[Lane],
+) -> None:
+    monkeypatch.setattr(settings, 'KAFKA_TOPIC_FAST', topic_fast)
+    monkeypatch.setattr(settings, 'KAFKA_TOPIC_BULK', topic_bulk)
+
+    assert get_worker_lanes(lanes, {FAST: 3, BULK: 1}) == expected
+
+
+@pytest.mark.parametrize(
+    ('total', 'shares', 'expected'),
+    [
+        (8, [0.75, 0.25], [6, 2]),
+        (3, [0.75, 0.25], [2, 1]),
+        (2, [0.75, 0.25], [1, 1]),
+        (10, [1], [10]),
+        (5, [0.5, 0.5], [3, 2]),
+        (7, [0.6, 0.3, 0.1], [4, 2, 1]),
+        # меньше одного слота на дорожку не бывает
+        (1, [0.75, 0.25], [1, 1]),
+    ],
+)
+def test_get_capacities(total: int, shares: List[float], expected: List[int]) -> None:
+    lanes = [Lane(str(index), str(index), share) for index, share in enumerate(shares)]
+
+    assert get_capacities(total, lanes) == expected
@@ -0,0 +1,131 @@
+import asyncio
+from concurrent.futures import Executor
+from typing import Any, Dict, List
+
+import msgpack
+import pytest
+from aiokafka.structs import ConsumerRecord, TopicPartition
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+
+from conf.config import settings
+from webapp.cache.key_builder import get_file_resize_cache, get_file_resize_dedup_cache
+from webapp.cache.results import get_result
+from webapp.db import redis
+from webapp.utils.lanes import FAST, Lane
+from webapp.worker import handler, main
+
+PARTITION = TopicPartition('test_resize_image', 0)
+
+
+def make_message(offset: int, value: bytes) -> ConsumerRecord:
+    return ConsumerRecord('test_resize_image', 0, offset, 0, 0, None, value, None, len(value), 0, [])
+
+
+def make_task(task_id: str) -> bytes:
+    return msgpack.packb(
+        {
+            'task_id': task_id,
+            'width': 10,
+            'height': 10,
+            'user_id': 1,
+            'content_hash': task_id,
+            'image': {'bucket': 'originals', 'key': task_id, 'size': 1, 'content_type': 'image/png'},
+        }
+    )
+
+
+@pytest.fixture()
+def fake_redis(monkeypatch: pytest.MonkeyPatch) -> FakeRedis:
+    fake_redis = FakeRedis(server=FakeServer())
+    monkeypatch.setattr(redis, 'redis', fake_redis, raising=False)
+    return fake_redis
+
+
+@pytest.fixture()
+def handled(monkeypatch: pytest.MonkeyPatch) -> List[str]:
+    handled: List[str] = []
+
+    async def handle_task(task: Dict[str, Any], pool: Executor) -> None:
+        if task['task_id'] == 'unavailable':
+            raise OSError('storage is unavailable')
+        if task['task_id'] == 'broken':
+            # как handle_task при ResizeError
+            await handler.fail_task(task)
+            return
+        handled.append(task['task_id'])
+
+    monkeypatch.setattr(handler, 'handle_task', handle_task)
+    return handled
+
+
+@pytest.mark.asyncio()
+async def test_process_message(fake_redis: FakeRedis, handled: List[str]) -> None:
+    for task_id in ('unavailable', 'broken'):
+        await fake_redis.set(get_file_resize_dedup_cache(task_id, [(10, 10)]), task_id)
+
+    messages = [
+        make_message(0, make_task('good')),
+        make_message(1, make_task('unavailable')),
+        make_message(2, make_task('broken')),
+        make_message(3, b'\xc1'),
+        make_message(4, msgpack.packb({'task_id': 'no_image', 'width': 10, 'height': 10})),
+    ]
+    results = await asyncio.gather(*(handler.process_message(message, None) for message in messages))
+
+    # временная ошибка не коммитится и задачу не проваливает, битые сообщения пропускаются
+    assert results == [True, False, True, True, True]
+    assert handled == ['good']
+    assert not await fake_redis.exists(get_file_resize_cache('unavailable'))
+    assert await fake_redis.exists(get_file_resize_dedup_cache('unavailable', [(10, 10)]))
+    assert await get_result(fake_redis, 'broken') == {'status': 'failed', 'task_id': 'broken'}
+    assert not await fake_redis.exists(get_file_resize_dedup_cache('broken', [(10, 10)]))
+
+
+class TestConsumer:
+    __test__ = False
+
+    def __init__(self, batches: List[List[ConsumerRecord]]):
+        self.batches = batches
+        self.committed: List[Dict[TopicPartition, int]] = []
+        self.seeks: List[int] = []
+
+    async def getmany(self, **kwargs: Any) -> Dict[TopicPartition, List[ConsumerRecord]]:
+        if not self.batches:
+            raise asyncio.CancelledError
+        return {PARTITION: self.batches.pop(0)}
+
+    async def commit(self, offsets: Dict[TopicPartition, int]) -> None:
+        self.committed.append(offsets)
+
+    def seek(self, partition: TopicPartition, offset: int) -> None:
+        self.seeks.append(offset)
+
+
+@pytest.mark.asyncio()
+async def test_consume_retry(monkeypatch: pytest.MonkeyPatch, fake_redis: FakeRedis, handled: List[str]) -> None:
+    monkeypatch.setattr(settings, 'WORKER_RETRY_DELAY', 0)
+
+    async def report_lag(*args: Any) -> None:
+        return
+
+    monkeypatch.setattr(main, 'report_lag', report_lag)
+
+    consumer = TestConsumer(
+        [
+            [make_message(0, make_task('good')), make_message(1, make_task('unavailable')), make_message(2, b'\xc1')],
+            [make_message(1, make_task('later'))],
+        ]
+    )
+    with pytest.raises(asyncio.CancelledError):
+        await main.consume(consumer, None, Lane(FAST, PARTITION.topic, 1), 10)  # type: ignore[arg-type]
+
+    # offset не уходит дальше задачи с временной ошибкой, партиция перечитывается с неё
+    assert consumer.committed == [{PARTITION: 1}, {PARTITION: 2}]
+    assert consumer.seeks == [1]
+    assert handled == ['good', 'later']
+
+
+@pytest.mark.parametrize(('retries', 'expected'), [(1, 0.5), (2, 1), (4, 4), (20, 30)])
+def test_get_retry_delay(retries: int, expected: float) -> None:
+    assert main.get_retry_delay(retries) == expected
@@ -0,0 +1,43 @@
+import io
+
+import pytest
+from PIL import Image
+
+from webapp.worker.image import ResizeError, resize_variants
+
+
+def make_image(image_format: str) -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', (400, 300), 'red').save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize(
+    ('image_format', 'width', 'height', 'expected_content_type'),
+    [
+        ('PNG', 123, 123, 'image/png'),
+        ('JPEG', 100, 50, 'image/jpeg'),
+    ],
+)
+def test_resize_single_variant(image_format: str, width: int, height: int, expected_content_type: str) -> None:
+    [resized] = resize_variants(make_image(image_format), [(width, height)])
+
+    assert resized.content_type == expected_content_type
+    with Image.open(io.BytesIO(resized.data)) as image:
+        assert image.size == (width, height)
+
+
+def test_resize_variants() -> None:
+    sizes = [(32, 32), (200, 100), (64, 48)]
+
+    resized = resize_variants(make_image('JPEG'), sizes)
+
+    assert len(resized) == len(sizes)
+    for size, variant in zip(sizes, resized):
+        with Image.open(io.BytesIO(variant.data)) as image:
+            assert image.size == size
+
+
+def test_resize_variants_invalid() -> None:
+    with pytest.raises(ResizeError):
+        resize_variants(b'not an image', [(123, 123)])
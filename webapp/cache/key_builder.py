@@ -1,5 +1,41 @@
+from typing import Sequence, Tuple
+
 from conf.config import settings
 
 
 def get_file_resize_cache(task_id: str) -> str:
-    return f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:file_resize:{task_id}'
\ No newline at end of file
+    return f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:file_resize:{task_id}'
+
+
+def get_file_resize_dedup_cache(content_hash: str, sizes: Sequence[Tuple[int, int]]) -> str:
+    variants = ','.join(f'{width}x{height}' for width, height in sizes)
+    return f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:file_resize_dedup:{content_hash}:{variants}'
+
+
+def get_file_resize_waiters_cache(task_id: str) -> str:
+    return f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:file_resize_waiters:{task_id}'
+
+
+def get_file_resize_channel(task_id: str) -> str:
+    return f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:file_resize_done:{task_id}'
+
+
+def get_rate_limit_cache(scope: str, user_id: int) -> str:
+    return f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:rate_limit:{scope}:{user_id}'
+
+
+def get_queue_lag_cache(topic: str) -> str:
+    return f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:queue_lag:{topic}'
+
+
+def get_recent_write_cache(key: str) -> str:
+    # отметка о недавней записи данных, закэшированных под key
+    return f'{key}:written'
+
+
+def get_user_credentials_cache(username: str) -> str:
+    return f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:user_credentials:{username}'
+
+
+def get_user_files_cache(user_id: int) -> str:
+    return f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:user_files:{user_id}'
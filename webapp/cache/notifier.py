@@ -0,0 +1,158 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import DefaultDict, Iterable, Set, Tuple
+
+import orjson
+from redis.asyncio import Redis
+from redis.asyncio.client import PubSub
+from sqlalchemy.exc import SQLAlchemyError
+
+from webapp.cache.key_builder import get_file_resize_channel
+from webapp.cache.results import get_results
+
+logger = logging.getLogger(__name__)
+
+ResultT = Tuple[str, bytes]
+
+
+class Subscription:
+    def __init__(self, notifier: 'ResultNotifier') -> None:
+        self.notifier = notifier
+        self.task_ids: Set[str] = set()
+        self.queue: asyncio.Queue[ResultT] = asyncio.Queue()
+
+    async def add(self, task_ids: Iterable[str]) -> None:
+        # Сначала подписываемся, потом читаем уже готовые результаты:
+        # результат, записанный между этими шагами, придёт через pub/sub.
+        new_task_ids = [task_id for task_id in dict.fromkeys(task_ids) if task_id not in self.task_ids]
+        if not new_task_ids:
+            return
+
+        self.task_ids.update(new_task_ids)
+        for task_id in new_task_ids:
+            self.notifier.waiters[task_id].add(self)
+
+        try:
+            results = await get_results(self.notifier.redis, new_task_ids)
+        except (OSError, SQLAlchemyError):
+            # без postgres ждём только новые результаты через pub/sub
+            logger.warning('Failed to read stored resize results', exc_info=True)
+            return
+        for task_id, result in zip(new_task_ids, results):
+            if result is not None:
+                self.deliver(task_id, orjson.dumps(result))
+
+    def deliver(self, task_id: str, result: bytes) -> None:
+        # результат по задаче отдаём один раз, даже если он пришёл и из mget, и из pub/sub
+        if task_id not in self.task_ids:
+            return
+
+        self.task_ids.discard(task_id)
+        self.notifier.discard(task_id, self)
+        self.queue.put_nowait((task_id, result))
+
+    async def get(self, timeout: float | None) -> ResultT | None:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    @property
+    def pending(self) -> bool:
+        return bool(self.task_ids) or not self.queue.empty()
+
+    def close(self) -> None:
+        for task_id in self.task_ids:
+            self.notifier.discard(task_id, self)
+        self.task_ids.clear()
+
+
+class ResultNotifier:
+    # Одно pub/sub соединение на процесс, уведомления раздаются ожидающим запросам внутри процесса.
+    def __init__(self, redis: Redis, resubscribe_delay: float = 1) -> None:
+        self.redis = redis
+        self.resubscribe_delay = resubscribe_delay
+        self.waiters: DefaultDict[str, Set[Subscription]] = defaultdict(set)
+
+        self._pubsub: PubSub = redis.pubsub()
+        self._task: asyncio.Task[None] | None = None
+
+    async def start(self) -> None:
+        await self._pubsub.psubscribe(get_file_resize_channel('*'))
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        await self._pubsub.aclose()
+
+    def subscribe(self) -> Subscription:
+        return Subscription(self)
+
+    def discard(self, task_id: str, subscription: Subscription) -> None:
+        subscriptions = self.waiters.get(task_id)
+        if subscriptions is None:
+            return
+
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self.waiters[task_id]
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=None)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Lost resize notifications subscription, resubscribing')
+                await self._resubscribe()
+                continue
+
+            if message is None or message['type'] != 'pmessage':
+                continue
+
+            task_id = message['channel'].decode().rsplit(':', 1)[-1]
+            for subscription in list(self.waiters.get(task_id, ())):
+                subscription.deliver(task_id, message['data'])
+
+    async def _resubscribe(self) -> None:
+        # старое соединение выбрасываем целиком и подписываемся заново, пока redis не ответит
+        while True:
+            await asyncio.sleep(self.resubscribe_delay)
+            try:
+                await self._pubsub.aclose()
+            except Exception:
+                logger.warning('Failed to close resize notifications subscription', exc_info=True)
+
+            self._pubsub = self.redis.pubsub()
+            try:
+                await self._pubsub.psubscribe(get_file_resize_channel('*'))
+            except Exception:
+                logger.exception('Failed to resubscribe to resize notifications')
+                continue
+            break
+
+        # результаты, опубликованные, пока подписки не было
+        task_ids = list(self.waiters)
+        if not task_ids:
+            return
+        try:
+            results = await get_results(self.redis, task_ids)
+        except (OSError, SQLAlchemyError):
+            logger.warning('Failed to read stored resize results', exc_info=True)
+            return
+        for task_id, result in zip(task_ids, results):
+            if result is None:
+                continue
+            data = orjson.dumps(result)
+            for subscription in list(self.waiters.get(task_id, ())):
+                subscription.deliver(task_id, data)
+
+
+notifier: ResultNotifier
+
+
+def get_notifier() -> ResultNotifier:
+    return notifier
@@ -0,0 +1,23 @@
+from typing import Dict
+
+from redis.asyncio import Redis
+
+from conf.config import settings
+from webapp.cache.key_builder import get_queue_lag_cache
+
+
+async def report_queue_lag(redis: Redis, topic: str, lags: Dict[int, int]) -> None:
+    # Каждый воркер пишет отставание своих партиций. Если воркеры перестали отчитываться,
+    # ключ истекает, и отставание считается неизвестным.
+    if not lags:
+        return
+
+    key = get_queue_lag_cache(topic)
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.hset(key, mapping=lags)
+        pipe.expire(key, settings.QUEUE_LAG_TTL)
+        await pipe.execute()
+
+
+async def get_queue_lag(redis: Redis, topic: str) -> int:
+    return sum(int(lag) for lag in await redis.hvals(get_queue_lag_cache(topic)))
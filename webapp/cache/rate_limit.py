@@ -0,0 +1,35 @@
+from redis.asyncio import Redis
+
+# Токены пополняются со скоростью rate до burst. Время берём у redis,
+# чтобы часы разных процессов не влияли на корзину. Ответ - через сколько секунд
+# появится нужное число токенов, 0 - токены списаны.
+TOKEN_BUCKET_SCRIPT = '''
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    retry_after = (cost - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+
+return tostring(retry_after)
+'''
+
+
+async def acquire_token(redis: Redis, key: str, rate: float, burst: int, cost: int = 1) -> float:
+    # evalsha, а при первом вызове на сервере - load и повтор
+    return float(await redis.register_script(TOKEN_BUCKET_SCRIPT)(keys=[key], args=[rate, burst, cost]))
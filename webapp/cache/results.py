@@ -0,0 +1,122 @@
+from collections import defaultdict
+from typing import Any, DefaultDict, Dict, List, Sequence
+
+import msgpack
+import orjson
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from conf.config import settings
+from webapp.cache.key_builder import get_file_resize_cache, get_file_resize_channel
+from webapp.crud.file import get_files_by_task_ids
+from webapp.db.postgres import read_session
+from webapp.metrics import RESULT_STORE, RESULT_STORE_ENTRY_SIZE
+from webapp.models.sirius.file import File
+from webapp.schema.file.resize import ResizeStatusEnum
+
+ResultT = Dict[str, Any]
+
+# задача опубликована, результата ещё нет: опрос такой задачи не ходит в postgres
+PENDING_RESULT = msgpack.packb(None)
+
+
+def pack_result(result: ResultT) -> bytes:
+    # [status, url, [[width, height, url], ...]]: без имён полей и без task_id, он и так в ключе
+    variants = result.get('variants')
+    return msgpack.packb(
+        [
+            result['status'],
+            result.get('url'),
+            [[variant['width'], variant['height'], variant['url']] for variant in variants]
+            if variants is not None
+            else None,
+        ]
+    )
+
+
+def unpack_result(task_id: str, data: bytes) -> ResultT:
+    status, url, variants = msgpack.unpackb(data)
+    result: ResultT = {'status': status, 'task_id': task_id}
+    if url is not None:
+        result['url'] = url
+    if variants is not None:
+        result['variants'] = [{'width': width, 'height': height, 'url': url} for width, height, url in variants]
+    return result
+
+
+def build_result(task_id: str, files: Sequence[File]) -> ResultT:
+    # в postgres лежат только готовые файлы; первый по id - первый запрошенный размер
+    result: ResultT = {'status': ResizeStatusEnum.done.value, 'task_id': task_id, 'url': files[0].url}
+    if len(files) > 1 and all(file.width is not None for file in files):
+        result['variants'] = [{'width': file.width, 'height': file.height, 'url': file.url} for file in files]
+    return result
+
+
+async def store_result(redis: Redis, task_id: str, result: ResultT) -> None:
+    # в redis - компактная запись с TTL, ожидающим клиентам через pub/sub сразу уходит json
+    data = pack_result(result)
+    RESULT_STORE_ENTRY_SIZE.observe(len(data))
+
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.set(get_file_resize_cache(task_id), data, ex=settings.RESULT_CACHE_TTL)
+        pipe.publish(get_file_resize_channel(task_id), orjson.dumps(result))
+        await pipe.execute()
+
+
+async def store_pending(redis: Redis, task_id: str) -> None:
+    # nx: быстрый воркер мог уже записать результат
+    await redis.set(get_file_resize_cache(task_id), PENDING_RESULT, nx=True, ex=settings.RESULT_PENDING_TTL)
+
+
+async def load_results(redis: Redis, session: AsyncSession, task_ids: Sequence[str]) -> Dict[str, ResultT]:
+    files: DefaultDict[str, List[File]] = defaultdict(list)
+    for file in await get_files_by_task_ids(session, task_ids):
+        files[file.task_id].append(file)
+
+    results = {task_id: build_result(task_id, task_files) for task_id, task_files in files.items()}
+    if results:
+        async with redis.pipeline(transaction=False) as pipe:
+            for task_id, result in results.items():
+                pipe.set(get_file_resize_cache(task_id), pack_result(result), ex=settings.RESULT_CACHE_TTL)
+            await pipe.execute()
+
+    return results
+
+
+async def get_results(
+    redis: Redis,
+    task_ids: Sequence[str],
+    session: AsyncSession | None = None,
+) -> List[ResultT | None]:
+    # Read-through: redis, при промахе - таблица file, найденное снова кладётся в redis.
+    # Задачи в работе помечены PENDING_RESULT, в postgres идут только промахи по давно завершённым.
+    # Без session промахи читаются через короткую сессию на реплике.
+    stored: List[bytes | None] = await redis.mget([get_file_resize_cache(task_id) for task_id in task_ids])
+    results: List[ResultT | None] = [
+        unpack_result(task_id, data) if data is not None and data != PENDING_RESULT else None
+        for task_id, data in zip(task_ids, stored)
+    ]
+
+    missing = [task_id for task_id, data in zip(task_ids, stored) if data is None]
+    pending = sum(data == PENDING_RESULT for data in stored)
+    RESULT_STORE.labels(result='hit').inc(len(task_ids) - len(missing) - pending)
+    RESULT_STORE.labels(result='pending').inc(pending)
+    if not missing:
+        return results
+
+    if session is not None:
+        loaded = await load_results(redis, session, missing)
+    else:
+        async with read_session() as session:
+            loaded = await load_results(redis, session, missing)
+
+    RESULT_STORE.labels(result='db_hit').inc(len(loaded))
+    RESULT_STORE.labels(result='miss').inc(len(missing) - len(loaded))
+    return [
+        result if result is not None or data == PENDING_RESULT else loaded.get(task_id)
+        for task_id, result, data in zip(task_ids, results, stored)
+    ]
+
+
+async def get_result(redis: Redis, task_id: str, session: AsyncSession | None = None) -> ResultT | None:
+    return (await get_results(redis, [task_id], session))[0]
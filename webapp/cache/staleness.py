@@ -0,0 +1,20 @@
+import math
+from typing import Sequence
+
+from redis.asyncio import Redis
+
+from conf.config import settings
+from webapp.cache.key_builder import get_recent_write_cache
+
+
+async def invalidate_written(redis: Redis, keys: Sequence[str]) -> None:
+    # Сбрасывает кэш после записи и помечает ключи: пока метка жива, промах читается с primary,
+    # иначе отстающая реплика вернёт и снова закэширует старые данные.
+    if not keys:
+        return
+
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.delete(*keys)
+        for key in keys:
+            pipe.set(get_recent_write_cache(key), 1, px=math.ceil(settings.DB_REPLICA_STALENESS * 1000))
+        await pipe.execute()
@@ -0,0 +1,53 @@
+import time
+from typing import Iterable
+
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from conf.config import settings
+from webapp.cache.key_builder import get_recent_write_cache, get_user_credentials_cache
+from webapp.cache.staleness import invalidate_written
+from webapp.crud.user import get_user_by_username
+from webapp.db.postgres import fresh_session
+from webapp.metrics import LOGIN_STEP_LATENCY, USER_CACHE
+from webapp.schema.login.user import UserCredentials
+
+# отметка «такого пользователя нет»
+MISSING = b''
+
+
+async def get_user_credentials(redis: Redis, session: AsyncSession, username: str) -> UserCredentials | None:
+    # read-through: redis, при промахе - postgres; неизвестные логины кэшируются ненадолго
+    key = get_user_credentials_cache(username)
+
+    start = time.perf_counter()
+    # метку недавней записи читаем тем же запросом, на попадание это не влияет
+    cached, written = await redis.mget(key, get_recent_write_cache(key))
+    LOGIN_STEP_LATENCY.labels(step='cache').observe(time.perf_counter() - start)
+
+    if cached == MISSING:
+        USER_CACHE.labels(result='negative_hit').inc()
+        return None
+    if cached is not None:
+        USER_CACHE.labels(result='hit').inc()
+        return UserCredentials.model_validate_json(cached)
+    USER_CACHE.labels(result='miss').inc()
+
+    start = time.perf_counter()
+    async with fresh_session(session, written is not None) as session:
+        user = await get_user_by_username(session, username)
+    LOGIN_STEP_LATENCY.labels(step='db').observe(time.perf_counter() - start)
+
+    if user is None:
+        await redis.set(key, MISSING, ex=settings.USER_NEGATIVE_CACHE_TTL)
+        return None
+
+    credentials = UserCredentials.model_validate(user)
+    await redis.set(key, credentials.model_dump_json(), ex=settings.USER_CACHE_TTL)
+    return credentials
+
+
+async def invalidate_user_credentials(redis: Redis, usernames: Iterable[str]) -> None:
+    # вызывать после создания пользователей, смены пароля или логина:
+    # иначе свежий логин ещё USER_NEGATIVE_CACHE_TTL отвечает «нет такого пользователя»
+    await invalidate_written(redis, [get_user_credentials_cache(username) for username in usernames])
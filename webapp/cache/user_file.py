@@ -0,0 +1,59 @@
+from typing import Iterable
+
+import orjson
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from conf.config import settings
+from webapp.cache.key_builder import get_recent_write_cache, get_user_files_cache
+from webapp.cache.staleness import invalidate_written
+from webapp.crud.user_file import get_user_files_page, get_username
+from webapp.db.postgres import fresh_session
+
+
+async def get_user_files(
+    redis: Redis,
+    session: AsyncSession,
+    user_id: int,
+    cursor: int | None,
+    limit: int,
+) -> bytes | None:
+    # Возвращает готовый json страницы или None, если пользователя нет.
+    # Страницы пользователя лежат в одном hash, чтобы сбрасывать их одним DEL.
+    key = get_user_files_cache(user_id)
+    page_key = f'{cursor or 0}:{limit}'
+
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.hget(key, page_key)
+        pipe.exists(get_recent_write_cache(key))
+        cached, written = await pipe.execute()
+    if cached is not None:
+        return cached
+
+    async with fresh_session(session, bool(written)) as session:
+        username = await get_username(session, user_id)
+        if username is None:
+            return None
+
+        # берём на строку больше, чтобы понять, есть ли следующая страница
+        rows = await get_user_files_page(session, user_id, cursor, limit + 1)
+    page = rows[:limit]
+    page_json = orjson.dumps(
+        {
+            'files': [{'url': row.url, 'task_id': row.task_id} for row in page],
+            'username': username,
+            'next_cursor': page[-1].id if len(rows) > limit else None,
+        }
+    )
+
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.hset(key, page_key, page_json)
+        pipe.expire(key, settings.USER_FILES_CACHE_TTL)
+        await pipe.execute()
+
+    return page_json
+
+
+async def invalidate_user_files(redis: Redis, user_ids: Iterable[int]) -> None:
+    # вызывать после привязки файла к пользователю
+    await invalidate_written(redis, [get_user_files_cache(user_id) for user_id in user_ids])
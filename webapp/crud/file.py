@@ -0,0 +1,65 @@
+from typing import Any, Dict, Sequence
+
+from sqlalchemy import Row, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from webapp.models.sirius.file import File
+from webapp.models.sirius.user_file import UserFile
+
+
+async def upsert_files(session: AsyncSession, files: Sequence[Dict[str, Any]]) -> Sequence[Row]:
+    # Один insert на все файлы пачки. Повторная доставка задачи из kafka не создаёт дублей:
+    # конфликт по (task_id, width, height) возвращает уже существующую строку.
+    # Строки без размеров под индекс не попадают (NULL не равен NULL), но воркер размеры пишет всегда.
+    statement = insert(File).values(files)
+    return (
+        await session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[File.task_id, File.width, File.height],
+                set_={'url': statement.excluded.url},
+            ).returning(File.id, File.task_id, File.width, File.height)
+        )
+    ).all()
+
+
+async def link_files(session: AsyncSession, links: Sequence[Dict[str, int]]) -> None:
+    if links:
+        await session.execute(insert(UserFile).values(links).on_conflict_do_nothing())
+
+
+async def get_file_by_content(session: AsyncSession, content_hash: str, width: int, height: int) -> File | None:
+    return (
+        await session.scalars(
+            select(File)
+            .where(
+                File.content_hash == content_hash,
+                File.width == width,
+                File.height == height,
+            )
+            .limit(1)
+        )
+    ).one_or_none()
+
+
+async def get_files_by_task_id(session: AsyncSession, task_id: str) -> Sequence[File]:
+    return (await session.scalars(select(File).where(File.task_id == task_id).order_by(File.id))).all()
+
+
+async def get_files_by_task_ids(session: AsyncSession, task_ids: Sequence[str]) -> Sequence[File]:
+    return (await session.scalars(select(File).where(File.task_id.in_(task_ids)).order_by(File.id))).all()
+
+
+async def is_task_owner(session: AsyncSession, user_id: int, task_id: str) -> bool:
+    statement = (
+        select(UserFile.id)
+        .join(File, File.id == UserFile.file_id)
+        .where(UserFile.user_id == user_id, File.task_id == task_id)
+        .limit(1)
+    )
+    return await session.scalar(statement) is not None
+
+
+async def link_file(session: AsyncSession, file_id: int, user_id: int) -> None:
+    await link_files(session, [{'user_id': user_id, 'file_id': file_id}])
+    await session.commit()
@@ -1,17 +1,32 @@
-from sqlalchemy import select
+from typing import Sequence
+
+from sqlalchemy import Row, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
+from webapp.models.sirius.file import File
 from webapp.models.sirius.user import User
+from webapp.models.sirius.user_file import UserFile
+
+
+async def get_username(session: AsyncSession, user_id: int) -> str | None:
+    return await session.scalar(select(User.username).where(User.id == user_id))
+
 
+async def get_user_files_page(
+    session: AsyncSession,
+    user_id: int,
+    cursor: int | None,
+    limit: int,
+) -> Sequence[Row]:
+    # keyset-пагинация по file.id: стоимость страницы не зависит от её номера
+    query = (
+        select(File.id, File.url, File.task_id)
+        .join(UserFile, UserFile.file_id == File.id)
+        .where(UserFile.user_id == user_id)
+        .order_by(File.id)
+        .limit(limit)
+    )
+    if cursor is not None:
+        query = query.where(File.id > cursor)
 
-async def get_user_files(session: AsyncSession, user_id: int):
-    return (
-        await session.scalars(
-            select(User)
-            .where(User.id == user_id)
-            .options(
-                selectinload(User.files),
-            )
-        )
-    ).one_or_none()
\ No newline at end of file
+    return (await session.execute(query)).all()
@@ -1,10 +1,25 @@
-import random
-from typing import List
+import asyncio
+import logging
+import time
+from typing import Dict, List, Sequence
 
+from aiokafka.consumer import AIOKafkaConsumer
 from aiokafka.producer import AIOKafkaProducer
 
+from conf.config import settings
+from webapp.cache.dedup import ResizeClaim
+from webapp.db.kafka_outbox import KafkaOutbox
+from webapp.db.kafka_partitioner import PARTITIONERS
+from webapp.metrics import KAFKA_PARTITION_PUBLISHED, KAFKA_PUBLISH_LATENCY
+from webapp.utils.instrumentation import track_latency
+
+logger = logging.getLogger(__name__)
+
 producer: AIOKafkaProducer
-partitions: List[int]
+consumers: Dict[str, AIOKafkaConsumer] = {}
+outbox: KafkaOutbox
+partitions: Dict[str, List[int]] = {}
+partitions_refresher: asyncio.Task[None]
 
 
 def get_producer() -> AIOKafkaProducer:
@@ -13,7 +28,55 @@ def get_producer() -> AIOKafkaProducer:
     return producer
 
 
-def get_partition() -> int:
+def get_consumer(topic: str) -> AIOKafkaConsumer:
+    global consumers
+
+    return consumers[topic]
+
+
+def get_outbox() -> KafkaOutbox:
+    global outbox
+
+    return outbox
+
+
+def get_partition(topic: str, key: str | None = None) -> int:
     global partitions
 
-    return random.choice(partitions)
+    return PARTITIONERS[settings.KAFKA_PARTITIONER](key.encode() if key is not None else None, partitions[topic])
+
+
+async def refresh_partitions(topics: Sequence[str], interval: float) -> None:
+    # новые партиции топиков подхватываются без перезапуска
+    global partitions
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await get_producer().client.force_metadata_update()
+            for topic in topics:
+                partitions[topic] = sorted(await get_producer().partitions_for(topic))
+        except Exception:
+            logger.exception('Failed to refresh partitions for %s', ', '.join(topics))
+
+
+async def publish(
+    topic: str,
+    value: bytes,
+    partition: int | None = None,
+    key: str | None = None,
+    claim: ResizeClaim | None = None,
+) -> None:
+    # claim - задача, которую outbox провалит, если сообщение не дойдёт; в sync ошибку получает сам запрос
+    KAFKA_PARTITION_PUBLISHED.labels(topic=topic, partition=partition).inc()
+    encoded_key = key.encode() if key is not None else None
+
+    if settings.KAFKA_PUBLISH_MODE == 'buffered':
+        with track_latency('kafka', 'outbox_put'):
+            await get_outbox().put(topic, value, partition, encoded_key, claim)
+        return
+
+    start = time.perf_counter()
+    with track_latency('kafka', 'send_and_wait'):
+        await get_producer().send_and_wait(topic=topic, value=value, key=encoded_key, partition=partition)
+    KAFKA_PUBLISH_LATENCY.labels(mode='sync').observe(time.perf_counter() - start)
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import time
+from typing import NamedTuple, Set
+
+from aiokafka.producer import AIOKafkaProducer
+
+from webapp.cache.dedup import ResizeClaim, fail_resize
+from webapp.db.redis import get_redis
+from webapp.metrics import DEPS_LATENCY, KAFKA_OUTBOX_SIZE, KAFKA_PUBLISH_ERRORS, KAFKA_PUBLISH_LATENCY
+from webapp.utils.instrumentation import ERROR, OK
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxMessage(NamedTuple):
+    topic: str
+    value: bytes
+    partition: int | None
+    key: bytes | None
+    enqueued_at: float
+    # задача, которую надо провалить, если сообщение не дошло: иначе её ждут до RESIZE_DEDUP_TTL
+    claim: ResizeClaim | None = None
+
+
+class OutboxFullError(Exception):
+    pass
+
+
+class KafkaOutbox:
+    # Ограниченный буфер перед продюсером: запрос ждёт только место в очереди,
+    # а батчинг (linger_ms, max_batch_size) и подтверждения брокера идут в фоне.
+    def __init__(self, producer: AIOKafkaProducer, max_size: int, put_timeout: float) -> None:
+        self.producer = producer
+        self.put_timeout = put_timeout
+        self.queue: asyncio.Queue[OutboxMessage] = asyncio.Queue(maxsize=max_size)
+
+        self._task: asyncio.Task[None] | None = None
+        self._in_flight: Set[asyncio.Future[None]] = set()
+        self._failing: Set[asyncio.Task[None]] = set()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        # дожидаемся, пока всё из буфера уйдёт в продюсер и будет подтверждено брокером
+        await self.queue.join()
+        if self._task is not None:
+            self._task.cancel()
+        await self.producer.flush()
+        if self._in_flight:
+            await asyncio.wait(self._in_flight)
+        if self._failing:
+            await asyncio.wait(self._failing)
+
+    async def put(
+        self,
+        topic: str,
+        value: bytes,
+        partition: int | None = None,
+        key: bytes | None = None,
+        claim: ResizeClaim | None = None,
+    ) -> None:
+        message = OutboxMessage(topic, value, partition, key, time.perf_counter(), claim)
+        try:
+            await asyncio.wait_for(self.queue.put(message), self.put_timeout)
+        except asyncio.TimeoutError:
+            raise OutboxFullError from None
+        KAFKA_OUTBOX_SIZE.set(self.queue.qsize())
+
+    async def _run(self) -> None:
+        while True:
+            message = await self.queue.get()
+            KAFKA_OUTBOX_SIZE.set(self.queue.qsize())
+            try:
+                # send ждёт только места в аккумуляторе продюсера, не ответа брокера
+                delivery = await self.producer.send(
+                    message.topic,
+                    message.value,
+                    key=message.key,
+                    partition=message.partition,
+                )
+            except Exception:
+                logger.exception('Failed to enqueue message to %s', message.topic)
+                KAFKA_PUBLISH_ERRORS.inc()
+                self._fail(message)
+            else:
+                self._track(delivery, message)
+            finally:
+                self.queue.task_done()
+
+    def _track(self, delivery: asyncio.Future[None], message: OutboxMessage) -> None:
+        self._in_flight.add(delivery)
+
+        def on_delivered(future: asyncio.Future[None]) -> None:
+            self._in_flight.discard(future)
+            duration = time.perf_counter() - message.enqueued_at
+            if future.cancelled() or future.exception() is not None:
+                logger.error('Failed to deliver message to %s: %r', message.topic, future)
+                KAFKA_PUBLISH_ERRORS.inc()
+                DEPS_LATENCY.labels('kafka', 'delivery', ERROR).observe(duration)
+                self._fail(message)
+                return
+            KAFKA_PUBLISH_LATENCY.labels(mode='buffered').observe(duration)
+            DEPS_LATENCY.labels('kafka', 'delivery', OK).observe(duration)
+
+        delivery.add_done_callback(on_delivered)
+
+    def _fail(self, message: OutboxMessage) -> None:
+        # запрос уже получил task_id: сохраняем failed и снимаем закрепление содержимого
+        if message.claim is None:
+            return
+
+        task = asyncio.create_task(self._fail_resize(message.claim))
+        self._failing.add(task)
+        task.add_done_callback(self._failing.discard)
+
+    async def _fail_resize(self, claim: ResizeClaim) -> None:
+        try:
+            await fail_resize(get_redis(), claim)
+        except Exception:
+            logger.exception('Failed to mark undelivered task %s as failed', claim.task_id)
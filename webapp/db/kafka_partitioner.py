@@ -0,0 +1,24 @@
+import random
+from typing import Callable, Dict, Sequence
+
+from kafka.partitioner.default import murmur2
+
+PartitionerT = Callable[[bytes | None, Sequence[int]], int]
+
+
+def random_partitioner(key: bytes | None, partitions: Sequence[int]) -> int:
+    return random.choice(partitions)
+
+
+def hash_partitioner(key: bytes | None, partitions: Sequence[int]) -> int:
+    if key is None:
+        return random_partitioner(key, partitions)
+
+    # тот же хэш, что у стандартного партиционера kafka: ключ всегда попадает в одну партицию
+    return partitions[(murmur2(key) & 0x7FFFFFFF) % len(partitions)]
+
+
+PARTITIONERS: Dict[str, PartitionerT] = {
+    'random': random_partitioner,
+    'hash': hash_partitioner,
+}
@@ -0,0 +1,13 @@
+from aiohttp import ClientSession
+from miniopy_async import Minio
+
+minio: Minio
+http_session: ClientSession
+
+
+def get_minio() -> Minio:
+    return minio
+
+
+def get_http_session() -> ClientSession:
+    return http_session
@@ -1,18 +1,49 @@
-from typing import AsyncGenerator
+import asyncio
+import itertools
+import logging
+import secrets
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, List
 
-from sqlalchemy import QueuePool
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
 from conf.config import settings
+from webapp.metrics import DB_REPLICA_READS
+from webapp.utils.instrumentation import InstrumentedPool, instrument_engine
 
+logger = logging.getLogger(__name__)
 
-def create_engine() -> AsyncEngine:
-    return create_async_engine(
-        settings.DB_URL,
-        poolclass=QueuePool,
-        connect_args={
-            'statement_cache_size': 0,
-        },
+
+def get_connect_args() -> Dict[str, Any]:
+    if settings.DB_STATEMENT_CACHE:
+        return {
+            'statement_cache_size': settings.DB_STATEMENT_CACHE_SIZE,
+            'prepared_statement_cache_size': settings.DB_STATEMENT_CACHE_SIZE,
+        }
+
+    # pgbouncer отдаёт соединения разным клиентам, имена подготовленных запросов не должны совпадать
+    return {
+        'statement_cache_size': 0,
+        'prepared_statement_cache_size': 0,
+        'prepared_statement_name_func': lambda: f'__asyncpg_{secrets.token_hex(8)}__',
+    }
+
+
+def create_engine(url: str | None = None, pool_size: int | None = None, max_overflow: int | None = None) -> AsyncEngine:
+    return instrument_engine(
+        create_async_engine(
+            url or settings.DB_URL,
+            poolclass=InstrumentedPool,
+            pool_size=settings.DB_POOL_SIZE if pool_size is None else pool_size,
+            max_overflow=settings.DB_MAX_OVERFLOW if max_overflow is None else max_overflow,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+            connect_args=get_connect_args(),
+        )
     )
 
 
@@ -28,7 +59,83 @@ def create_session(engine: AsyncEngine | None = None) -> async_sessionmaker[Asyn
 engine = create_engine()
 async_session = create_session(engine)
 
+replica_engines: List[AsyncEngine] = [
+    create_engine(url, settings.DB_REPLICA_POOL_SIZE, settings.DB_REPLICA_MAX_OVERFLOW)
+    for url in settings.DB_REPLICA_URLS
+]
+replica_sessions: List[async_sessionmaker[AsyncSession]] = [create_session(engine) for engine in replica_engines]
+# номер реплики -> до какого момента её пропускать
+replica_down_until: Dict[int, float] = {}
+replica_counter = itertools.count()
+replica_refresher: asyncio.Task[None]
+
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session() as session:
         yield session
+
+
+async def ping_replica(number: int) -> None:
+    try:
+        # зависшая реплика не должна держать проверку остальных
+        async with asyncio.timeout(settings.DB_POOL_TIMEOUT):
+            async with replica_sessions[number]() as session:
+                await session.execute(text('SELECT 1'))
+    except (OSError, DBAPIError, asyncio.TimeoutError):
+        logger.warning('Replica %d is unavailable, skipping it', number, exc_info=True)
+        replica_down_until[number] = time.monotonic() + settings.DB_REPLICA_RETRY_AFTER
+        DB_REPLICA_READS.labels(target='replica', outcome='error').inc()
+
+
+async def check_replicas() -> None:
+    # после ошибки реплика проверяется снова только через DB_REPLICA_RETRY_AFTER
+    now = time.monotonic()
+    numbers = [number for number in range(len(replica_sessions)) if replica_down_until.get(number, 0) <= now]
+    await asyncio.gather(*(ping_replica(number) for number in numbers))
+
+
+async def refresh_replicas(interval: float) -> None:
+    # доступность реплик проверяется в фоне, сессия в запросе берёт соединение только при первом запросе
+    while True:
+        await check_replicas()
+        await asyncio.sleep(interval)
+
+
+@asynccontextmanager
+async def read_session(primary: bool = False) -> AsyncIterator[AsyncSession]:
+    # Сессия только для чтения: реплики по кругу, недоступные пропускаются, в крайнем случае - primary.
+    if primary or not replica_sessions:
+        async with async_session() as session:
+            yield session
+        return
+
+    start = next(replica_counter)
+    for offset in range(len(replica_sessions)):
+        number = (start + offset) % len(replica_sessions)
+        if replica_down_until.get(number, 0) > time.monotonic():
+            continue
+
+        DB_REPLICA_READS.labels(target='replica', outcome='ok').inc()
+        async with replica_sessions[number]() as session:
+            yield session
+        return
+
+    DB_REPLICA_READS.labels(target='primary', outcome='fallback').inc()
+    async with async_session() as session:
+        yield session
+
+
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    async with read_session() as session:
+        yield session
+
+
+@asynccontextmanager
+async def fresh_session(session: AsyncSession, recently_written: bool) -> AsyncIterator[AsyncSession]:
+    # реплика могла ещё не догнать недавнюю запись - такие данные читаем с primary
+    if not recently_written or not replica_sessions:
+        yield session
+        return
+
+    async with read_session(primary=True) as primary_session:
+        yield primary_session
@@ -4,15 +4,28 @@ from typing import AsyncIterator
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from conf.config import settings
 from webapp.api.file.router import file_router
 from webapp.api.login.router import auth_router
 from webapp.metrics import metrics
-from webapp.on_shutdown import stop_producer
+from webapp.middleware.body_limit import BodySizeLimitMiddleware
+from webapp.middleware.metrics import MetricsMiddleware
+from webapp.on_shutdown import stop_minio, stop_notifier, stop_postgres, stop_producer, stop_queue_lag_refresher
 from webapp.on_startup.kafka import create_producer
-from webapp.on_startup.redis import start_redis
+from webapp.on_startup.minio import start_minio
+from webapp.on_startup.postgres import start_replica_refresher
+from webapp.on_startup.redis import start_notifier, start_queue_lag_refresher, start_redis
 
 
 def setup_middleware(app: FastAPI) -> None:
+    # запас на границы multipart и остальные поля формы
+    app.add_middleware(
+        BodySizeLimitMiddleware,
+        max_body_size=settings.UPLOAD_MAX_SIZE + settings.UPLOAD_CHUNK_SIZE,
+    )
+    # снаружи ограничения размера, чтобы считать и отказы 413
+    app.add_middleware(MetricsMiddleware)
+
     # CORS Middleware should be the last.
     # See https://github.com/tiangolo/fastapi/issues/1663 .
     app.add_middleware(
@@ -34,10 +47,18 @@ def setup_routers(app: FastAPI) -> None:
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     await start_redis()
+    await start_notifier()
+    await start_queue_lag_refresher()
+    await start_minio()
     await create_producer()
+    await start_replica_refresher()
     print('START APP')
     yield
     await stop_producer()
+    await stop_minio()
+    await stop_notifier()
+    await stop_queue_lag_refresher()
+    await stop_postgres()
     print('END APP')
 
 
@@ -12,8 +12,10 @@ from prometheus_client.multiprocess import MultiProcessCollector
 from starlette.requests import Request
 from starlette.responses import Response
 
+from conf.config import settings
 
-DEFAULT_BUCKETS = (
+
+DEFAULT_BUCKETS = tuple(settings.METRICS_BUCKETS) if settings.METRICS_BUCKETS else (
     0.005,
     0.01,
     0.025,
@@ -37,24 +39,185 @@ DEFAULT_BUCKETS = (
 
 
 
-# TODO in middleware
-# prometheus_client.Counter(
-#     'sirius_deps_latency_seconds',
-#     '',
-#     ['endpoint'],
-# )
+# route - шаблон пути, а не сырой путь, чтобы не плодить серии
+REQUESTS = prometheus_client.Counter(
+    'sirius_requests',
+    '',
+    ['method', 'route'],
+)
+# status_class: 4xx, 5xx
+REQUEST_ERRORS = prometheus_client.Counter(
+    'sirius_request_errors',
+    '',
+    ['method', 'route', 'status_class'],
+)
+REQUEST_LATENCY = prometheus_client.Histogram(
+    'sirius_request_latency_seconds',
+    '',
+    ['method', 'route'],
+    buckets=DEFAULT_BUCKETS,
+)
+REQUESTS_IN_PROGRESS = prometheus_client.Gauge(
+    'sirius_requests_in_progress',
+    '',
+    multiprocess_mode='livesum',
+)
 
-# histogram_quantile(0.99, sum(rate(sirius_deps_latency_seconds_bucket[1m])) by (le, endpoint))
-# среднее время обработки за 1 мин
+# histogram_quantile(0.99, sum(rate(sirius_deps_latency_seconds_bucket[1m])) by (le, dependency, operation))
+# 99-й перцентиль времени вызова зависимости за 1 мин
 DEPS_LATENCY = prometheus_client.Histogram(
     'sirius_deps_latency_seconds',
     '',
-    ['endpoint'],
+    # dependency: postgres, redis, kafka, minio, process_pool; outcome: ok, error
+    ['dependency', 'operation', 'outcome'],
+    buckets=DEFAULT_BUCKETS,
+)
+
+# от попадания в publish до подтверждения брокером
+KAFKA_PUBLISH_LATENCY = prometheus_client.Histogram(
+    'sirius_kafka_publish_latency_seconds',
+    '',
+    ['mode'],
+    buckets=DEFAULT_BUCKETS,
+)
+KAFKA_PUBLISH_ERRORS = prometheus_client.Counter(
+    'sirius_kafka_publish_errors',
+    '',
+)
+KAFKA_PARTITION_PUBLISHED = prometheus_client.Counter(
+    'sirius_kafka_partition_published',
+    '',
+    ['topic', 'partition'],
+)
+KAFKA_OUTBOX_SIZE = prometheus_client.Gauge(
+    'sirius_kafka_outbox_size',
+    '',
+    multiprocess_mode='livesum',
+)
+
+# hit - результат уже готов, in_flight - задача ещё в работе, miss - новая задача
+RESIZE_DEDUP = prometheus_client.Counter(
+    'sirius_resize_dedup',
+    '',
+    ['result'],
+)
+
+JWT_CACHE = prometheus_client.Counter(
+    'sirius_jwt_cache',
+    '',
+    ['result'],
+)
+JWT_VALIDATION_LATENCY = prometheus_client.Histogram(
+    'sirius_jwt_validation_seconds',
+    '',
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, float('+inf')),
+)
+
+DB_POOL_CHECKOUT_WAIT = prometheus_client.Histogram(
+    'sirius_db_pool_checkout_wait_seconds',
+    '',
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, float('+inf')),
+)
+DB_POOL_TIMEOUTS = prometheus_client.Counter(
+    'sirius_db_pool_timeouts',
+    '',
+)
+DB_POOL_CHECKED_OUT = prometheus_client.Gauge(
+    'sirius_db_pool_checked_out',
+    '',
+    multiprocess_mode='livesum',
+)
+# pool_size + max_overflow всех пулов процесса
+DB_POOL_CAPACITY = prometheus_client.Gauge(
+    'sirius_db_pool_capacity',
+    '',
+    multiprocess_mode='livesum',
+)
+# target: replica, primary; outcome: ok, error, fallback
+DB_REPLICA_READS = prometheus_client.Counter(
+    'sirius_db_replica_reads',
+    '',
+    ['target', 'outcome'],
+)
+# hit - redis, pending - задача в работе, db_hit - восстановлен из postgres, miss - результата нет
+RESULT_STORE = prometheus_client.Counter(
+    'sirius_result_store',
+    '',
+    ['result'],
+)
+RESULT_STORE_ENTRY_SIZE = prometheus_client.Histogram(
+    'sirius_result_store_entry_bytes',
+    '',
+    buckets=(32, 64, 128, 256, 512, 1024, 2048, 4096, float('+inf')),
+)
+# hit, negative_hit - закэширован неизвестный логин, miss
+USER_CACHE = prometheus_client.Counter(
+    'sirius_user_cache',
+    '',
+    ['result'],
+)
+# step: cache, db, hash
+LOGIN_STEP_LATENCY = prometheus_client.Histogram(
+    'sirius_login_step_seconds',
+    '',
+    ['step'],
     buckets=DEFAULT_BUCKETS,
 )
+# allowed, limited - исчерпан лимит пользователя, overloaded - отказ по глубине очереди уже после allowed
+RATE_LIMIT = prometheus_client.Counter(
+    'sirius_rate_limit',
+    '',
+    ['scope', 'decision'],
+)
+RATE_LIMIT_LATENCY = prometheus_client.Histogram(
+    'sirius_rate_limit_seconds',
+    '',
+    ['scope'],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, float('+inf')),
+)
+# сумма отставания консьюмеров по партициям топика, как её видит процесс
+QUEUE_LAG = prometheus_client.Gauge(
+    'sirius_queue_lag',
+    '',
+    ['topic'],
+    multiprocess_mode='max',
+)
+# lane: fast, bulk
+RESIZE_LANE = prometheus_client.Counter(
+    'sirius_resize_lane',
+    '',
+    ['lane'],
+)
+# от записи задачи в kafka до начала обработки воркером; lane: fast, bulk, shared - обе на одном топике
+WORKER_QUEUE_TIME = prometheus_client.Histogram(
+    'sirius_worker_queue_seconds',
+    '',
+    ['lane'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, float('+inf')),
+)
+# resize - изображение не удалось обработать, invalid - битое сообщение, retry - временная ошибка, задача повторяется
+WORKER_FAILED_TASKS = prometheus_client.Counter(
+    'sirius_worker_failed_tasks',
+    '',
+    ['reason'],
+)
+# задач в одной записи в postgres
+WORKER_PERSIST_BATCH = prometheus_client.Histogram(
+    'sirius_worker_persist_batch_size',
+    '',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, float('+inf')),
+)
+# от постановки результата в очередь до коммита
+WORKER_PERSIST_LAG = prometheus_client.Histogram(
+    'sirius_worker_persist_lag_seconds',
+    '',
+    buckets=DEFAULT_BUCKETS,
+)
+
 
 def metrics(request: Request) -> Response:
-    if 'prometheus_multiproc_dir' in os.environ:
+    # PROMETHEUS_MULTIPROC_DIR выставляет conf/gunicorn.py при запуске нескольких воркеров
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ or 'prometheus_multiproc_dir' in os.environ:
         registry = CollectorRegistry()
         MultiProcessCollector(registry)
     else:
@@ -0,0 +1,41 @@
+from fastapi import HTTPException
+from fastapi.responses import ORJSONResponse
+from starlette import status
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class BodySizeLimitMiddleware:
+    def __init__(self, app: ASGIApp, max_body_size: int) -> None:
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        # отказываем до чтения тела, если клиент честно прислал размер
+        content_length = Headers(scope=scope).get('content-length', '')
+        if content_length.isdigit() and int(content_length) > self.max_body_size:
+            response = ORJSONResponse(
+                {'detail': 'Request Entity Too Large'},
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > self.max_body_size:
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+            return message
+
+        await self.app(scope, limited_receive, send)
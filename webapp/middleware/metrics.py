@@ -0,0 +1,66 @@
+import time
+from typing import Dict, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from webapp.metrics import REQUEST_ERRORS, REQUEST_LATENCY, REQUESTS, REQUESTS_IN_PROGRESS
+
+UNMATCHED_ROUTE = 'unmatched'
+
+
+def get_route_template(scope: Scope) -> str:
+    # роутер дописывает найденный маршрут в scope, сырой путь в метки не попадает
+    route = scope.get('route')
+    if route is not None:
+        return route.path
+
+    # маршруты starlette (например, /metrics) route не проставляют, но без параметров путь и есть шаблон
+    if scope.get('endpoint') is not None and not scope.get('path_params'):
+        return scope['path']
+
+    return UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        # labels() на каждый запрос заметно дороже поиска в словаре
+        self._children: Dict[Tuple[str, str], Tuple] = {}
+
+    def _get_children(self, method: str, route: str) -> Tuple:
+        children = self._children.get((method, route))
+        if children is None:
+            children = (REQUESTS.labels(method, route), REQUEST_LATENCY.labels(method, route))
+            self._children[(method, route)] = children
+
+        return children
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            REQUESTS_IN_PROGRESS.dec()
+
+            method = scope['method']
+            route = get_route_template(scope)
+            requests, latency = self._get_children(method, route)
+            requests.inc()
+            latency.observe(duration)
+            if status_code >= 400:
+                REQUEST_ERRORS.labels(method, route, f'{status_code // 100}xx').inc()
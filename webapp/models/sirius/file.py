@@ -1,6 +1,6 @@
 from typing import List, TYPE_CHECKING
 
-from sqlalchemy import Integer, String, Text
+from sqlalchemy import Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from webapp.models.meta import DEFAULT_SCHEMA, Base
@@ -11,13 +11,22 @@ if TYPE_CHECKING:
 
 class File(Base):
     __tablename__ = 'file'
-    __table_args__ = ({'schema': DEFAULT_SCHEMA},)
+    __table_args__ = (
+        Index('ix_file_content_hash_width_height', 'content_hash', 'width', 'height'),
+        # идемпотентная запись результатов; он же индекс для поиска по task_id
+        Index('ux_file_task_id_width_height', 'task_id', 'width', 'height', unique=True),
+        {'schema': DEFAULT_SCHEMA},
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
 
     url: Mapped[str] = mapped_column(Text)
     task_id: Mapped[str] = mapped_column(String)
 
+    content_hash: Mapped[str | None] = mapped_column(String, nullable=True)
+    width: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    height: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
     users: Mapped[List['User']] = relationship(
         'User',
         secondary=f'{DEFAULT_SCHEMA}.user_file',
@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, ForeignKey
+from sqlalchemy import Index, Integer, ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column
 
 from ..meta import DEFAULT_SCHEMA, Base
@@ -6,7 +6,11 @@ from ..meta import DEFAULT_SCHEMA, Base
 
 class UserFile(Base):
     __tablename__ = 'user_file'
-    __table_args__ = ({'schema': DEFAULT_SCHEMA},)
+    __table_args__ = (
+        # покрывающий индекс для постраничной выдачи файлов пользователя, заодно защищает от дублей связей
+        Index('ux_user_file_user_id_file_id', 'user_id', 'file_id', unique=True),
+        {'schema': DEFAULT_SCHEMA},
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
 
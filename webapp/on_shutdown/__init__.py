@@ -1,5 +1,33 @@
-from webapp.db import kafka
+from webapp.cache import notifier
+from webapp.db import kafka, minio, postgres
+from webapp.utils import admission
 
 
 async def stop_producer() -> None:
+    kafka.partitions_refresher.cancel()
+    await kafka.outbox.stop()
     await kafka.producer.stop()
+
+
+async def stop_consumers() -> None:
+    for consumer in kafka.consumers.values():
+        await consumer.stop()
+
+
+async def stop_minio() -> None:
+    await minio.http_session.close()
+
+
+async def stop_notifier() -> None:
+    await notifier.notifier.stop()
+
+
+async def stop_queue_lag_refresher() -> None:
+    admission.queue_lag_refresher.cancel()
+
+
+async def stop_postgres() -> None:
+    postgres.replica_refresher.cancel()
+    for engine in postgres.replica_engines:
+        await engine.dispose()
+    await postgres.engine.dispose()
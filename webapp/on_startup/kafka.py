@@ -1,12 +1,46 @@
+import asyncio
+
+from aiokafka.consumer import AIOKafkaConsumer
 from aiokafka.producer import AIOKafkaProducer
 
 from conf.config import settings
 from webapp.db import kafka
+from webapp.db.kafka_outbox import KafkaOutbox
+from webapp.utils.lanes import get_topics
 
 
 async def create_producer() -> None:
-    kafka.producer = AIOKafkaProducer(bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS)
+    kafka.producer = AIOKafkaProducer(
+        bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS,
+        linger_ms=settings.KAFKA_LINGER_MS,
+        max_batch_size=settings.KAFKA_MAX_BATCH_SIZE,
+        compression_type=settings.KAFKA_COMPRESSION_TYPE,
+    )
 
     await kafka.producer.start()
 
-    kafka.partitions = list(await kafka.producer.partitions_for(settings.KAFKA_TOPIC))
+    for topic in get_topics():
+        kafka.partitions[topic] = sorted(await kafka.producer.partitions_for(topic))
+    kafka.partitions_refresher = asyncio.create_task(
+        kafka.refresh_partitions(get_topics(), settings.KAFKA_PARTITIONS_REFRESH_INTERVAL)
+    )
+
+    kafka.outbox = KafkaOutbox(kafka.producer, settings.KAFKA_OUTBOX_SIZE, settings.KAFKA_OUTBOX_PUT_TIMEOUT)
+    kafka.outbox.start()
+
+
+async def create_consumer(topic: str, max_poll_records: int) -> AIOKafkaConsumer:
+    consumer = AIOKafkaConsumer(
+        topic,
+        bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS,
+        group_id=settings.KAFKA_CONSUMER_GROUP,
+        # оффсет коммитим сами, после записи результата
+        enable_auto_commit=False,
+        auto_offset_reset='earliest',
+        max_poll_records=max_poll_records,
+    )
+
+    await consumer.start()
+    kafka.consumers[topic] = consumer
+
+    return consumer
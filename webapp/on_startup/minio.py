@@ -0,0 +1,20 @@
+from aiohttp import ClientSession
+from miniopy_async import Minio
+
+from conf.config import settings
+from webapp.db import minio
+
+
+async def start_minio() -> None:
+    minio.minio = Minio(
+        settings.MINIO_ENDPOINT,
+        access_key=settings.MINIO_ACCESS_KEY,
+        secret_key=settings.MINIO_SECRET_KEY,
+        secure=settings.MINIO_SECURE,
+    )
+    # нужна miniopy-async для чтения объектов
+    minio.http_session = ClientSession()
+
+    for bucket in (settings.MINIO_ORIGINALS_BUCKET, settings.MINIO_RESIZED_BUCKET):
+        if not await minio.minio.bucket_exists(bucket):
+            await minio.minio.make_bucket(bucket)
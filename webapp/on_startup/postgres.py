@@ -0,0 +1,8 @@
+import asyncio
+
+from conf.config import settings
+from webapp.db import postgres
+
+
+async def start_replica_refresher() -> None:
+    postgres.replica_refresher = asyncio.create_task(postgres.refresh_replicas(settings.DB_REPLICA_CHECK_INTERVAL))
@@ -1,7 +1,13 @@
-from redis.asyncio import ConnectionPool, Redis
+import asyncio
+
+from redis.asyncio import ConnectionPool
 
 from conf.config import settings
+from webapp.cache import notifier
 from webapp.db import redis
+from webapp.utils import admission
+from webapp.utils.instrumentation import InstrumentedRedis
+from webapp.utils.lanes import get_topics
 
 
 async def start_redis() -> None:
@@ -10,7 +16,17 @@ async def start_redis() -> None:
         port=settings.REDIS_PORT,
         password=settings.REDIS_PASSWORD,
     )
-    redis.redis = Redis(
+    redis.redis = InstrumentedRedis(
         connection_pool=pool,
     )
 
+
+async def start_notifier() -> None:
+    notifier.notifier = notifier.ResultNotifier(redis.redis)
+    await notifier.notifier.start()
+
+
+async def start_queue_lag_refresher() -> None:
+    admission.queue_lag_refresher = asyncio.create_task(
+        admission.refresh_queue_lag(redis.redis, get_topics(), settings.ADMISSION_REFRESH_INTERVAL)
+    )
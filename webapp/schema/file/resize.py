@@ -1,7 +1,15 @@
 import enum
+from typing import Dict, List, Tuple
 
 from fastapi import Form, UploadFile
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from conf.config import settings
+
+SizeT = Tuple[int, int]
+
+# 100x100, стороны до 99999
+VARIANT_PATTERN = r'^[1-9][0-9]{0,4}x[1-9][0-9]{0,4}$'
 
 
 class ImageResize(BaseModel):
@@ -13,8 +21,27 @@ class ImageResize(BaseModel):
 
 class ResizeStatusEnum(enum.Enum):
     status = 'status'
+    done = 'done'
+    failed = 'failed'
+
+
+class ResizedVariant(BaseModel):
+    width: int
+    height: int
+    url: str
 
 
 class ImageResizeResponse(BaseModel):
     status: ResizeStatusEnum
     task_id: str
+    url: str | None = None
+    variants: List[ResizedVariant] | None = None
+
+
+class ResizeStatusRequest(BaseModel):
+    task_ids: List[str] = Field(min_length=1, max_length=settings.RESIZE_STATUS_MAX_TASKS)
+
+
+class ResizeStatusResponse(BaseModel):
+    # null - задачи нет или она ещё не готова
+    results: Dict[str, ImageResizeResponse | None]
@@ -3,7 +3,6 @@ from typing import List
 from pydantic import BaseModel, ConfigDict
 
 
-
 class File(BaseModel):
     url: str
     task_id: str
@@ -14,5 +13,7 @@ class File(BaseModel):
 class User(BaseModel):
     files: List[File]
     username: str
+    # id последнего файла страницы, передаётся в cursor за следующей; None - страниц больше нет
+    next_cursor: int | None = None
 
     model_config = ConfigDict(from_attributes=True)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class UserLogin(BaseModel):
@@ -8,3 +8,10 @@ class UserLogin(BaseModel):
 
 class UserLoginResponse(BaseModel):
     access_token: str
+
+
+class UserCredentials(BaseModel):
+    id: int
+    hashed_password: str
+
+    model_config = ConfigDict(from_attributes=True)
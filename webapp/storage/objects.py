@@ -0,0 +1,71 @@
+from typing import Any, AsyncIterator
+
+from aiohttp import ClientResponse
+from miniopy_async.datatypes import Object
+from typing_extensions import TypedDict
+
+from conf.config import settings
+from webapp.db import minio
+from webapp.utils.instrumentation import track_latency
+
+
+class ObjectRef(TypedDict):
+    bucket: str
+    key: str
+    size: int
+    content_type: str
+
+
+async def put_object(bucket: str, key: str, data: Any, size: int, content_type: str) -> ObjectRef:
+    # data - любой объект с (async) read(). minio набирает по одной части MINIO_PART_SIZE
+    # и сразу её отправляет, поэтому в памяти не больше одной части на загрузку.
+    with track_latency('minio', 'put_object'):
+        await minio.get_minio().put_object(
+            bucket,
+            key,
+            data,
+            size,
+            content_type=content_type,
+            part_size=settings.MINIO_PART_SIZE,
+            num_parallel_uploads=1,
+        )
+
+    return ObjectRef(bucket=bucket, key=key, size=size, content_type=content_type)
+
+
+async def read_object(ref: ObjectRef) -> bytes:
+    with track_latency('minio', 'get_object'):
+        response = await minio.get_minio().get_object(ref['bucket'], ref['key'], minio.get_http_session())
+        try:
+            return await response.read()
+        finally:
+            response.release()
+
+
+async def stat_object(bucket: str, key: str) -> Object:
+    with track_latency('minio', 'stat_object'):
+        return await minio.get_minio().stat_object(bucket, key)
+
+
+async def open_object(bucket: str, key: str, offset: int = 0, length: int = 0) -> ClientResponse:
+    # запрос делается сразу, чтобы ошибка хранилища пришла до отправки заголовков ответа;
+    # освободить ответ - забота вызывающего
+    with track_latency('minio', 'get_object'):
+        return await minio.get_minio().get_object(bucket, key, minio.get_http_session(), offset=offset, length=length)
+
+
+async def iter_response(response: ClientResponse) -> AsyncIterator[bytes]:
+    try:
+        async for chunk in response.content.iter_chunked(settings.MINIO_DOWNLOAD_CHUNK_SIZE):
+            yield chunk
+    finally:
+        response.release()
+
+
+def get_object_url(bucket: str, key: str) -> str:
+    return f'{settings.MINIO_PUBLIC_URL}/{bucket}/{key}'
+
+
+def get_object_key(bucket: str, url: str) -> str | None:
+    prefix = f'{settings.MINIO_PUBLIC_URL}/{bucket}/'
+    return url[len(prefix) :] if url.startswith(prefix) else None
@@ -0,0 +1,32 @@
+import hashlib
+
+from fastapi import HTTPException, UploadFile
+from starlette import status
+
+
+class HashingStream:
+    # Читает загруженный файл кусками не больше chunk_size,
+    # по пути считает размер и sha256 и обрывает чтение сверх max_size.
+    def __init__(self, source: UploadFile, max_size: int, chunk_size: int) -> None:
+        self.source = source
+        self.max_size = max_size
+        self.chunk_size = chunk_size
+
+        self.size = 0
+        self.hash = hashlib.sha256()
+
+    async def read(self, size: int = -1) -> bytes:
+        chunk = await self.source.read(min(size, self.chunk_size) if size > 0 else self.chunk_size)
+
+        self.size += len(chunk)
+        if self.size > self.max_size:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        self.hash.update(chunk)
+        return chunk
+
+    async def digest(self) -> str:
+        while await self.read():
+            pass
+
+        return self.hash.hexdigest()
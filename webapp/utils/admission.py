@@ -0,0 +1,82 @@
+import asyncio
+import logging
+import math
+import time
+from typing import Dict, Sequence
+
+from fastapi import Depends, HTTPException
+from redis.asyncio import Redis
+from starlette import status
+
+from conf.config import settings
+from webapp.cache.key_builder import get_rate_limit_cache
+from webapp.cache.queue_lag import get_queue_lag
+from webapp.cache.rate_limit import acquire_token
+from webapp.db import kafka
+from webapp.db.redis import get_redis
+from webapp.metrics import QUEUE_LAG, RATE_LIMIT, RATE_LIMIT_LATENCY
+from webapp.utils.auth.jwt import JwtTokenT, jwt_auth
+
+logger = logging.getLogger(__name__)
+
+queue_lag: Dict[str, int] = {}
+queue_lag_refresher: asyncio.Task[None]
+
+
+async def refresh_queue_lag(redis: Redis, topics: Sequence[str], interval: float) -> None:
+    # отставание читается в фоне, проверка в запросе не ходит в redis
+    while True:
+        for topic in topics:
+            try:
+                queue_lag[topic] = await get_queue_lag(redis, topic)
+                QUEUE_LAG.labels(topic=topic).set(queue_lag[topic])
+            except Exception:
+                logger.exception('Failed to refresh queue lag for %s', topic)
+        await asyncio.sleep(interval)
+
+
+def is_overloaded(topic: str) -> bool:
+    # отставание считается по топику дорожки: забитая bulk не мешает принимать fast
+    lag = queue_lag.get(topic, 0)
+    if settings.ADMISSION_MAX_QUEUE_LAG is not None and lag >= settings.ADMISSION_MAX_QUEUE_LAG:
+        return True
+
+    # буфер продюсера почти полон - брокер не успевает, put всё равно упрётся в таймаут
+    if settings.KAFKA_PUBLISH_MODE == 'buffered':
+        return kafka.get_outbox().queue.qsize() >= settings.KAFKA_OUTBOX_SIZE * settings.ADMISSION_MAX_OUTBOX_FILL
+
+    return False
+
+
+async def rate_limit_resize(
+    access_token: JwtTokenT = Depends(jwt_auth.validate_token),
+    redis: Redis = Depends(get_redis),
+) -> None:
+    # зависимость маршрута: лимит пользователя проверяется до хэширования и загрузки оригинала
+    start = time.perf_counter()
+    retry_after = await acquire_token(
+        redis,
+        get_rate_limit_cache('resize', access_token['user_id']),
+        settings.RATE_LIMIT_RESIZE_RATE,
+        settings.RATE_LIMIT_RESIZE_BURST,
+    )
+    RATE_LIMIT_LATENCY.labels(scope='resize').observe(time.perf_counter() - start)
+
+    if retry_after > 0:
+        RATE_LIMIT.labels(scope='resize', decision='limited').inc()
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            headers={'Retry-After': str(math.ceil(retry_after))},
+        )
+    RATE_LIMIT.labels(scope='resize', decision='allowed').inc()
+
+
+def check_overload(topic: str) -> None:
+    # Топик известен только после выбора дорожки по размеру загрузки, поэтому проверка
+    # идёт уже в обработчике; токен пользователя к этому моменту списан.
+    if is_overloaded(topic):
+        RATE_LIMIT.labels(scope='resize', decision='overloaded').inc()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={'Retry-After': str(settings.ADMISSION_RETRY_AFTER)},
+        )
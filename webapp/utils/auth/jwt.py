@@ -1,7 +1,10 @@
+import hashlib
+import time
 import uuid
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Annotated, cast
+from typing import Annotated, Tuple, cast
 
 from fastapi import Header, HTTPException
 from jose import JWTError, jwt
@@ -9,6 +12,7 @@ from starlette import status
 from typing_extensions import TypedDict
 
 from conf.config import settings
+from webapp.metrics import JWT_CACHE, JWT_VALIDATION_LATENCY
 
 
 class JwtTokenT(TypedDict):
@@ -20,6 +24,11 @@ class JwtTokenT(TypedDict):
 @dataclass
 class JwtAuth:
     secret: str
+    cache_size: int = 10000
+    cache_ttl: float = 300
+
+    # дайджест токена -> (момент истечения записи, claims)
+    _cache: OrderedDict[bytes, Tuple[float, JwtTokenT]] = field(default_factory=OrderedDict, init=False, repr=False)
 
     def create_token(self, user_id: int) -> str:
         access_token = {
@@ -29,13 +38,48 @@ class JwtAuth:
         }
         return jwt.encode(access_token, self.secret)
 
-    def validate_token(self, authorization: Annotated[str, Header()]) -> JwtTokenT:
-        _, token = authorization.split()
+    async def validate_token(self, authorization: Annotated[str, Header()]) -> JwtTokenT:
+        # async, чтобы FastAPI не гонял каждый запрос через threadpool
+        return self.authorize(authorization)
+
+    def authorize(self, authorization: str) -> JwtTokenT:
+        start = time.perf_counter()
+
+        scheme, _, token = authorization.partition(' ')
+        token = token.strip()
+        if scheme.lower() != 'bearer' or not token:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+
+        try:
+            return self.decode_token(token)
+        finally:
+            JWT_VALIDATION_LATENCY.observe(time.perf_counter() - start)
+
+    def decode_token(self, token: str) -> JwtTokenT:
+        digest = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        now = time.time()
+
+        cached = self._cache.get(digest)
+        if cached is not None and cached[0] > now:
+            self._cache.move_to_end(digest)
+            JWT_CACHE.labels(result='hit').inc()
+            return cached[1]
+        JWT_CACHE.labels(result='miss').inc()
 
         try:
-            return cast(JwtTokenT, jwt.decode(token, self.secret))
+            claims = cast(JwtTokenT, jwt.decode(token, self.secret))
         except JWTError:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
 
+        # запись не переживёт сам токен
+        expires_at = min(now + self.cache_ttl, float(cast(int, claims.get('exp', now))))
+        if expires_at > now:
+            self._cache[digest] = (expires_at, claims)
+            self._cache.move_to_end(digest)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        return claims
+
 
-jwt_auth = JwtAuth(settings.JWT_SECRET_SALT)
+jwt_auth = JwtAuth(settings.JWT_SECRET_SALT, settings.JWT_CACHE_SIZE, settings.JWT_CACHE_TTL)
@@ -1,5 +1,11 @@
 import hashlib
+import hmac
 
 
 def hash_password(password: str) -> str:
     return hashlib.md5(password.encode()).hexdigest()
+
+
+def check_password(password: str, hashed_password: str) -> bool:
+    # сравнение за постоянное время, чтобы не подсказывать хэш по времени ответа
+    return hmac.compare_digest(hash_password(password), hashed_password)
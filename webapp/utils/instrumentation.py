@@ -0,0 +1,120 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Connection, ExceptionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
+
+from webapp.metrics import (
+    DB_POOL_CHECKED_OUT,
+    DB_POOL_CHECKOUT_WAIT,
+    DB_POOL_CAPACITY,
+    DB_POOL_TIMEOUTS,
+    DEPS_LATENCY,
+)
+
+OK = 'ok'
+ERROR = 'error'
+
+SQL_OPERATIONS = frozenset(('select', 'insert', 'update', 'delete', 'with', 'copy', 'begin', 'commit', 'rollback'))
+QUERY_START = 'sirius_query_start'
+
+
+@contextmanager
+def track_latency(dependency: str, operation: str) -> Iterator[None]:
+    # perf_counter монотонный, в отличие от time.time не прыгает при коррекции часов
+    start = time.perf_counter()
+    outcome = ERROR
+    try:
+        yield
+        outcome = OK
+    finally:
+        DEPS_LATENCY.labels(dependency, operation, outcome).observe(time.perf_counter() - start)
+
+
+def get_sql_operation(statement: str | None) -> str:
+    operation = statement.lstrip()[:8].split(None, 1)[0].lower() if statement and statement.strip() else ''
+    return operation if operation in SQL_OPERATIONS else 'other'
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # загрузка пула - DB_POOL_CHECKED_OUT / DB_POOL_CAPACITY
+        self._capacity = self.size() + max(self._max_overflow, 0)
+        DB_POOL_CAPACITY.inc(self._capacity)
+
+    def recreate(self) -> 'InstrumentedPool':
+        # engine.dispose() заменяет пул новым, старый из ёмкости убираем, даже если его не закрыли
+        self._release_capacity()
+        return super().recreate()
+
+    def dispose(self) -> None:
+        super().dispose()
+        self._release_capacity()
+
+    def _release_capacity(self) -> None:
+        DB_POOL_CAPACITY.dec(self._capacity)
+        self._capacity = 0
+
+    def connect(self) -> PoolProxiedConnection:
+        # ожидание свободного соединения, включая открытие нового и pre-ping
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            DB_POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+
+def instrument_engine(engine: AsyncEngine) -> AsyncEngine:
+    # события вешаются на sync_engine, async-движок работает поверх него
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, 'checkout')
+    def checkout(*args: Any) -> None:
+        DB_POOL_CHECKED_OUT.inc()
+
+    @event.listens_for(sync_engine, 'checkin')
+    def checkin(*args: Any) -> None:
+        DB_POOL_CHECKED_OUT.dec()
+
+    @event.listens_for(sync_engine, 'before_cursor_execute')
+    def before_cursor_execute(conn: Connection, *args: Any) -> None:
+        conn.info.setdefault(QUERY_START, []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, 'after_cursor_execute')
+    def after_cursor_execute(conn: Connection, cursor: Any, statement: str, *args: Any) -> None:
+        start = conn.info[QUERY_START].pop()
+        DEPS_LATENCY.labels('postgres', get_sql_operation(statement), OK).observe(time.perf_counter() - start)
+
+    @event.listens_for(sync_engine, 'handle_error')
+    def handle_error(context: ExceptionContext) -> None:
+        starts = context.connection.info.get(QUERY_START) if context.connection is not None else None
+        if starts:
+            operation = get_sql_operation(context.statement)
+            DEPS_LATENCY.labels('postgres', operation, ERROR).observe(time.perf_counter() - starts.pop())
+
+    return engine
+
+
+class InstrumentedPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True) -> Any:
+        with track_latency('redis', 'pipeline'):
+            return await super().execute(raise_on_error)
+
+
+class InstrumentedRedis(Redis):
+    # каждая команда клиента проходит через execute_command, pipeline замеряется целиком
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        with track_latency('redis', str(args[0]).lower()):
+            return await super().execute_command(*args, **options)
+
+    def pipeline(self, transaction: bool = True, shard_hint: str | None = None) -> InstrumentedPipeline:
+        return InstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
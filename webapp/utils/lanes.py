@@ -0,0 +1,72 @@
+from typing import Dict, List, Mapping, NamedTuple, Sequence
+
+from conf.config import settings
+from webapp.schema.file.resize import SizeT
+
+FAST = 'fast'
+BULK = 'bulk'
+# несколько дорожек на одном топике
+SHARED = 'shared'
+
+
+class Lane(NamedTuple):
+    name: str
+    topic: str
+    # доля слотов и процессов воркера
+    share: float
+
+
+def get_lane_topics() -> Dict[str, str]:
+    return {
+        FAST: settings.KAFKA_TOPIC_FAST or settings.KAFKA_TOPIC,
+        BULK: settings.KAFKA_TOPIC_BULK or settings.KAFKA_TOPIC,
+    }
+
+
+def get_topics() -> List[str]:
+    return list(dict.fromkeys(get_lane_topics().values()))
+
+
+def get_lane(size: int | None, sizes: Sequence[SizeT]) -> str:
+    # размер оригинала определяет чтение и декодирование, площадь вариантов - ресайз и кодирование
+    if size is None or size > settings.LANE_FAST_MAX_BYTES:
+        return BULK
+    if sum(width * height for width, height in sizes) > settings.LANE_FAST_MAX_AREA:
+        return BULK
+
+    return FAST
+
+
+def get_worker_lanes(lanes: Sequence[str], weights: Mapping[str, int]) -> List[Lane]:
+    # дорожки с общим топиком разбирает один консьюмер, их доли складываются
+    lanes = list(dict.fromkeys(lanes))
+    topics: Dict[str, List[str]] = {}
+    for lane in lanes:
+        topics.setdefault(get_lane_topics()[lane], []).append(lane)
+
+    total = sum(weights.get(lane, 1) for lane in lanes)
+    return [
+        Lane(names[0] if len(names) == 1 else SHARED, topic, sum(weights.get(lane, 1) for lane in names) / total)
+        for topic, names in topics.items()
+    ]
+
+
+def get_capacities(total: int, lanes: Sequence[Lane]) -> List[int]:
+    # Доли total методом наибольших остатков: в сумме ровно total, округление не добавляет
+    # процессов и задач сверх настроенных. Дорожке без слота отдаём один у самой крупной;
+    # если total меньше числа дорожек, по одному слоту всё равно получает каждая.
+    exact = [total * lane.share for lane in lanes]
+    capacities = [int(value) for value in exact]
+
+    by_remainder = sorted(range(len(lanes)), key=lambda index: exact[index] - capacities[index], reverse=True)
+    for index in by_remainder[: total - sum(capacities)]:
+        capacities[index] += 1
+
+    for index, capacity in enumerate(capacities):
+        if capacity == 0:
+            largest = max(range(len(lanes)), key=capacities.__getitem__)
+            if capacities[largest] > 1:
+                capacities[largest] -= 1
+            capacities[index] = 1
+
+    return capacities
@@ -0,0 +1,9 @@
+import asyncio
+
+import uvloop
+
+from webapp.worker.main import run
+
+if __name__ == '__main__':
+    uvloop.install()
+    asyncio.run(run())
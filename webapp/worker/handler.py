@@ -0,0 +1,139 @@
+import asyncio
+import io
+import logging
+from concurrent.futures import Executor
+from typing import Any, Dict, List, Set
+
+import msgpack
+from aiokafka.structs import ConsumerRecord
+
+from conf.config import settings
+from webapp.cache.dedup import ResizeClaim, fail_resize
+from webapp.cache.key_builder import get_file_resize_waiters_cache
+from webapp.cache.results import store_result
+from webapp.cache.user_file import invalidate_user_files
+from webapp.crud.file import link_files
+from webapp.db.postgres import async_session
+from webapp.db.redis import get_redis
+from webapp.metrics import WORKER_FAILED_TASKS
+from webapp.schema.file.resize import ResizeStatusEnum, SizeT
+from webapp.storage.objects import get_object_url, put_object, read_object
+from webapp.utils.instrumentation import track_latency
+from webapp.worker.image import ResizedImage, ResizeError, resize_variants
+from webapp.worker.persister import get_persister
+
+logger = logging.getLogger(__name__)
+
+
+async def save_result(task_id: str, result: Dict[str, Any]) -> None:
+    # ожидающие клиенты получают результат через pub/sub, без опроса
+    await store_result(get_redis(), task_id, result)
+
+
+async def get_waiters(key: str) -> Set[int]:
+    return {int(user_id) for user_id in await get_redis().smembers(key)}
+
+
+def get_sizes(task: Dict[str, Any]) -> List[SizeT]:
+    if 'variants' in task:
+        return [(width, height) for width, height in task['variants']]
+
+    return [(task['width'], task['height'])]
+
+
+async def upload_variant(task_id: str, size: SizeT, resized: ResizedImage) -> str:
+    object_name = f'{task_id}/{size[0]}x{size[1]}.{resized.extension}'
+    await put_object(
+        settings.MINIO_RESIZED_BUCKET,
+        object_name,
+        io.BytesIO(resized.data),
+        len(resized.data),
+        resized.content_type,
+    )
+
+    return get_object_url(settings.MINIO_RESIZED_BUCKET, object_name)
+
+
+async def fail_task(task: Dict[str, Any]) -> None:
+    await fail_resize(get_redis(), ResizeClaim(task['task_id'], task.get('content_hash'), get_sizes(task)))
+
+
+def decode_task(value: bytes) -> Dict[str, Any]:
+    # битое сообщение отсеиваем здесь, а не посреди обработки
+    task = msgpack.unpackb(value)
+    get_sizes(task)
+    if not isinstance(task['task_id'], str) or 'image' not in task:
+        raise ValueError('Invalid resize task')
+    return task
+
+
+async def process_message(message: ConsumerRecord, pool: Executor) -> bool:
+    # True - offset можно коммитить: задача выполнена, помечена failed или сообщение битое.
+    # False - временная ошибка (minio, redis, postgres недоступны): задачу повторим с того же offset,
+    # иначе короткий сбой навсегда провалил бы все задачи, пришедшие за это время.
+    try:
+        task = decode_task(message.value)
+    except (ValueError, TypeError, KeyError):
+        logger.exception('Skipping invalid message %s:%d:%d', message.topic, message.partition, message.offset)
+        WORKER_FAILED_TASKS.labels(reason='invalid').inc()
+        return True
+
+    try:
+        await handle_task(task, pool)
+    except Exception:
+        logger.exception('Failed to handle task %s, will retry', task['task_id'])
+        WORKER_FAILED_TASKS.labels(reason='retry').inc()
+        return False
+
+    return True
+
+
+async def handle_task(task: Dict[str, Any], pool: Executor) -> None:
+    task_id = task['task_id']
+    sizes = get_sizes(task)
+    image = await read_object(task['image'])
+
+    try:
+        with track_latency('process_pool', 'resize_image'):
+            resized = await asyncio.get_running_loop().run_in_executor(pool, resize_variants, image, sizes)
+    except ResizeError:
+        logger.warning('Failed to resize image for task %s', task_id, exc_info=True)
+        # изображение не обработать и при повторе - задача failed, сообщение пропускаем
+        WORKER_FAILED_TASKS.labels(reason='resize').inc()
+        await fail_task(task)
+        return
+
+    urls = dict(
+        zip(
+            sizes,
+            await asyncio.gather(*(upload_variant(task_id, size, variant) for size, variant in zip(sizes, resized))),
+        )
+    )
+
+    # пользователи, загрузившие то же изображение, пока задача была в работе
+    waiters = get_file_resize_waiters_cache(task_id)
+    user_ids = {task['user_id'], *await get_waiters(waiters)}
+
+    file_ids = await get_persister().persist(task_id, urls, user_ids, content_hash=task.get('content_hash'))
+    await invalidate_user_files(get_redis(), user_ids)
+
+    result: Dict[str, Any] = {'status': ResizeStatusEnum.done.value, 'task_id': task_id, 'url': urls[sizes[0]]}
+    if 'variants' in task:
+        result['variants'] = [{'width': width, 'height': height, 'url': url} for (width, height), url in urls.items()]
+    await save_result(task_id, result)
+
+    # присоединившиеся, пока писали файл, результат уже увидят, но ссылку на файл надо добавить
+    late_user_ids = await get_waiters(waiters) - user_ids
+    if late_user_ids:
+        async with async_session() as session:
+            await link_files(
+                session,
+                [
+                    {'user_id': user_id, 'file_id': file_id}
+                    for file_id in file_ids.values()
+                    for user_id in late_user_ids
+                ],
+            )
+            await session.commit()
+        await invalidate_user_files(get_redis(), late_user_ids)
+    await get_redis().delete(waiters)
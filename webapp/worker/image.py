@@ -0,0 +1,38 @@
+import io
+from typing import List, NamedTuple, Sequence, Tuple
+
+from PIL import Image
+
+
+class ResizeError(Exception):
+    pass
+
+
+class ResizedImage(NamedTuple):
+    data: bytes
+    extension: str
+    content_type: str
+
+
+def resize_variants(image: bytes, sizes: Sequence[Tuple[int, int]]) -> List[ResizedImage]:
+    # Выполняется в процессе пула: Pillow не должен держать event loop воркера.
+    # Изображение декодируется один раз, все варианты строятся из него.
+    try:
+        with Image.open(io.BytesIO(image)) as source:
+            image_format = source.format or 'PNG'
+            # JPEG сразу декодируется в уменьшенном масштабе, которого хватит на самый большой вариант
+            source.draft(None, (max(width for width, _ in sizes), max(height for _, height in sizes)))
+            source.load()
+            resized = [source.resize(size) for size in sizes]
+
+        results = []
+        for variant in resized:
+            buffer = io.BytesIO()
+            variant.save(buffer, format=image_format)
+            results.append(buffer.getvalue())
+    except (OSError, ValueError, Image.DecompressionBombError) as exc:
+        raise ResizeError(str(exc)) from None
+
+    extension = image_format.lower()
+    content_type = Image.MIME.get(image_format, 'application/octet-stream')
+    return [ResizedImage(data=data, extension=extension, content_type=content_type) for data in results]
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import os
+import signal
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import ExitStack
+from typing import Dict, List
+
+import prometheus_client
+from aiokafka.consumer import AIOKafkaConsumer
+from aiokafka.errors import CommitFailedError
+from aiokafka.structs import TopicPartition
+from redis.exceptions import RedisError
+
+from conf.config import settings
+from webapp.cache.queue_lag import report_queue_lag
+from webapp.db.redis import get_redis
+from webapp.metrics import WORKER_QUEUE_TIME
+from webapp.on_shutdown import stop_consumers, stop_minio, stop_postgres
+from webapp.on_startup.kafka import create_consumer
+from webapp.on_startup.minio import start_minio
+from webapp.on_startup.redis import start_redis
+from webapp.utils.lanes import Lane, get_capacities, get_worker_lanes
+from webapp.worker.handler import process_message
+from webapp.worker.persister import start_persister, stop_persister
+
+logger = logging.getLogger(__name__)
+
+
+async def report_lag(consumer: AIOKafkaConsumer, topic: str, offsets: Dict[TopicPartition, int]) -> None:
+    # по отставанию веб отказывает в новых задачах, когда воркеры не справляются
+    lags: Dict[int, int] = {}
+    for partition in consumer.assignment():
+        highwater = consumer.highwater(partition)
+        if highwater is None:
+            continue
+        position = offsets[partition] if partition in offsets else await consumer.position(partition)
+        lags[partition.partition] = max(highwater - position, 0)
+
+    try:
+        await report_queue_lag(get_redis(), topic, lags)
+    except RedisError:
+        logger.warning('Failed to report queue lag', exc_info=True)
+
+
+def get_retry_delay(retries: int) -> float:
+    return min(settings.WORKER_RETRY_DELAY * 2 ** (retries - 1), settings.WORKER_RETRY_MAX_DELAY)
+
+
+async def consume(consumer: AIOKafkaConsumer, pool: Executor, lane: Lane, max_in_flight: int) -> None:
+    retries = 0
+    while True:
+        # не больше своей доли WORKER_MAX_IN_FLIGHT задач дорожки одновременно на воркер
+        batches = await consumer.getmany(timeout_ms=settings.WORKER_POLL_TIMEOUT_MS, max_records=max_in_flight)
+        if not batches:
+            await report_lag(consumer, lane.topic, {})
+            continue
+
+        now = time.time()
+        messages = [(partition, message) for partition, records in batches.items() for message in records]
+        for _, message in messages:
+            WORKER_QUEUE_TIME.labels(lane=lane.name).observe(max(now - message.timestamp / 1000, 0))
+
+        handled = await asyncio.gather(*(process_message(message, pool) for _, message in messages))
+
+        # Коммитим только после того, как результат записан, и только до первой задачи партиции
+        # с временной ошибкой: с неё партиция читается снова. Задачи после неё повторятся тоже,
+        # запись результатов идемпотентна.
+        offsets: Dict[TopicPartition, int] = {}
+        failed: Dict[TopicPartition, int] = {}
+        for (partition, message), ok in zip(messages, handled):
+            if partition in failed:
+                continue
+            if ok:
+                offsets[partition] = message.offset + 1
+            else:
+                failed[partition] = message.offset
+
+        if offsets:
+            try:
+                await consumer.commit(offsets)
+            except CommitFailedError:
+                logger.warning('Group rebalanced, batch of %d partitions will be redelivered', len(offsets))
+
+        await report_lag(consumer, lane.topic, offsets)
+
+        if not failed:
+            retries = 0
+            continue
+
+        for partition, offset in failed.items():
+            consumer.seek(partition, offset)
+        retries += 1
+        delay = get_retry_delay(retries)
+        logger.warning('Retrying %d partitions of %s in %.1f s', len(failed), lane.topic, delay)
+        await asyncio.sleep(delay)
+
+
+async def run() -> None:
+    await start_redis()
+    await start_minio()
+    start_persister()
+    prometheus_client.start_http_server(settings.WORKER_METRICS_PORT)
+    print('START WORKER')
+
+    # sched_getaffinity учитывает ограничение ядер для контейнера, cpu_count - нет
+    processes = settings.WORKER_PROCESSES or len(os.sched_getaffinity(0))
+    with ExitStack() as stack:
+        # у каждой дорожки свой консьюмер, свои процессы и свой лимит задач:
+        # тяжёлые задачи не занимают слоты и очередь пула, нужные лёгким
+        tasks: List[asyncio.Task[None]] = []
+        lanes = get_worker_lanes(settings.WORKER_LANES, settings.WORKER_LANE_WEIGHTS)
+        for lane, pool_size, max_in_flight in zip(
+            lanes, get_capacities(processes, lanes), get_capacities(settings.WORKER_MAX_IN_FLIGHT, lanes)
+        ):
+            pool = stack.enter_context(ProcessPoolExecutor(max_workers=pool_size))
+            consumer = await create_consumer(lane.topic, max_in_flight)
+            tasks.append(asyncio.create_task(consume(consumer, pool, lane, max_in_flight)))
+
+        consume_task = asyncio.gather(*tasks)
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, consume_task.cancel)
+
+        try:
+            await consume_task
+        except asyncio.CancelledError:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            await stop_persister()
+            await stop_consumers()
+            await stop_minio()
+            await stop_postgres()
+            print('END WORKER')
@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Mapping
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from conf.config import settings
+from webapp.crud.file import link_files, upsert_files
+from webapp.db.postgres import async_session
+from webapp.metrics import WORKER_PERSIST_BATCH, WORKER_PERSIST_LAG
+from webapp.schema.file.resize import SizeT
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingFiles:
+    task_id: str
+    urls: Mapping[SizeT, str]
+    user_ids: Iterable[int]
+    content_hash: str | None
+    future: asyncio.Future[Dict[SizeT, int]]
+    queued_at: float = field(default_factory=time.perf_counter)
+
+
+class FilePersister:
+    def __init__(self, session_maker: async_sessionmaker[AsyncSession], max_batch: int, max_lag: float) -> None:
+        self._session_maker = session_maker
+        self._max_batch = max_batch
+        self._max_lag = max_lag
+        self._pending: List[PendingFiles] = []
+        self._added = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        while self._pending:
+            await self.flush()
+
+    async def persist(
+        self,
+        task_id: str,
+        urls: Mapping[SizeT, str],
+        user_ids: Iterable[int],
+        content_hash: str | None = None,
+    ) -> Dict[SizeT, int]:
+        # ждём коммита пачки, чтобы offset в kafka не ушёл раньше записи в базу
+        pending = PendingFiles(task_id, urls, user_ids, content_hash, asyncio.get_running_loop().create_future())
+        self._pending.append(pending)
+        self._added.set()
+        if len(self._pending) >= self._max_batch:
+            self._full.set()
+
+        return await pending.future
+
+    async def flush(self) -> None:
+        batch, self._pending = self._pending[: self._max_batch], self._pending[self._max_batch :]
+        if not self._pending:
+            self._added.clear()
+        if len(self._pending) < self._max_batch:
+            self._full.clear()
+        if not batch:
+            return
+
+        # повтор задачи в одной пачке даёт один и тот же ключ, on conflict его не переживёт
+        files = {
+            (pending.task_id, width, height): {
+                'task_id': pending.task_id,
+                'url': url,
+                'content_hash': pending.content_hash,
+                'width': width,
+                'height': height,
+            }
+            for pending in batch
+            for (width, height), url in pending.urls.items()
+        }
+
+        try:
+            async with self._session_maker() as session:
+                file_ids: Dict[str, Dict[SizeT, int]] = {}
+                for row in await upsert_files(session, list(files.values())):
+                    file_ids.setdefault(row.task_id, {})[(row.width, row.height)] = row.id
+
+                links = {
+                    (user_id, file_ids[pending.task_id][size])
+                    for pending in batch
+                    for size in pending.urls
+                    for user_id in pending.user_ids
+                }
+                await link_files(session, [{'user_id': user_id, 'file_id': file_id} for user_id, file_id in links])
+                await session.commit()
+        except Exception as exc:
+            logger.exception('Failed to persist batch of %d tasks', len(batch))
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(exc)
+            return
+
+        WORKER_PERSIST_BATCH.observe(len(batch))
+        now = time.perf_counter()
+        for pending in batch:
+            WORKER_PERSIST_LAG.observe(now - pending.queued_at)
+            if not pending.future.done():
+                pending.future.set_result(file_ids[pending.task_id])
+
+    async def _run(self) -> None:
+        while True:
+            await self._added.wait()
+            # пачка уходит, как только набралась или первый результат прождал max_lag
+            try:
+                await asyncio.wait_for(
+                    self._full.wait(), max(self._max_lag - (time.perf_counter() - self._pending[0].queued_at), 0)
+                )
+            except asyncio.TimeoutError:
+                pass
+
+            await self.flush()
+
+
+persister: FilePersister
+
+
+def get_persister() -> FilePersister:
+    global persister
+
+    return persister
+
+
+def start_persister() -> None:
+    global persister
+
+    persister = FilePersister(async_session, settings.WORKER_PERSIST_BATCH_SIZE, settings.WORKER_PERSIST_MAX_LAG)
+    persister.start()
+
+
+async def stop_persister() -> None:
+    await get_persister().close()